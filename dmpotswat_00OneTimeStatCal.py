@@ -59,7 +59,7 @@ if iFlagCopy:
 
 # After copying modify the file.cio to make sure the simulated output contains
 # interested outlet Variables.
-iPrintForCio = modFileCio(ctrlSetting, fdWorkingDir, rchVarLst)
+iPrintForCio = modFileCio(ctrlSetting, fdWorkingDir)
 
 ##########################################################################
 # Read Parameter and preprocessing #######################################
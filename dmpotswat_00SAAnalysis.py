@@ -26,6 +26,7 @@ import pytz
 from pyscripts.globVars import *
 from pyscripts.DMPOTUtil import *
 from pyscripts.SAUtil import *
+from pyscripts.PARALLELUtil import *
 
 from SALib.analyze import sobol, fast
 from SALib.sample import saltelli, fast_sampler
@@ -72,7 +73,7 @@ if iFlagCopy:
 
 # After copying modify the file.cio to make sure the simulated output contains
 # interested outlet Variables.
-iPrintForCio = modFileCio(ctrlSetting, fdWorkingDir, rchVarLst)
+iPrintForCio = modFileCio(ctrlSetting, fdWorkingDir)
 
 ##########################################################################
 # Read Parameter and preprocessing #######################################
@@ -128,19 +129,27 @@ if ctrlSetting["saMethod"] == 1: # For Sobol method
     # 'N' (20) is equal to '2^n'
     sampleMethod = "saltelli"
     saltelliArgument = ctrlSetting["saltelliArg"]
+    sampleArg = saltelliArgument
     if not checkSaltelliArgument(saltelliArgument):
         print("The argument for saltelli sample need to be a value that is power of 2")
         exit()
     parmSamples = saltelli.sample(parmForSA, saltelliArgument)
 elif ctrlSetting["saMethod"] == 2: # For Morris method
     sampleMethod = "Morris"
+    sampleArg = ctrlSetting["morrisRes"]
     parmSamples = morris_sample.sample(parmForSA, ctrlSetting["morrisRes"], num_levels=4)
 elif ctrlSetting["saMethod"] == 3: # For FAST method
     sampleMethod = "Fast"
+    sampleArg = ctrlSetting["fastRes"]
     # SALib.sample.fast_sampler.sample(problem, N, M=4, seed=None)[source]
     parmSamples = fast_sampler.sample(parmForSA, ctrlSetting["fastRes"], M=4)
 
 fnpParmSamples = os.path.join(fdSA, "parmSample_{}.txt".format(sampleMethod))
+# The samples are also kept in full precision to resume a stopped job
+# with the same samples, with the settings used to generate them.
+fnpParmSamplesNpy = os.path.join(fdSA, "parmSample_{}.npy".format(sampleMethod))
+parmSamples, iResume = loadOrSaveSASamples(fnpParmSamplesNpy, parmSamples,
+                    parmForSA, sampleMethod, sampleArg)
 np.savetxt(fnpParmSamples, parmSamples, fmt='%.3f',delimiter=' ')
 
 # Step 3: Evaluate the model with sampled results and
@@ -155,13 +164,76 @@ np.savetxt(fnpParmSamples, parmSamples, fmt='%.3f',delimiter=' ')
 # A list to store the value for allruns, which will be written into a file
 # There are multiple oulets, each outlet will have one list representing
 # the output for all runs.
-outLetAvgAnnList = {}
-for oltNoIdx in range(len(ctrlSetting["outLetList"])):
-    outLetNo = ctrlSetting["outLetList"][oltNoIdx]
-    outLetAvgAnnList[outLetNo] = np.zeros(len(parmSamples))
+# The values of each finished sample are also appended to a file as
+# soon as it is finished. A restarted job reads them back and only
+# runs the samples not finished.
+fnSARunOutput = os.path.join(fdSA, "saRunOutput_{}.txt".format(sampleMethod))
+outLetAvgAnnList, saDoneRuns = initSARunOutput(fnSARunOutput,
+            ctrlSetting["outLetList"],
+            len(parmSamples),
+            iResume)
+saRunIdxLst = [saRunIdx for saRunIdx in range(len(parmSamples))
+                if saRunIdx not in saDoneRuns]
+# Exit code, wall time and peak memory of each run. Killed or failed
+# runs get nan as outlet values. They are not recorded as finished,
+# so they are run again when the job is restarted.
+fnSARunLog = os.path.join(fdSA, "saRunLog_{}.csv".format(sampleMethod))
+initRunLog(fnSARunLog, iResume)
+saFailedRuns = []
+
+if (nWorkers > 1) and (len(saRunIdxLst) > 0):
+    # Spread the samples across the worker directories
+    workerDirs = initWorkerDirs(timeZone, startTime, nWorkers,
+                    fdWorkingDir, fdWorkerDirs)
+    evalContext = buildWorkerEvalContext(ctrlSetting,
+                    parmBsnLvlFExtLst,
+                    parmSubLvlFExtLst,
+                    swatSubFnGroups,
+                    swatHruFnGroups,
+                    iPrintForCio,
+                    rcvRchLst,
+                    [],
+                    parmObjFnKeys,
+                    nCalVal)
+    workerPool = SWATWorkerPool(workerDirs, evalContext, evalSASampleInDir)
+
+    saSubmitIdx = 0
+    while (saSubmitIdx < len(saRunIdxLst)) or workerPool.hasPendingEval():
+        while workerPool.hasFreeWorker() and (saSubmitIdx < len(saRunIdxLst)):
+            saRunIdx = saRunIdxLst[saSubmitIdx]
+            parmValDict = generateParmValDict(parmForSA["names"], parmSamples[saRunIdx])
+            saSubParGroups = copy.deepcopy(subParGroups)
+            for subGPKey, subGPL in saSubParGroups.items():
+                saSubParGroups[subGPKey] = updateParmInDf(subGPL, parmValDict)
+            saParmBsnLvl = updateParmInDf(parmBsnLvl.copy(), parmValDict)
+            workerPool.submitEval(saRunIdx, saSubParGroups, saParmBsnLvl)
+            saSubmitIdx = saSubmitIdx + 1
+
+        for saRunIdx, evalResult in workerPool.waitAnyEval():
+            appendRunLog(fnSARunLog, saRunIdx, evalResult["runInfo"])
+            for outLetNo, oltVal in evalResult["oltAvgAnnVal"].items():
+                outLetAvgAnnList[outLetNo][saRunIdx] = oltVal
+            if isRunFailed(evalResult["runInfo"]):
+                saFailedRuns.append(saRunIdx)
+                print("Sensitivity analysis run no: {} failed, it is run again when the job is restarted".format(
+                    saRunIdx))
+                continue
+            appendSARunOutput(fnSARunOutput, saRunIdx,
+                    ctrlSetting["outLetList"], outLetAvgAnnList)
+            saDoneRuns.add(saRunIdx)
+            runEndTime = datetime.datetime.now(timeZone)
+            print("Finished sensitivity analysis run no: {} ({} of {}); Time for running SWAT: {}; Total Time: {}".format(
+                saRunIdx,
+                len(saDoneRuns),
+                len(parmSamples),
+                evalResult["runTime"],
+                runEndTime - startTime))
+
+    workerPool.shutdown()
+    saRunIdxLst = []
 
 # for saRunIdx in range(1):#len(parmSamples)):
-for saRunIdx in range(len(parmSamples)):
+for saRunIdx in saRunIdxLst:
     print("Executing sensitivity analysis run no: {}".format(saRunIdx))
 
     modifyStartTime = datetime.datetime.now(timeZone)
@@ -203,7 +275,7 @@ for saRunIdx in range(len(parmSamples)):
 
     # After modifying, run the SWAT model
     if iRunSWAT:
-        runCode = runSWATModel(get_osplatform(), fdWorkingDir,
+        swatRunInfo = runSWATModel(get_osplatform(), fdWorkingDir,
                         fdMain, fdDMPOTpyFiles, fnSwatExe)
         runEndTime = datetime.datetime.now(timeZone)
         runTimeTotal = runEndTime - modifyEndTime
@@ -211,19 +283,51 @@ for saRunIdx in range(len(parmSamples)):
             runTimeTotal,
             runEndTime - startTime)) 
     else:
+        swatRunInfo = None
         runEndTime = datetime.datetime.now(timeZone)
         runTimeTotal = runEndTime - startTime
 
     # Extract average annual values for each outlet for evaluation
+    appendRunLog(fnSARunLog, saRunIdx, swatRunInfo)
+    if isRunFailed(swatRunInfo):
+        for outLetNo in ctrlSetting["outLetList"]:
+            outLetAvgAnnList[outLetNo][saRunIdx] = np.nan
+        saFailedRuns.append(saRunIdx)
+        print("Sensitivity analysis run no: {} failed, it is run again when the job is restarted".format(
+            saRunIdx))
+        continue
+
     outLetAvgAnnList = extractAvgAnnEachGroup( 
-            fdWorkingDir, 
-            iPrintForCio, 
-            ctrlSetting["outLetList"], 
-            ctrlSetting["outputVarList"],
-            outLetAvgAnnList,
-            rcvRchLst,
-            varIDObsHdrPair, 
-            saRunIdx)
+        fdWorkingDir, 
+        iPrintForCio, 
+        ctrlSetting["outLetList"], 
+        ctrlSetting["outputVarList"],
+        outLetAvgAnnList,
+        rcvRchLst,
+        varIDObsHdrPair, 
+        saRunIdx)
+    appendSARunOutput(fnSARunOutput, saRunIdx,
+            ctrlSetting["outLetList"], outLetAvgAnnList)
+    saDoneRuns.add(saRunIdx)
+
+
+# The analysis is only done when all samples are finished.
+if len(saFailedRuns) > 0:
+    print("Sensitivity analysis runs failed for samples: {}. See {}.".format(
+        sorted(saFailedRuns), fnSARunLog))
+if len(saDoneRuns) < len(parmSamples):
+    print("Only {} of {} samples are finished. Run the program again to finish the others.".format(
+        len(saDoneRuns), len(parmSamples)))
+    sys.exit(1)
+
+# Samples without values, e.g., from a results file written by an
+# older version, are not analyzed.
+saNanRuns = sorted(set([int(saRunIdx) for outLetNo in ctrlSetting["outLetList"]
+                for saRunIdx in np.flatnonzero(np.isnan(outLetAvgAnnList[outLetNo]))]))
+if len(saNanRuns) > 0:
+    print("The outlet values of samples {} are nan, the analysis is not done. Remove them from {} and run the program again.".format(
+        saNanRuns, fnSARunOutput))
+    sys.exit(1)
 
 # After the run, save the values into a file for later evaluation.
 for oltNoIdx in range(len(ctrlSetting["outLetList"])):
@@ -37,6 +37,9 @@ import pytz
 
 from pyscripts.globVars import *
 from pyscripts.DMPOTUtil import *
+from pyscripts.PARALLELUtil import *
+from pyscripts.TEMPLATEUtil import formatTemplateCacheStats
+from pyscripts.RCHUtil import formatRchReadStats
 
 nCalVal = "Calibration"
 ##########################################################################
@@ -76,7 +79,7 @@ if iFlagCopy:
 
 # After copying modify the file.cio to make sure the simulated output contains
 # interested outlet Variables.
-iPrintForCio = modFileCio(ctrlSetting, fdWorkingDir, rchVarLst)
+iPrintForCio = modFileCio(ctrlSetting, fdWorkingDir)
 
 ##########################################################################
 # Read Parameter and preprocessing #######################################
@@ -106,11 +109,47 @@ subParaFns, subObjFunFns, subParaSel01Fns = initOutFileParmObjSublvl(
     
 fnBsnPara, fnBsnParaSel = initOutFileParmObjBsnlvl(parmBsnLvl)
 
+initRunLog(fnRunLog)
+
 subObfBestDict, subObfTestDict, bsnObfBest = initOFValDict(parmObjFnKeys)
 
 subParGroups, swatSubFnGroups, swatHruFnGroups = initParmInFilenameSubLvl(
     subNoGroups, parmSubLvl, fdWorkingDir)
 
+##########################################################################
+# Prepare the worker directories when running in parallel ################
+# Each worker owns a copy of the working directory, so that several
+# parameter sets can be evaluated at the same time.
+workerPool = None
+pipelineDirs = None
+if nWorkers > 1:
+    evalContext = buildWorkerEvalContext(ctrlSetting,
+                    parmBsnLvlFExtLst,
+                    parmSubLvlFExtLst,
+                    swatSubFnGroups,
+                    swatHruFnGroups,
+                    iPrintForCio,
+                    rcvRchLst,
+                    obsDataLst,
+                    parmObjFnKeys,
+                    nCalVal)
+    if workerBackend == "ray":
+        # The ray actors prepare their own working directories
+        # on their nodes.
+        from pyscripts.RayActorUtil import RaySWATWorkerPool
+        workerPool = RaySWATWorkerPool(nWorkers, ctrlSetting, evalContext,
+                    parmSubLvl, parmBsnLvl)
+    elif ddsParallelMode == "pipeline":
+        # Two working directories are used alternately. The evaluation
+        # is done in this process while swat runs in the other directory.
+        pipelineDirs = initWorkerDirs(timeZone, startTime, 2,
+                    fdWorkingDir, fdWorkerDirs)
+        initWorkerEvalContext(evalContext)
+    else:
+        workerDirs = initWorkerDirs(timeZone, startTime, nWorkers,
+                    fdWorkingDir, fdWorkerDirs)
+        workerPool = initWorkerPool(workerDirs, evalContext, ddsParallelMode)
+
 ##########################################################################
 # Start optimization procedure for all runs ##############################
 ##########################################################################
@@ -128,8 +167,71 @@ totalRuns = ctrlSetting["totalModelRuns"] - initRunNo
 
 # Initial a counter to record the runs of random
 iCall = 0
+# Using Random parameter evaluated in the worker directories
+if (ctrlSetting["initParmIdx"] == 0) and (workerPool is not None):
+    # The random values do not depend on the results of earlier runs.
+    # All of them are generated first, in the same order as the serial
+    # runs, and then evaluated in the pool.
+    evalCandidates = []
+    for runIdx in range(initRunNo):
+        if len(parmSubLvl.index) > 0:
+            totalNoSelParSub = parmSubLvl.shape[0]
+            for subGPKey, subGPL in subParGroups.items():
+                ranNumSub = numpy.random.rand(1, totalNoSelParSub)
+                subGPL = generateRandomParVal(subGPL, ranNumSub)
+        if len(parmBsnLvl.index) > 0:
+            totalNoSelParBsn = parmBsnLvl.shape[0]
+            ranNumBsn = numpy.random.rand(1, totalNoSelParBsn)
+            parmBsnLvl = generateRandomParVal(parmBsnLvl, ranNumBsn)
+        evalCandidates.append((runIdx,
+                    copy.deepcopy(subParGroups),
+                    parmBsnLvl.copy()))
+    iCall = initRunNo
+
+    print(".....Evaluate {} random runs with {} workers.....".format(
+        initRunNo, nWorkers))
+    evalResults = runEvalsInPool(workerPool, evalCandidates)
+
+    # The best parameter sets are updated in the order of runs
+    # so that the output files are the same as the serial runs.
+    for runIdx, evalResult in enumerate(evalResults):
+        print(".....DMPOT simulation NO: {}.....".format(runIdx+1))
+        print(".....Time for modifying parameter values: {}; Time for running SWAT: {}.....". format(
+            evalResult["modifyTime"],
+            evalResult["runTime"]))
+        print(".....Time for each file type: {}.....".format(
+            formatFileTypeTimes(evalResult["fileTypeTimes"])))
+        subParGroups, parmBsnLvl = setCandidateTestVal(subParGroups,
+                    parmBsnLvl,
+                    evalCandidates[runIdx][1],
+                    evalCandidates[runIdx][2])
+        appendRunLog(fnRunLog, runIdx, evalResult["runInfo"])
+        subObfTestDict = evalResult["subObfTestDict"]
+        totalTimeThisrun = datetime.datetime.now(timeZone) - startTime
+        probVal = 1
+        subParGroups, subObfBestDict, bsnObfBest, parmBsnLvl = updateBestParm(
+                    ctrlSetting, 
+                    subParGroups, 
+                    subObfBestDict, 
+                    subObfTestDict,
+                    subParaFns,
+                    runIdx,
+                    evalResult["obfValNonOther"],
+                    parmObjFnKeys,
+                    evalResult["subAllStats"],
+                    subObjFunFns, 
+                    totalTimeThisrun,
+                    probVal,
+                    subParaSel01Fns,
+                    parmBsnLvl,
+                    bsnObfBest,
+                    fnBsnPara,
+                    fnBsnParaSel
+                    )
+        print("=================================================================")
+
 # Using Random parameter
-if (ctrlSetting["initParmIdx"] == 0):
+elif (ctrlSetting["initParmIdx"] == 0):
     for runIdx in range(initRunNo):
         print(".....DMPOT simulation NO: {}.....".format(runIdx+1))
         # Mainly update the testValue in parameterSelected
@@ -170,10 +272,12 @@ if (ctrlSetting["initParmIdx"] == 0):
         print(".....Time for modifying parameter values: {}; Total Time: {}.....". format(
             modifyTimeTotal,
             modifyEndTime - startTime))
+        print(".....Time for each file type: {}.....".format(
+                formatFileTypeTimes(popFileTypeTimes())))
     
         # After modifying, run the SWAT model
         if iRunSWAT:
-            runCode = runSWATModel(get_osplatform(), fdWorkingDir,
+            swatRunInfo = runSWATModel(get_osplatform(), fdWorkingDir,
                             fdMain, fdDMPOTpyFiles, fnSwatExe)
             runEndTime = datetime.datetime.now(timeZone)
             runTimeTotal = runEndTime - modifyEndTime
@@ -181,16 +285,22 @@ if (ctrlSetting["initParmIdx"] == 0):
                 runTimeTotal,
                 runEndTime - startTime)) 
         else:
+            swatRunInfo = None
             runEndTime = datetime.datetime.now(timeZone)
             runTimeTotal = runEndTime - startTime
 
-        # Calculate Statistics 
-        subObfTestDict, obfValNonOther, subAllStats = calObjFuncValues(iPrintForCio, 
-                    rcvRchLst, 
-                    obsDataLst, 
-                    parmObjFnKeys,
-                    subObfTestDict, 
-                    fdWorkingDir, False, nCalVal, ctrlSetting["groupSubareaIdx"])
+        # Calculate Statistics. A killed or failed run gets the
+        # penalty objective function values.
+        appendRunLog(fnRunLog, runIdx, swatRunInfo)
+        if isRunFailed(swatRunInfo):
+            subObfTestDict, obfValNonOther, subAllStats = calPenaltyObjFunc(parmObjFnKeys)
+        else:
+            subObfTestDict, obfValNonOther, subAllStats = calObjFuncValues(iPrintForCio, 
+                        rcvRchLst, 
+                        obsDataLst, 
+                        parmObjFnKeys,
+                        subObfTestDict, 
+                        fdWorkingDir, False, nCalVal, ctrlSetting["groupSubareaIdx"])
         
         totalTimeThisrun = runEndTime - startTime
         # Update the best parameter values and objective functions
@@ -254,25 +364,33 @@ elif (ctrlSetting["initParmIdx"] == 1):
     print(".....Time for modifying parameter values: {}; Total Time: {}.....". format(
             modifyTimeTotal,
             modifyEndTime - startTime))
+    print(".....Time for each file type: {}.....".format(
+            formatFileTypeTimes(popFileTypeTimes())))
 
     # After modifying, run the SWAT model
     if iRunSWAT:
-        runCode = runSWATModel(get_osplatform(), fdWorkingDir, fdMain, fdDMPOTpyFiles, fnSwatExe)
+        swatRunInfo = runSWATModel(get_osplatform(), fdWorkingDir, fdMain, fdDMPOTpyFiles, fnSwatExe)
         runEndTime = datetime.datetime.now(timeZone)
         runTimeTotal = runEndTime - modifyEndTime
         print(".....Time for running SWAT: {}; Total Time: {}.....". format(
                 runTimeTotal,
                 runEndTime - startTime))  
     else:
+        swatRunInfo = None
         runEndTime = datetime.datetime.now(timeZone)
 
-    # Calculate Statistics 
-    subObfTestDict, obfValNonOther, subAllStats = calObjFuncValues(iPrintForCio, 
-                rcvRchLst, 
-                obsDataLst, 
-                parmObjFnKeys,
-                subObfTestDict,
-                fdWorkingDir, False, nCalVal, ctrlSetting["groupSubareaIdx"])
+    # Calculate Statistics. A killed or failed run gets the
+    # penalty objective function values.
+    appendRunLog(fnRunLog, runIdx, swatRunInfo)
+    if isRunFailed(swatRunInfo):
+        subObfTestDict, obfValNonOther, subAllStats = calPenaltyObjFunc(parmObjFnKeys)
+    else:
+        subObfTestDict, obfValNonOther, subAllStats = calObjFuncValues(iPrintForCio, 
+                    rcvRchLst, 
+                    obsDataLst, 
+                    parmObjFnKeys,
+                    subObfTestDict,
+                    fdWorkingDir, False, nCalVal, ctrlSetting["groupSubareaIdx"])
 
     totalTimeThisrun = runEndTime - startTime
     # Update the best parameter values and objective functions
@@ -305,97 +423,323 @@ elif (ctrlSetting["initParmIdx"] == 1):
 
 
 # Start the main loop
-for runIdx in range(1, totalRuns+1):
-    print(".....DMPOT simulation NO: {}.....".format(runIdx + initRunNo))
-    # Update parameter using DDS
-    # Mainly update the testValue in parameterSelected
-    # If the user selected subarea parameters
-    modifyStartTime = datetime.datetime.now(timeZone)
+if pipelineDirs is not None:
+    # Pipelined DDS: while swat runs candidate i in one directory, the
+    # statistics of candidate i-1 are calculated and candidate i+1 is
+    # generated from the current best values and written into the
+    # other directory.
+    osplatform = get_osplatform()
+    pipeDirIdx = 0
+    nextCand = generateDDSCandidates(subParGroups,
+                parmBsnLvl,
+                [1],
+                totalRuns,
+                ctrlSetting["perturbFactor"])[0]
+    modifyParmSetInDir(pipelineDirs[pipeDirIdx], nextCand[1], nextCand[2])
+    runningCand = nextCand
+    swatRun = startSWATRunInDir(osplatform, pipelineDirs[pipeDirIdx], fnSwatExe)
+    doneCand = None
+    doneSWATRun = None
+
+    while (runningCand is not None) or (doneCand is not None):
+        workStartTime = datetime.datetime.now()
+
+        # Statistics and updating for the previous run
+        if doneCand is not None:
+            runIdx = doneCand[0]
+            print(".....DMPOT simulation NO: {}.....".format(runIdx + initRunNo))
+            probVal = calDDSProbVal(runIdx, totalRuns)
+            appendRunLog(fnRunLog, runIdx, doneSWATRun["runInfo"])
+            subObfTestDict, obfValNonOther, subAllStats = calObjFuncInDir(
+                        doneSWATRun["runningDir"],
+                        doneSWATRun["runInfo"])
+            subParGroups, parmBsnLvl = setCandidateTestVal(subParGroups,
+                        parmBsnLvl,
+                        doneCand[1],
+                        doneCand[2])
+            totalTimeThisrun = datetime.datetime.now(timeZone) - startTime
+            subParGroups, subObfBestDict, bsnObfBest, parmBsnLvl = updateBestParm(ctrlSetting, 
+                            subParGroups, 
+                            subObfBestDict, 
+                            subObfTestDict,
+                            subParaFns,
+                            runIdx,
+                            obfValNonOther,
+                            parmObjFnKeys,
+                            subAllStats,
+                            subObjFunFns, 
+                            totalTimeThisrun,
+                            probVal,
+                            subParaSel01Fns,
+                            parmBsnLvl,
+                            bsnObfBest,
+                            fnBsnPara,
+                            fnBsnParaSel
+                        )
+        statEndTime = datetime.datetime.now()
+
+        # Prepare the next run in the other directory
+        nextCand = None
+        if (runningCand is not None) and (runningCand[0] < totalRuns):
+            nextCand = generateDDSCandidates(subParGroups,
+                        parmBsnLvl,
+                        [runningCand[0] + 1],
+                        totalRuns,
+                        ctrlSetting["perturbFactor"])[0]
+            fileTypeTimes = modifyParmSetInDir(pipelineDirs[1 - pipeDirIdx],
+                        nextCand[1], nextCand[2])
+        workEndTime = datetime.datetime.now()
+
+        if runningCand is None:
+            print(".....Time for calculating statistics: {}.....".format(
+                statEndTime - workStartTime))
+            print("=================================================================")
+            break
+
+        waitSWATRunInDir(swatRun)
+        print(".....Time for calculating statistics: {}; Time for modifying parameter values: {}.....".format(
+            statEndTime - workStartTime,
+            workEndTime - statEndTime))
+        if nextCand is not None:
+            print(".....Time for each file type: {}.....".format(
+                formatFileTypeTimes(fileTypeTimes)))
+        print(".....Time for running SWAT: {}; Time overlapped with SWAT: {}; Total Time: {}.....". format(
+            swatRun["endTime"] - swatRun["startTime"],
+            calOverlapTime(workStartTime, workEndTime, swatRun),
+            datetime.datetime.now(timeZone) - startTime))
+        print("=================================================================")
 
-    # Calculate the probability value of each run over total runs
-    probVal = 1.0-(numpy.log(runIdx)/numpy.log(totalRuns))
-    if len(parmSubLvl.index) > 0:
-        print(".....Modifying subarea level parameter values with DDS.....")
-        for subGPKey, subGPL in subParGroups.items():
-            # Update parameter using DDS. 
-            subGPL = generateDDSParVal(subGPL, 
-                                        probVal, 
-                                        ctrlSetting["perturbFactor"])
-            # Update parameter values in file, run model, and calculate
-            # objective function
-            modifyParInFileSub(subGPL, 
-                            parmSubLvlFExtLst, 
-                            swatSubFnGroups, 
-                            subGPKey, 
-                            swatHruFnGroups,
-                            fdWorkingDir)
+        doneCand = runningCand
+        doneSWATRun = swatRun
+        runningCand = nextCand
+        if runningCand is not None:
+            pipeDirIdx = 1 - pipeDirIdx
+            swatRun = startSWATRunInDir(osplatform, pipelineDirs[pipeDirIdx], fnSwatExe)
+
+elif (workerPool is not None) and (ddsParallelMode == "async"):
+    # Asynchronous parallel DDS: each worker gets a new candidate
+    # perturbed from the current best values as soon as it finishes.
+    # The evaluations are recorded in the order they are finished, and
+    # the run numbers in the output files follow this order.
+    evalCandidates = {}
+    dispatchIdx = 1
+    doneIdx = 0
+    while (dispatchIdx <= totalRuns) or workerPool.hasPendingEval():
+        while workerPool.hasFreeWorker() and (dispatchIdx <= totalRuns):
+            evalCandidates[dispatchIdx] = generateDDSCandidates(subParGroups,
+                        parmBsnLvl,
+                        [dispatchIdx],
+                        totalRuns,
+                        ctrlSetting["perturbFactor"])[0]
+            workerPool.submitEval(dispatchIdx,
+                        evalCandidates[dispatchIdx][1],
+                        evalCandidates[dispatchIdx][2])
+            dispatchIdx = dispatchIdx + 1
+
+        for evalTag, evalResult in workerPool.waitAnyEval():
+            doneIdx = doneIdx + 1
+            runIdx = doneIdx
+            print(".....DMPOT simulation NO: {} (candidate {}).....".format(
+                runIdx + initRunNo, evalTag + initRunNo))
+            print(".....Time for modifying parameter values: {}; Time for running SWAT: {}.....". format(
+                evalResult["modifyTime"],
+                evalResult["runTime"]))
+            print(".....Time for each file type: {}.....".format(
+                formatFileTypeTimes(evalResult["fileTypeTimes"])))
+            probVal = calDDSProbVal(evalTag, totalRuns)
+            runIdxCand, candSubParGroups, candParmBsnLvl = evalCandidates.pop(evalTag)
+            subParGroups, parmBsnLvl = setCandidateTestVal(subParGroups,
+                        parmBsnLvl,
+                        candSubParGroups,
+                        candParmBsnLvl)
+            appendRunLog(fnRunLog, runIdx, evalResult["runInfo"])
+            subObfTestDict = evalResult["subObfTestDict"]
+            totalTimeThisrun = datetime.datetime.now(timeZone) - startTime
+            subParGroups, subObfBestDict, bsnObfBest, parmBsnLvl = updateBestParm(ctrlSetting, 
+                            subParGroups, 
+                            subObfBestDict, 
+                            subObfTestDict,
+                            subParaFns,
+                            runIdx,
+                            evalResult["obfValNonOther"],
+                            parmObjFnKeys,
+                            evalResult["subAllStats"],
+                            subObjFunFns, 
+                            totalTimeThisrun,
+                            probVal,
+                            subParaSel01Fns,
+                            parmBsnLvl,
+                            bsnObfBest,
+                            fnBsnPara,
+                            fnBsnParaSel
+                        )
+            print("=================================================================")
+
+elif workerPool is not None:
+    # Batch-synchronous parallel DDS: ddsBatchSize candidates are
+    # perturbed from the current best values and evaluated together.
+    # They are then passed to updateBestParm in the order of runs, so
+    # that each run keeps its own line in the output files and the best
+    # candidate of the batch is accepted.
+    batchStartIdx = 1
+    while batchStartIdx <= totalRuns:
+        batchRunIdxs = list(range(batchStartIdx,
+                    min(batchStartIdx + ddsBatchSize, totalRuns + 1)))
+        print(".....DMPOT simulation NO: {} to {}.....".format(
+            batchRunIdxs[0] + initRunNo, batchRunIdxs[-1] + initRunNo))
+        evalCandidates = generateDDSCandidates(subParGroups,
+                    parmBsnLvl,
+                    batchRunIdxs,
+                    totalRuns,
+                    ctrlSetting["perturbFactor"])
+        evalResults = runEvalsInPool(workerPool, evalCandidates)
+
+        for candIdx, evalResult in enumerate(evalResults):
+            runIdx = batchRunIdxs[candIdx]
+            print(".....DMPOT simulation NO: {}.....".format(runIdx + initRunNo))
+            print(".....Time for modifying parameter values: {}; Time for running SWAT: {}.....". format(
+                evalResult["modifyTime"],
+                evalResult["runTime"]))
+            print(".....Time for each file type: {}.....".format(
+                formatFileTypeTimes(evalResult["fileTypeTimes"])))
+            probVal = calDDSProbVal(runIdx, totalRuns)
+            subParGroups, parmBsnLvl = setCandidateTestVal(subParGroups,
+                        parmBsnLvl,
+                        evalCandidates[candIdx][1],
+                        evalCandidates[candIdx][2])
+            appendRunLog(fnRunLog, runIdx, evalResult["runInfo"])
+            subObfTestDict = evalResult["subObfTestDict"]
+            totalTimeThisrun = datetime.datetime.now(timeZone) - startTime
+            subParGroups, subObfBestDict, bsnObfBest, parmBsnLvl = updateBestParm(ctrlSetting, 
+                            subParGroups, 
+                            subObfBestDict, 
+                            subObfTestDict,
+                            subParaFns,
+                            runIdx,
+                            evalResult["obfValNonOther"],
+                            parmObjFnKeys,
+                            evalResult["subAllStats"],
+                            subObjFunFns, 
+                            totalTimeThisrun,
+                            probVal,
+                            subParaSel01Fns,
+                            parmBsnLvl,
+                            bsnObfBest,
+                            fnBsnPara,
+                            fnBsnParaSel
+                        )
+            print("=================================================================")
+
+        batchStartIdx = batchRunIdxs[-1] + 1
+
+else:
+    for runIdx in range(1, totalRuns+1):
+        print(".....DMPOT simulation NO: {}.....".format(runIdx + initRunNo))
+        # Update parameter using DDS
+        # Mainly update the testValue in parameterSelected
+        # If the user selected subarea parameters
+        modifyStartTime = datetime.datetime.now(timeZone)
 
-    if len(parmBsnLvl.index) > 0:
-        print(".....Modifying basin level parameter values with DDS.....")
-        parmBsnLvl = generateDDSParVal(parmBsnLvl, 
-                                        probVal, 
-                                        ctrlSetting["perturbFactor"])
-        # After modifying parameter values in file, 
-        modifyParInFileBsn(parmBsnLvl, 
-                        parmBsnLvlFExtLst,
-                        fdWorkingDir)
+        # Calculate the probability value of each run over total runs
+        probVal = 1.0-(numpy.log(runIdx)/numpy.log(totalRuns))
+        if len(parmSubLvl.index) > 0:
+            print(".....Modifying subarea level parameter values with DDS.....")
+            for subGPKey, subGPL in subParGroups.items():
+                # Update parameter using DDS. 
+                subGPL = generateDDSParVal(subGPL, 
+                                            probVal, 
+                                            ctrlSetting["perturbFactor"])
+                # Update parameter values in file, run model, and calculate
+                # objective function
+                modifyParInFileSub(subGPL, 
+                                parmSubLvlFExtLst, 
+                                swatSubFnGroups, 
+                                subGPKey, 
+                                swatHruFnGroups,
+                                fdWorkingDir)
+
+        if len(parmBsnLvl.index) > 0:
+            print(".....Modifying basin level parameter values with DDS.....")
+            parmBsnLvl = generateDDSParVal(parmBsnLvl, 
+                                            probVal, 
+                                            ctrlSetting["perturbFactor"])
+            # After modifying parameter values in file, 
+            modifyParInFileBsn(parmBsnLvl, 
+                            parmBsnLvlFExtLst,
+                            fdWorkingDir)
     
-    modifyEndTime = datetime.datetime.now(timeZone)
-    modifyTimeTotal = modifyEndTime - modifyStartTime
-    print(".....Time for modifying parameter values: {}; Total Time: {}.....". format(
-            modifyTimeTotal,
-            modifyEndTime - startTime))
+        modifyEndTime = datetime.datetime.now(timeZone)
+        modifyTimeTotal = modifyEndTime - modifyStartTime
+        print(".....Time for modifying parameter values: {}; Total Time: {}.....". format(
+                modifyTimeTotal,
+                modifyEndTime - startTime))
+        print(".....Time for each file type: {}.....".format(
+                formatFileTypeTimes(popFileTypeTimes())))
         
-    # After modifying, run the SWAT model
-    if iRunSWAT:
-        runStartTime = datetime.datetime.now(timeZone)
-        runCode = runSWATModel(get_osplatform(), fdWorkingDir, fdMain, fdDMPOTpyFiles, fnSwatExe)
-        runEndTime = datetime.datetime.now(timeZone)
-        runTimeTotal = runEndTime - modifyEndTime
-        print(".....Time for running SWAT: {}; Total Time: {}.....". format(
-                runTimeTotal,
-                runEndTime - startTime))  
-    else:
-        runEndTime = datetime.datetime.now(timeZone)
+        # After modifying, run the SWAT model
+        if iRunSWAT:
+            runStartTime = datetime.datetime.now(timeZone)
+            swatRunInfo = runSWATModel(get_osplatform(), fdWorkingDir, fdMain, fdDMPOTpyFiles, fnSwatExe)
+            runEndTime = datetime.datetime.now(timeZone)
+            runTimeTotal = runEndTime - modifyEndTime
+            print(".....Time for running SWAT: {}; Total Time: {}.....". format(
+                    runTimeTotal,
+                    runEndTime - startTime))  
+        else:
+            swatRunInfo = None
+            runEndTime = datetime.datetime.now(timeZone)
 
-    # Calculate Statistics 
-    subObfTestDict, obfValNonOther, subAllStats = calObjFuncValues(iPrintForCio, 
-                rcvRchLst, 
-                obsDataLst, 
-                parmObjFnKeys,
-                subObfTestDict,
-                fdWorkingDir, False, nCalVal, ctrlSetting["groupSubareaIdx"])
+        # Calculate Statistics. A killed or failed run gets the
+        # penalty objective function values.
+        appendRunLog(fnRunLog, runIdx, swatRunInfo)
+        if isRunFailed(swatRunInfo):
+            subObfTestDict, obfValNonOther, subAllStats = calPenaltyObjFunc(parmObjFnKeys)
+        else:
+            subObfTestDict, obfValNonOther, subAllStats = calObjFuncValues(iPrintForCio, 
+                        rcvRchLst, 
+                        obsDataLst, 
+                        parmObjFnKeys,
+                        subObfTestDict,
+                        fdWorkingDir, False, nCalVal, ctrlSetting["groupSubareaIdx"])
 
-    totalTimeThisrun = runEndTime - startTime
-    # Update the best parameter values and objective functions
-    # based on the objective Functions
-    subParGroups, subObfBestDict, bsnObfBest, parmBsnLvl = updateBestParm(ctrlSetting, 
-                    subParGroups, 
-                    subObfBestDict, 
-                    subObfTestDict,
-                    subParaFns,
-                    runIdx,
-                    obfValNonOther,
-                    parmObjFnKeys,
-                    subAllStats,
-                    subObjFunFns, 
-                    totalTimeThisrun,
-                    probVal,
-                    subParaSel01Fns,
-                    parmBsnLvl,
-                    bsnObfBest,
-                    fnBsnPara,
-                    fnBsnParaSel
-                )
+        totalTimeThisrun = runEndTime - startTime
+        # Update the best parameter values and objective functions
+        # based on the objective Functions
+        subParGroups, subObfBestDict, bsnObfBest, parmBsnLvl = updateBestParm(ctrlSetting, 
+                        subParGroups, 
+                        subObfBestDict, 
+                        subObfTestDict,
+                        subParaFns,
+                        runIdx,
+                        obfValNonOther,
+                        parmObjFnKeys,
+                        subAllStats,
+                        subObjFunFns, 
+                        totalTimeThisrun,
+                        probVal,
+                        subParaSel01Fns,
+                        parmBsnLvl,
+                        bsnObfBest,
+                        fnBsnPara,
+                        fnBsnParaSel
+                    )
         
-    calStatTime = datetime.datetime.now(timeZone)
-    print("Time for calculating statistics: {}; Total Time: {}". format(
-            calStatTime - runEndTime,
-            calStatTime - startTime)) 
-    print("=================================================================")
+        calStatTime = datetime.datetime.now(timeZone)
+        print("Time for calculating statistics: {}; Total Time: {}". format(
+                calStatTime - runEndTime,
+                calStatTime - startTime)) 
+        print("=================================================================")
 
 
 # End of for loop for total runs
+if workerPool is not None:
+    workerPool.shutdown()
+else:
+    print(".....Original files kept in memory: {}.....".format(
+        formatTemplateCacheStats()))
+    print(".....Reach output of the outlets read: {}.....".format(
+        formatRchReadStats()))
+
 print(datetime.datetime.now(timeZone))
 print("--------------------------------------")
 print("Congratulations!!! It's done nicely~~~")
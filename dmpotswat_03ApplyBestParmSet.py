@@ -55,11 +55,13 @@ obsDataLst = readOBSSet(ctrlSetting, fdObs, varIDObsHdrPair)
 ##########################################################################
 # Copy TxtInOut contents to working Dir ##################################
 if iFlagCopy:
-    copySWATTxtIO(timeZone, startTime, fdmodelTxtInOut, fdCalibrated)
+    # The calibrated folder is given to users, all files are copied
+    # so that editing it does not change the TxtInOut folder.
+    copySWATTxtIO(timeZone, startTime, fdmodelTxtInOut, fdCalibrated, False)
 
 # After copying modify the file.cio to make sure the simulated output contains
 # interested outlet Variables.
-iPrintForCio = modFileCio(ctrlSetting, fdCalibrated, rchVarLst)
+iPrintForCio = modFileCio(ctrlSetting, fdCalibrated)
 
 ##########################################################################
 # Read Parameter and preprocessing #######################################
@@ -144,8 +146,12 @@ print(".....Time for modifying parameter values: {}; Total Time: {}.....". forma
     modifyEndTime - startTime))
     
 # After modifying, run the SWAT model
+# The run is recorded in its own run log, so that the log of the
+# calibration is kept.
+fnRunLogApply = os.path.join(fdOutputs, "DMPOTRunLog{}.csv".format(nCalVal))
+initRunLog(fnRunLogApply)
 if iRunSWAT:
-    runCode = runSWATModel(get_osplatform(), fdCalibrated,
+    swatRunInfo = runSWATModel(get_osplatform(), fdCalibrated,
                     fdMain, fdDMPOTpyFiles, fnSwatExe)
     runEndTime = datetime.datetime.now(timeZone)
     runTimeTotal = runEndTime - modifyEndTime
@@ -153,9 +159,18 @@ if iRunSWAT:
         runTimeTotal,
         runEndTime - startTime)) 
 else:
+    swatRunInfo = None
     runEndTime = datetime.datetime.now(timeZone)
     runTimeTotal = runEndTime - startTime
 
+# The output of a killed or failed run is not complete, so no
+# statistics are calculated from it.
+appendRunLog(fnRunLogApply, runIdx, swatRunInfo)
+if isRunFailed(swatRunInfo):
+    print("SWAT run in {} was killed or failed, see {}. Please check the model and run the program again.".format(
+        fdCalibrated, fnRunLogApply))
+    sys.exit(1)
+
 # Calculate Statistics 
 subObfTestDict, obfValNonOther, subAllStats = calObjFuncValues(iPrintForCio, 
             rcvRchLst, 
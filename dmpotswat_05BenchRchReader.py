@@ -0,0 +1,168 @@
+#!/usr/bin/python3
+
+"""
+This program was developed to compare the time used to read the
+output.rch of a run by pandas.read_fwf, as getRch2DF did before, and
+by the readers in RCHUtil, and to check that they get the same values
+for the outlets.
+Usage:
+python dmpotswat_05BenchRchReader.py [folder with output.rch] [repeats]
+"""
+
+##########################################################################
+# Import modules #########################################################
+##########################################################################
+
+import sys, os
+import time
+
+import numpy
+import pandas
+
+from pyscripts.globVars import *
+from pyscripts.DMPOTUtil import *
+from pyscripts.RCHUtil import readRchText, readRchTextFast, readRchBinary, \
+    readCioRchVars, getRchVarHdrs, rchIdHdrs
+
+
+# Initial settings of the benchmark
+fdRchSrc = fdCalibrated + "Calibration"
+if len(sys.argv) > 1:
+    fdRchSrc = sys.argv[1]
+benchRepeats = 3
+if len(sys.argv) > 2:
+    benchRepeats = int(sys.argv[2])
+
+##########################################################################
+# Program start  #########################################################
+##########################################################################
+
+print("=================================================================")
+print("          Distributed Model Parameter Optimization Tool          ")
+print("                   Developed by Qingyu Feng                      ")
+print("          Research Center for Eco-Enviormental Sciences          ")
+print("                  Chinese Academy of Science                     ")
+print("=================================================================")
+
+##########################################################################
+# Read Settings ##########################################################
+print(".....Read in DMPOT setting from the control file.....")
+ctrlSetting = ctrlSetToJSON(fnCtrlSetUsr, fnCtrlJsonUsr)
+
+if (ctrlSetting == "Error"):
+    print("Your control Setting was not corrected prepared. Please double check!")
+    sys.exit(1)
+
+iPrintForCio = determineIprintVal(ctrlSetting["iPrint"])
+subNoGroups, parmObjFnKeys, rcvRchLst = getSubGroupsRchList(ctrlSetting)
+
+outLetLst = sorted(set(ctrlSetting["outLetList"]))
+varHdrLst = []
+for outletVarID in ctrlSetting["outputVarList"]:
+    if varIDObsHdrPair[outletVarID] not in varHdrLst:
+        varHdrLst.append(varIDObsHdrPair[outletVarID])
+
+fnRch = os.path.join(fdRchSrc, "output.rch")
+if not os.path.isfile(fnRch):
+    print("File {} does not exist. Please copy the output.rch of a run into {}".format(
+        fnRch, fdRchSrc))
+    sys.exit(1)
+fnRchBin = os.path.join(fdRchSrc, fnRchBinary)
+
+# The reach variables printed by swat are read from file.cio of the run
+rchVarLstOut = readCioRchVars(fdRchSrc)
+if rchVarLstOut is None:
+    rchVarLstOut = rchVarLst
+
+print(".....Reading {} ({:.1f} MB) for outlets {}, {} times.....".format(
+    fnRch, os.path.getsize(fnRch) / 1048576.0, outLetLst, benchRepeats))
+
+##########################################################################
+# Define the readers #####################################################
+##########################################################################
+def readByReadFwf():
+    """
+    This function reads the whole file with read_fwf and skipfooter,
+    as getRch2DF did before, and then gets each outlet from the
+    dataframe. The first column, "REACH", is the index.
+    """
+    rchVarHdrs = getRchVarHdrs(rchVarLstOut)
+    colWidth = [5, 6, 9, 6] + [12] * (len(rchVarHdrs) + 1)
+    hedr = ["REACH"] + rchIdHdrs + rchVarHdrs
+    if (iPrintForCio == 0) or (iPrintForCio == 2):
+        rchDFWhole = pandas.read_fwf(fnRch, widths=colWidth, skiprows=9, names=hedr,
+                        index_col=0, skipfooter=len(rcvRchLst))
+        rchDFWhole = rchDFWhole.loc[rchDFWhole["MON"] < 13]
+    else:
+        rchDFWhole = pandas.read_fwf(fnRch, widths=colWidth, skiprows=9, names=hedr,
+                        index_col=0)
+    return getOutletArrays(rchDFWhole)
+
+
+def readByReadFwfChunks():
+    """
+    This function reads the file with readRchText, which uses read_fwf
+    in chunks of rchReadBudgetMB.
+    """
+    return getOutletArrays(readRchText(fnRch, iPrintForCio, len(rcvRchLst),
+                        rchVarLstOut))
+
+
+def getOutletArrays(rchDFWhole):
+    rchOutlets = {}
+    for outLetNo in outLetLst:
+        rchDFOutlet = rchDFWhole.loc[rchDFWhole["RCH"] == outLetNo]
+        rchOutlets[outLetNo] = dict([(varHdr, rchDFOutlet[varHdr].to_numpy(dtype=float))
+                                for varHdr in varHdrLst])
+    return rchOutlets
+
+
+def readByTextFast():
+    return readRchTextFast(fnRch, iPrintForCio, len(rcvRchLst), rchVarLstOut,
+                        outLetLst, varHdrLst)
+
+
+def readByBinary():
+    return readRchBinary(fnRchBin, iPrintForCio, len(rcvRchLst), rchVarLstOut,
+                        outLetLst, varHdrLst)
+
+
+# (name, reader, relative tolerance compared with read_fwf)
+# The text output has 4 decimals in the E12.4 format, i.e., a relative
+# error of about 5e-5 compared with the binary output.
+rchReaders = [("read_fwf", readByReadFwf, 1e-6),
+            ("read_fwf in chunks", readByReadFwfChunks, 1e-6),
+            ("text by position", readByTextFast, 1e-6)]
+if os.path.isfile(fnRchBin):
+    rchReaders.append(("binary {}".format(fnRchBinary), readByBinary, 1e-4))
+
+##########################################################################
+# Run the readers ########################################################
+##########################################################################
+rchOutletsRef = None
+for readerName, readerFunc, readerRtol in rchReaders:
+    readTimes = []
+    for benchIdx in range(benchRepeats):
+        readStartTime = time.perf_counter()
+        rchOutlets = readerFunc()
+        readTimes.append(time.perf_counter() - readStartTime)
+
+    if rchOutlets is None:
+        print("{:>20s}: the file does not match the reach variables".format(readerName))
+        continue
+
+    if rchOutletsRef is None:
+        rchOutletsRef = rchOutlets
+        iSameValues = True
+    else:
+        iSameValues = all([numpy.allclose(rchOutletsRef[outLetNo][varHdr],
+                                rchOutlets[outLetNo][varHdr], rtol=readerRtol)
+                            for outLetNo in outLetLst
+                            for varHdr in varHdrLst])
+
+    print("{:>20s}: best {:.3f} s, mean {:.3f} s, same values as read_fwf: {}".format(
+        readerName, min(readTimes), sum(readTimes) / len(readTimes), iSameValues))
+
+print("--------------------------------------")
+print("Congratulations!!! It's done nicely~~~")
+print("--------------------------------------")
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+This class is designed to be a collection of functions dealing with
+the crop database, which is named plant.dat or crop.dat. The original
+database is read once into numpy arrays with one row for each crop,
+keyed by the crop name. The crop parameters, e.g., USLE_C, BIO_E,
+HVSTI and BLAI, are changed by fraction for the crops of the land use
+categories in cropCategories, and only the changed fields of the
+lines are formatted, with the precision of the original fields.
+
+@author: Qingyu.Feng
+"""
+
+##########################################################################
+# Import modules #########################################################
+##########################################################################
+import re
+import threading
+
+import numpy as np
+
+from .globVars import cropCategories, cropCategoriesDefault
+
+##########################################################################
+# Define functions #######################################################
+##########################################################################
+# Each crop has 5 lines in the database. The first line has the crop
+# number, name and land cover class, e.g., "   1 AGRL    4".
+# {Symbol: (line of the crop, index of the value in the line)}
+# The 5th line is not changed since MAT_YRS is an integer.
+cropParmCols = {
+    "BIO_E": (1, 0), "HVSTI": (1, 1), "BLAI": (1, 2), "FRGRW1": (1, 3),
+    "LAIMX1": (1, 4), "FRGRW2": (1, 5), "LAIMX2": (1, 6), "DLAI": (1, 7),
+    "CHTMX": (1, 8), "RDMX": (1, 9),
+    "T_OPT": (2, 0), "T_BASE": (2, 1), "CNYLD": (2, 2), "CPYLD": (2, 3),
+    "BN1": (2, 4), "BN2": (2, 5), "BN3": (2, 6),
+    "BP1": (2, 7), "BP2": (2, 8), "BP3": (2, 9),
+    "WSYF": (3, 0), "USLE_C": (3, 1), "GSI": (3, 2), "VPDFR": (3, 3),
+    "FRGMAX": (3, 4), "WAVP": (3, 5), "CO2HI": (3, 6), "BIOEHI": (3, 7),
+    "RSDCO_PL": (3, 8), "ALAI_MIN": (3, 9)
+}
+cropParmLines = sorted(set([parmCol[0] for parmCol in cropParmCols.values()]))
+
+# {fnpOrig: database} read in this process, the database is:
+# {"names": crop names (nCrops),
+#  "lineIdx": {line of the crop: index of the line in the file (nCrops)},
+#  "values": {line of the crop: values (nCrops, max number of values)},
+#  "counts": {line of the crop: number of values (nCrops)}}
+# A line not found for a crop has the index -1 and no values.
+cropDBLoaded = {}
+cropDBLock = threading.Lock()
+
+
+##########################################################################
+def isCropHeadLine(cropLine):
+    """
+    This function tells whether a line is the first line of a crop,
+    which starts with the crop number and name.
+    """
+    cropVals = cropLine.split()
+
+    return ((len(cropVals) >= 2) and cropVals[0].isdigit()
+            and cropVals[1][:1].isalpha())
+
+
+##########################################################################
+def readCropDB(lifCrop):
+    """
+    This function reads the lines of the crop database into arrays.
+    The lines of a crop are the lines after its first line and
+    before the first line of the next crop.
+    """
+    headIdxLst = [lidx for lidx in range(len(lifCrop))
+                        if isCropHeadLine(lifCrop[lidx])]
+    nCrops = len(headIdxLst)
+
+    lineIdx = {}
+    valLsts = {}
+    for cropLine in cropParmLines:
+        lineIdx[cropLine] = np.full(nCrops, -1, dtype=np.int64)
+        valLsts[cropLine] = []
+
+    for cropRow in range(nCrops):
+        if cropRow + 1 < nCrops:
+            nextHeadIdx = headIdxLst[cropRow + 1]
+        else:
+            nextHeadIdx = len(lifCrop)
+        for cropLine in cropParmLines:
+            lidx = headIdxLst[cropRow] + cropLine
+            cropVals = []
+            if lidx < nextHeadIdx:
+                try:
+                    cropVals = list(map(float, lifCrop[lidx].split()))
+                    lineIdx[cropLine][cropRow] = lidx
+                except ValueError:
+                    cropVals = []
+            valLsts[cropLine].append(cropVals)
+
+    cropValues = {}
+    cropCounts = {}
+    for cropLine in cropParmLines:
+        cropCounts[cropLine] = np.array([len(cropVals)
+                        for cropVals in valLsts[cropLine]], dtype=np.int32)
+        cropValues[cropLine] = np.full((nCrops, max([1] + cropCounts[cropLine].tolist())),
+                        np.nan)
+        for cropRow in range(nCrops):
+            cropValues[cropLine][cropRow, :cropCounts[cropLine][cropRow]] = valLsts[cropLine][cropRow]
+
+    cropDB = {
+        "names": np.array([lifCrop[headIdx].split()[1] for headIdx in headIdxLst],
+                        dtype=str),
+        "lineIdx": lineIdx,
+        "values": cropValues,
+        "counts": cropCounts
+    }
+
+    return cropDB
+
+
+##########################################################################
+def getCropDB(fnpOrig, lifOrig):
+    """
+    This function returns the database of the original crop file.
+    It is read once in each process from lifOrig, the lines of fnpOrig.
+    """
+    with cropDBLock:
+        if fnpOrig not in cropDBLoaded:
+            cropDBLoaded[fnpOrig] = readCropDB(lifOrig)
+
+        return cropDBLoaded[fnpOrig]
+
+
+##########################################################################
+def getCropParmCrops(parmSymbol):
+    """
+    This function splits a Symbol into the crop parameter and the
+    crops it changes. A Symbol ending with a category, e.g., BIO_E_FRST,
+    changes the crops of that category. Otherwise the crops of the
+    categories in cropCategoriesDefault are changed.
+    Output:
+    parameter, crop names, whether the category was given
+    """
+    for catKey in cropCategories.keys():
+        catSuffix = "_{}".format(catKey)
+        if parmSymbol.endswith(catSuffix) and (parmSymbol[:-len(catSuffix)] in cropParmCols):
+            return parmSymbol[:-len(catSuffix)], cropCategories[catKey], True
+
+    cropNameLst = [cropName for catKey in cropCategoriesDefault
+                        for cropName in cropCategories[catKey]]
+
+    return parmSymbol, cropNameLst, False
+
+
+##########################################################################
+def formatCropField(cropField, cropVal):
+    """
+    This function formats a new value in place of a field of the
+    original line, e.g., "  0.0663", with the same number of decimals
+    and width. At least one space is kept before the value.
+    """
+    fieldVal = cropField.strip()
+    valDecimals = 0
+    if "." in fieldVal:
+        valDecimals = len(fieldVal.split(".")[1])
+
+    newField = "{:.{}f}".format(cropVal, valDecimals)
+
+    return newField.rjust(max(len(cropField), len(newField) + 1))
+
+
+##########################################################################
+def patchCropLine(cropLineOrig, cropVals, changedCols):
+    """
+    This function replaces the changed columns of an original crop line
+    by the new values. The other fields are kept as they are.
+    """
+    cropFields = re.findall(r"\s*\S+", cropLineOrig.rstrip("\r\n"))
+    for colIdx in np.flatnonzero(changedCols):
+        cropFields[colIdx] = formatCropField(cropFields[colIdx], cropVals[colIdx])
+
+    return "".join(cropFields) + cropLineOrig[len(cropLineOrig.rstrip("\r\n")):]
+
+
+##########################################################################
+def calCropLines(cropDB, lifOrig, parmValues):
+    """
+    This function calculates the new values of the crop parameters and
+    patches the changed lines of lifOrig: [(line index, new line)]
+    The values are the original values multiplied by (1 + parameter
+    value), one multiplication for the crops of each parameter. The
+    parameters of a category are applied after the ones without it,
+    so they are used for the crops of that category.
+    """
+    parmCropLst = [getCropParmCrops(parmSymbol) + (parmValues[parmSymbol],)
+                        for parmSymbol in parmValues.keys()]
+    parmCropLst.sort(key=lambda parmCrop: parmCrop[2])
+
+    newValues = {}
+    changedCols = {}
+    for parmName, cropNameLst, iCategory, parmVal in parmCropLst:
+        if parmName not in cropParmCols:
+            continue
+        cropLine, colIdx = cropParmCols[parmName]
+        cropRows = (np.isin(cropDB["names"], cropNameLst)
+                    & (cropDB["counts"][cropLine] > colIdx))
+        if cropLine not in newValues:
+            newValues[cropLine] = cropDB["values"][cropLine].copy()
+            changedCols[cropLine] = np.zeros(newValues[cropLine].shape, dtype=bool)
+        newValues[cropLine][cropRows, colIdx] = cropDB["values"][cropLine][cropRows, colIdx] * (1.0 + parmVal)
+        changedCols[cropLine][cropRows, colIdx] = True
+
+    cropLines = []
+    for cropLine in sorted(newValues.keys()):
+        for cropRow in np.flatnonzero(changedCols[cropLine].any(axis=1)):
+            lidx = int(cropDB["lineIdx"][cropLine][cropRow])
+            cropLines.append((lidx, patchCropLine(lifOrig[lidx],
+                    newValues[cropLine][cropRow], changedCols[cropLine][cropRow])))
+
+    return cropLines
@@ -14,8 +14,7 @@ DDS procedure.
 import json
 import os, sys
 import math
-import numpy, glob
-import subprocess
+import numpy
 import pandas
 import datetime
 import fortranformat as ff
@@ -25,10 +24,14 @@ from .globVars import *
 from pyscripts.GRAPHUtil import *
 from pyscripts.PLOTUtil import *
 
-if useRay: 
-    from .RaySWATUtil import *
-else:
-    from .SWATUtil import *
+from .SWATUtil import *
+from .EXECUtil import runFileTasks, recordFileTypeTime
+from .PROVISIONUtil import resetSWATDir
+from .PATCHUtil import compilePatchPlan, getParmValues
+from .FRACBASEUtil import addFracValues, fracBaseFlExtLst
+from .PROJINDEXUtil import getProjIndex, getHruConditions, getResFnGroups
+from .SUPERVISORUtil import *
+from .RCHUtil import getRchOutput, getRchOutlets, getObsOutletVars, getRchVarLstOut
 
 # Set up the random seed
 numpy.random.seed(1)
@@ -337,6 +340,12 @@ def initOutFileParmObjBsnlvlCal(parmBsnLvl, nCalVal):
 ##########################################################################
 def initParmInFilenameSubLvl(subNoGroups, parmSubLvl, runningDir):
 
+    # The hru files of each subbasin are taken from the project index,
+    # and only read from the .sub file when it is not in the index.
+    projIndex = getProjIndex(fdmodelTxtInOut)
+    if projIndex is None:
+        projIndex = {"subs": {}}
+
     # Initialize the parameter set and values of obj func for each subarea group
     subParGroups = {}
     # Create the subarea and hru file names
@@ -355,7 +364,10 @@ def initParmInFilenameSubLvl(subNoGroups, parmSubLvl, runningDir):
         # Generate hru level file name list for modifying
         fnSWATHruFlLst = []
         for subidx in fnSWATSubFlLst:
-            fnSWATHruFlLst = fnSWATHruFlLst + buildSWATHruFn(subidx, runningDir)
+            if subidx in projIndex["subs"]:
+                fnSWATHruFlLst = fnSWATHruFlLst + projIndex["subs"][subidx]["hrus"]
+            else:
+                fnSWATHruFlLst = fnSWATHruFlLst + buildSWATHruFn(subidx, runningDir)
         swatHruFnGroups[subGI] = fnSWATHruFlLst
 
     return subParGroups, swatSubFnGroups, swatHruFnGroups
@@ -363,20 +375,12 @@ def initParmInFilenameSubLvl(subNoGroups, parmSubLvl, runningDir):
 
 
 ##########################################################################
-def copySWATTxtIO(timeZone, startTime, srcDr, DestDr):
+def copySWATTxtIO(timeZone, startTime, srcDr, DestDr, iLinkFiles=iLinkReadOnlyFiles):
     print(".....Copy TxtInOut contents to working directory.....")
 
     copyTioStartTime = datetime.datetime.now(timeZone)
     
-    flTioSource = glob.glob("{}/*".format(srcDr))
-    if useRay:
-        copyStatus = []
-        copyStatus = [copySWATFileToWDRay.remote(fnSWAT, DestDr)
-                            for fnSWAT in flTioSource]
-        ray.get(copyStatus)
-    else:
-        for fnSWAT in flTioSource:
-            copySWATFileToWD(fnSWAT, DestDr)
+    resetSWATDir(srcDr, DestDr, iLinkFiles)
 
     copyTioEndTime = datetime.datetime.now(timeZone)
     print(".....Time for copy: {}; Total Time: {}.....". format(
@@ -761,9 +765,12 @@ def calObjFuncValues(iPrintForCio,
                     obsDataLst, 
                     parmObjFnKeys,
                     subObfTestDict, 
-                    runningDir, iGenLineChart, nCalVal, groupSubareaIdx):
+                    runningDir, iGenLineChart, nCalVal, groupSubareaIdx,
+                    iReturnObsSimPair=False):
     """
     This function modify parameter values in files at the basin level.
+    The observed and simulated series are also returned when
+    iReturnObsSimPair is True.
     """
     
     # There are still some preparation to be done
@@ -774,7 +781,9 @@ def calObjFuncValues(iPrintForCio,
 
     fnRch = os.path.join(runningDir, "output.rch")
     try:
-        rchDFWhole = getRch2DF(fnRch, iPrintForCio, len(rcvRchLst))
+        obsOutLetLst, obsVarHdrLst = getObsOutletVars(obsDataLst)
+        rchOutlets = getRchOutlets(fnRch, iPrintForCio, len(rcvRchLst),
+                            obsOutLetLst, obsVarHdrLst)
     except IOError as e:
         print("File {} does not exist: {}. Please double check your TxtInOut \
             folder and make sure you have a complete set".format(fnRch, e))
@@ -783,7 +792,7 @@ def calObjFuncValues(iPrintForCio,
     # Then construct series of observed and simulated pairs
     # for stat calculation
     obsSimPair = buildObsSimPair(obsDataLst,
-                                rchDFWhole,
+                                rchOutlets,
                                 varIDObsHdrPair)
     
     obsSimPairKeys = list(obsSimPair.keys())
@@ -878,39 +887,104 @@ def calObjFuncValues(iPrintForCio,
         #         obsSimThisKey = obsSimPairKeysSplit[subGPKey]
         #         genFigSingleOlt(fnpPlotPng, obsSimThisKey, obsSimPair)
 
+    if iReturnObsSimPair:
+        return subObfTestDict, obfValNonOther, subAllStats, obsSimPair
+
     return subObfTestDict, obfValNonOther, subAllStats
 
 
 
+##########################################################################
+def readAppliedParm(runningDir):
+    """
+    This function reads the record of the parameter values already
+    written in the files of runningDir:
+    {"group|file type": {Symbol: TestVal}}
+    The record is empty when the folder was just prepared.
+    """
+    fnpApplied = os.path.join(runningDir, fnAppliedParm)
+    if (not iSkipUnchangedFiles) or (not os.path.isfile(fnpApplied)):
+        return {}
+
+    try:
+        with open(fnpApplied, 'r') as appliedFile:
+            appliedParm = json.load(appliedFile)
+    except (IOError, ValueError):
+        # Not completely written, all files will be written again.
+        appliedParm = {}
+
+    return appliedParm
+
+
+##########################################################################
+def clearAppliedParm(runningDir):
+    """
+    This function removes the record before the files are changed.
+    If the program stops while writing the files, the record is not
+    there and all files are written in the next run.
+    """
+    fnpApplied = os.path.join(runningDir, fnAppliedParm)
+    if os.path.isfile(fnpApplied):
+        os.remove(fnpApplied)
+
+
+##########################################################################
+def writeAppliedParm(runningDir, appliedParm):
+    """
+    This function writes the record after all files were changed.
+    """
+    if not iSkipUnchangedFiles:
+        return
+
+    fnpApplied = os.path.join(runningDir, fnAppliedParm)
+    with open(fnpApplied, 'w') as appliedFile:
+        json.dump(appliedParm, appliedFile)
+
+
 ##########################################################################
 def modifyParInFileBsn(parmBsnLvl, 
                     parmBsnLvlFExtLst,
                     runningDir):
     """
     This function modify parameter values in files at the basin level.
+    A file is skipped when its values are the same as the last run
+    in this folder.
     """
+    appliedParm = readAppliedParm(runningDir)
+    iRecordCleared = False
     # They use different file names.
     for flExtBLvl in parmBsnLvlFExtLst:
         # Get the list of parameters in a certain file
         selParInFile = parmBsnLvl.loc[parmBsnLvl["File"] == flExtBLvl]
-        
+        flExtStartTime = datetime.datetime.now()
+        patchPlan = compilePatchPlan(selParInFile, flExtBLvl)
+
+        appliedKey = "Bsn|{}".format(flExtBLvl)
+        if appliedParm.get(appliedKey) == patchPlan["values"]:
+            recordFileTypeTime(flExtBLvl, 1,
+                    datetime.datetime.now() - flExtStartTime, 1)
+            continue
+        if not iRecordCleared:
+            clearAppliedParm(runningDir)
+            iRecordCleared = True
+
+        iWritten = True
         if flExtBLvl == ".bsn":
-            if useRay:
-                updateParInBsnRay(selParInFile, runningDir)
-            else:
-                updateParInBsn(selParInFile, runningDir)
+            iWritten = updateParInBsn(patchPlan, runningDir)
 
         if flExtBLvl == "crop.dat":
-            if useRay:
-                updateParInCropRay(selParInFile, runningDir, fdmodelTxtInOut)
-            else:
-                updateParInCrop(selParInFile, runningDir, fdmodelTxtInOut)
+            iWritten = updateParInCrop(patchPlan, runningDir, fdmodelTxtInOut)
 
         if flExtBLvl == ".wwq":
-            if useRay:
-                updateParInWwqRay(selParInFile, runningDir)
-            else:
-                updateParInWwq(selParInFile, runningDir)
+            iWritten = updateParInWwq(patchPlan, runningDir)
+
+        appliedParm[appliedKey] = patchPlan["values"]
+        recordFileTypeTime(flExtBLvl, 1,
+                datetime.datetime.now() - flExtStartTime,
+                int(iWritten is False))
+
+    if iRecordCleared:
+        writeAppliedParm(runningDir, appliedParm)
 
 
 ##########################################################################
@@ -923,122 +997,153 @@ def modifyParInFileSub(subGPL,
                     ):
     """
     This function modify parameter values in files.
+    The files are updated by the executor selected in globVars
+    (serial, thread, process or ray).
+    DDS often changes only a few parameters in one run. A file type of
+    the group is skipped when its values are the same as the last run
+    in this folder, and a file is not written when its new content is
+    the same.
+    The hru level files are updated together for each hru after the
+    subarea level files when iHruBundle is True.
+    The values changed by fraction are calculated for the whole group
+    from the stored original values when iFracBaseStore is True, and
+    the land use and soil group used by the mgt file are taken from
+    the project index.
     """
+    appliedParm = readAppliedParm(runningDir)
+    iRecordCleared = False
+    bundlePlans = {}
     # They use different file names.
     for flExtSLvl in parmSubLvlFExtLst:
         # Get the list of parameters in a certain file
         selParInFile = subGPL.loc[subGPL["File"] == flExtSLvl]
-                
+        flExtStartTime = datetime.datetime.now()
+        # The values are taken out of the DataFrame once here instead
+        # of for each line of each file.
+        patchPlan = compilePatchPlan(selParInFile, flExtSLvl)
+
+        if flExtSLvl == ".res":
+            # The reservoirs in the subbasins of each group are
+            # taken from the project index.
+            projIndex = getProjIndex(fdmodelTxtInOut)
+            if projIndex is None:
+                print("The reservoirs can not be found without the {} folder".format(
+                    fdmodelTxtInOut))
+                exit(1)
+            swatFnGroups = getResFnGroups(projIndex, swatSubFnGroups)
+        elif flExtSLvl in subLvlFlExtLst:
+            swatFnGroups = swatSubFnGroups
+        else:
+            swatFnGroups = swatHruFnGroups
+        nFiles = len(swatFnGroups[subGPKey])
+
+        appliedKey = "{}|{}".format(subGPKey, flExtSLvl)
+        appliedVals = patchPlan["values"]
+        if flExtSLvl == ".chm":
+            # The chm values depend on the soil depth in the sol file
+            appliedVals = dict(appliedVals)
+            appliedVals.update(getParmValues(
+                subGPL.loc[subGPL["Symbol"] == "SOL_Z"]))
+        if appliedParm.get(appliedKey) == appliedVals:
+            recordFileTypeTime(flExtSLvl, nFiles,
+                    datetime.datetime.now() - flExtStartTime, nFiles)
+            continue
+        if not iRecordCleared:
+            clearAppliedParm(runningDir)
+            iRecordCleared = True
+
+        if iFracBaseStore and patchPlan["hasFrac"] and (flExtSLvl in fracBaseFlExtLst):
+            patchPlan = addFracValues(patchPlan, swatFnGroups[subGPKey],
+                        [fnSwat for subGPKeyAll in swatFnGroups.keys()
+                            for fnSwat in swatFnGroups[subGPKeyAll]],
+                        fdmodelTxtInOut)
+
+        if (flExtSLvl == ".mgt") and (len(patchPlan["conditions"]) > 0):
+            # The land use and soil group of the hrus are taken from
+            # the project index instead of the hru and sol files.
+            projIndex = getProjIndex(fdmodelTxtInOut)
+            if projIndex is not None:
+                hruConds = getHruConditions(projIndex,
+                            swatHruFnGroups[subGPKey], rowCropLst)
+                if hruConds is not None:
+                    patchPlan = dict(patchPlan)
+                    patchPlan["hruConds"] = hruConds
+
+        if flExtSLvl == ".res":
+            # IRESCO, the flood season and the original STARG values
+            # of each reservoir are kept in the project index.
+            patchPlan = dict(patchPlan)
+            patchPlan["resAttrs"] = dict([(fnSwatRes, projIndex["reservoirs"][fnSwatRes])
+                                for fnSwatRes in swatFnGroups[subGPKey]])
+
+        if iHruBundle and (flExtSLvl in hruBundleFlExtLst):
+            # Written below with the other hru level files
+            bundlePlans[flExtSLvl] = patchPlan
+            appliedParm[appliedKey] = appliedVals
+            continue
+
+        nWritten = nFiles
         # Update subarea level files
-        # subLvlFlExtLst = [".sub", ".rte", ".swq"]
+        # subLvlFlExtLst = [".sub", ".rte", ".swq", ".res"]
         if flExtSLvl == ".sub":
-            if useRay:
-                updateStatus = []
-                updateStatus = [updateParInSubRay.remote(fnSwatSubLvl, selParInFile, runningDir)
-                                    for fnSwatSubLvl in swatSubFnGroups[subGPKey]]
-                ray.get(updateStatus)
-            # Code to run the function in a for loop
-            else:
-                for fnSwatSubLvl in swatSubFnGroups[subGPKey]:
-                    updateParInSub(fnSwatSubLvl, selParInFile, runningDir)
+            nWritten = runFileTasks(updateParInSub, swatSubFnGroups[subGPKey],
+                        patchPlan, runningDir)
 
         elif flExtSLvl == ".rte":
-            if useRay:
-                updateStatus = []
-                updateStatus = [updateParInRteRay.remote(fnSwatSubLvl, selParInFile,
-                                        runningDir, fdmodelTxtInOut)
-                                    for fnSwatSubLvl in swatSubFnGroups[subGPKey]]
-                ray.get(updateStatus)
-            # Code to run the function in a for loop
-            else:
-                for fnSwatSubLvl in swatSubFnGroups[subGPKey]:
-                    updateParInRte(fnSwatSubLvl, selParInFile, runningDir, fdmodelTxtInOut)
+            nWritten = runFileTasks(updateParInRte, swatSubFnGroups[subGPKey],
+                        patchPlan, runningDir, fdmodelTxtInOut)
 
         elif flExtSLvl == ".swq":
-            if useRay:
-                updateStatus = []
-                updateStatus = [updateParInSwqRay.remote(fnSwatSubLvl, selParInFile, runningDir)
-                                    for fnSwatSubLvl in swatSubFnGroups[subGPKey]]
-                ray.get(updateStatus)
-            # Code to run the function in a for loop
-            else:
-                for fnSwatSubLvl in swatSubFnGroups[subGPKey]:
-                    updateParInSwq(fnSwatSubLvl, selParInFile, runningDir)
+            nWritten = runFileTasks(updateParInSwq, swatSubFnGroups[subGPKey],
+                        patchPlan, runningDir)
 
-        # TODO: Add parameters for reservoir
-        # elif flExtSLvl == ".res":
-        #     if useRay:
-        #         updateParInResRay(selParInFile, fdWorkingDir, subNosWithRes, swatSubFnGroups[subGPKey], fdmodelTxtInOut)
-        #     else:
-        #         updateParInRes(selParInFile, fdWorkingDir, subNosWithRes, swatSubFnGroups[subGPKey], fdmodelTxtInOut)
+        elif flExtSLvl == ".res":
+            nWritten = runFileTasks(updateParInRes, swatFnGroups[subGPKey],
+                        patchPlan, runningDir, fdmodelTxtInOut)
 
         # Start processing HRU level files
         # hruLvlFlExtLst = [".gw", ".hru", ".mgt", ".sol", ".chm"] 
         elif flExtSLvl == ".gw":
-            if useRay:
-                updateStatus = []
-                updateStatus = [updateParInGwRay.remote(fnSwatSubLvl, selParInFile,
-                                    runningDir, fdmodelTxtInOut)
-                                    for fnSwatSubLvl in swatHruFnGroups[subGPKey]]
-                ray.get(updateStatus)
-            # Code to run the function in a for loop
-            else:
-                for fnSwatSubLvl in swatHruFnGroups[subGPKey]:
-                    updateParInGw(fnSwatSubLvl, selParInFile, runningDir, fdmodelTxtInOut)
-        
+            nWritten = runFileTasks(updateParInGw, swatHruFnGroups[subGPKey],
+                        patchPlan, runningDir, fdmodelTxtInOut)
+
         elif flExtSLvl == ".hru":
-            if useRay:
-                updateStatus = []
-                updateStatus = [updateParInHruRay.remote(fnSwatSubLvl, selParInFile, 
-                                    runningDir, fdmodelTxtInOut)
-                                    for fnSwatSubLvl in swatHruFnGroups[subGPKey]]
-                ray.get(updateStatus)
-            # Code to run the function in a for loop
-            else:
-                for fnSwatSubLvl in swatHruFnGroups[subGPKey]:
-                    updateParInHru(fnSwatSubLvl, selParInFile, runningDir, fdmodelTxtInOut)
+            nWritten = runFileTasks(updateParInHru, swatHruFnGroups[subGPKey],
+                        patchPlan, runningDir, fdmodelTxtInOut)
 
         elif flExtSLvl == ".mgt":
-            if useRay:
-                updateStatus = []
-                updateStatus = [updateParInMgtRay.remote(fnSwatSubLvl, selParInFile, 
-                                    runningDir, rowCropLst, fdmodelTxtInOut)
-                                    for fnSwatSubLvl in swatHruFnGroups[subGPKey]]
-                ray.get(updateStatus)
-            # Code to run the function in a for loop
-            else:
-                for fnSwatSubLvl in swatHruFnGroups[subGPKey]:
-                    updateParInMgt(fnSwatSubLvl, selParInFile, 
-                    runningDir, rowCropLst, fdmodelTxtInOut)
+            nWritten = runFileTasks(updateParInMgt, swatHruFnGroups[subGPKey],
+                        patchPlan, runningDir, rowCropLst, fdmodelTxtInOut)
 
         elif flExtSLvl == ".chm":
-            if useRay:
-                updateStatus = []
-                updateStatus = [updateParInChmRay.remote(fnSwatSubLvl, selParInFile, 
-                                    runningDir)
-                                    for fnSwatSubLvl in swatHruFnGroups[subGPKey]]
-                ray.get(updateStatus)
-            # Code to run the function in a for loop
-            else:
-                for fnSwatSubLvl in swatHruFnGroups[subGPKey]:
-                    updateParInChm(fnSwatSubLvl, selParInFile, 
-                    runningDir)
+            nWritten = runFileTasks(updateParInChm, swatHruFnGroups[subGPKey],
+                        patchPlan, runningDir)
 
         elif flExtSLvl == ".sol":
-            if useRay:
-                updateStatus = []
-                updateStatus = [updateParInSolRay.remote(fnSwatSubLvl, selParInFile, 
-                                    runningDir, fdmodelTxtInOut)
-                                    for fnSwatSubLvl in swatHruFnGroups[subGPKey]]
-                ray.get(updateStatus)
-            # Code to run the function in a for loop
-            else:
-                for fnSwatSubLvl in swatHruFnGroups[subGPKey]:
-                    updateParInSol(fnSwatSubLvl, selParInFile, 
-                    runningDir, fdmodelTxtInOut)
+            nWritten = runFileTasks(updateParInSol, swatHruFnGroups[subGPKey],
+                        patchPlan, runningDir, fdmodelTxtInOut)
+
+        appliedParm[appliedKey] = appliedVals
+
+        # Record the time used for each file type
+        recordFileTypeTime(flExtSLvl, nFiles,
+                datetime.datetime.now() - flExtStartTime,
+                nFiles - nWritten)
 
         # End of for loop updating subarea and hru level parameters parameters            
 
+    if len(bundlePlans) > 0:
+        bundleStartTime = datetime.datetime.now()
+        nWritten = runFileTasks(updateParInHruBundle, swatHruFnGroups[subGPKey],
+                        bundlePlans, runningDir, rowCropLst, fdmodelTxtInOut)
+        nFiles = len(bundlePlans) * len(swatHruFnGroups[subGPKey])
+        recordFileTypeTime("/".join(bundlePlans.keys()), nFiles,
+                datetime.datetime.now() - bundleStartTime,
+                nFiles - nWritten)
+
+    if iRecordCleared:
+        writeAppliedParm(runningDir, appliedParm)
+
 
 
 
@@ -1341,11 +1446,12 @@ def getOltVarDict(outLetList, outputVarList):
 
 
 ##########################################################################
-def buildObsSimPair(obsDict, simOutRchDF, varIDObsHdrPair):
+def buildObsSimPair(obsDict, simOutRchOutlets, varIDObsHdrPair):
 
     """
-    This function read the data from simDF and add corresponding columns
-    into the obsDict.
+    This function read the data from the arrays of each outlet,
+    {outlet number: {header: values}} returned by getRchOutlets,
+    and add corresponding columns into the obsDict.
     """
 
     # # Construct daily, monthly and annual time series.
@@ -1395,8 +1501,9 @@ def buildObsSimPair(obsDict, simOutRchDF, varIDObsHdrPair):
         # For daily, no aggregation is needed.
         # Frist, extract the corresponding outlet and variable
         # Then, aggregate as needed.
-        simOutVarHeader = ["RCH","GIS", "MON", "AREAkm2"] + [outVarHdrNm]
-        simOutVarDF = simOutRchDF.loc[simOutRchDF["RCH"] == outLetNo][simOutVarHeader]
+        simOutVarVals = []
+        if outLetNo in simOutRchOutlets:
+            simOutVarVals = simOutRchOutlets[outLetNo][outVarHdrNm]
 
         # Add a time series for better matching with observed data
         # if outVarFreq == 1: 
@@ -1419,57 +1526,21 @@ def buildObsSimPair(obsDict, simOutRchDF, varIDObsHdrPair):
         # So, two lists will be the easist way.   
         obsSimPair[obsKey] = []
         obsSimPair[obsKey].append(list(obsDF[outVarHdrNm]))
-        obsSimPair[obsKey].append(list(simOutVarDF[outVarHdrNm]))
+        obsSimPair[obsKey].append(list(simOutVarVals))
 
     return obsSimPair
 
 
 ##########################################################################
-def getRch2DF(fnRch, iPrintForCio, totalRchNum):
-    # Read output.rch into pandas dataframe
-    # Original header
-    # hedr = ["RCH","GIS", "MON","AREAkm2",
-    #         "FLOW_OUTcms", " SED_OUTtons", "ORGN_OUTkg",
-    #         "ORGP_OUTkg", "NO3_OUTkg", "NH4_OUTkg",
-    #         "NO2_OUTkg", "MINP_OUTkg", "SOLPST_OUTmg",
-    #         "SORPST_OUTmg"]
-
-    # Corresponding heads used in the observed data
-    # facilitating the extraction of output variables.
-    hedr = ["RCH","GIS", "MON","AREAkm2",
-            "sf(m3/s)", " sed(t/ha)", "orgn(kg/ha)",
-            "orgp(kg/ha)", "no3n(kg/ha)", "nh4n(kg/ha)",
-            "no2n(kg/ha)", "minp(kg/ha)", "solpst(mg/ha)",
-            "sorpst(mg/ha)"]
-
-    # ffRchDataLnRdr = ff.FortranRecordReader('(A5,1X,I5,1X,I8,1X,I3,I3,I5,3X,11E12.4)')
-    # fidRch = open(fnRch, "r")
-    # lifRch = fidRch.readlines()
-    # fidRch.close()
-    # del(lifRch[:9])
-
-    # Version 1: normal serial for loop
-    # for idx in range(len(lifRch)):
-    #     # print(lifRch[idx])
-    #     lifRch[idx] = ffRchDataLnRdr.read(lifRch[idx])[1:]
-
-    # Version 2: use pandas read_fwf
-    # rchDF = pandas.read_fwf(fnRch, colspecs='infer', skiprows=8)
-    
-
-    # Based on the value of iPrintForCio, the format are different
-    # When iPrintForCio == 0, for month and iPrintForCio == 2 for annual,
-    # The output.rch will include lines for annual sum and year average for
-    # each rch.
-    # When iPrintForCio == 1 for daily, these does not exist
-    colWidth = [5, 6, 9, 6] + [12] * 11
-    if (iPrintForCio == 0) or (iPrintForCio == 2):
-        rchDF = pandas.read_fwf(fnRch, widths=colWidth, skiprows=9, names=hedr, skipfooter=totalRchNum)
-        rchDF = rchDF.loc[rchDF["MON"] < 13]
-    else:
-        rchDF = pandas.read_fwf(fnRch, widths=colWidth, skiprows=9, names=hedr)
-   
-    return rchDF
+def getRch2DF(fnRch, iPrintForCio, totalRchNum, outLetLst=None, varHdrLst=None):
+    """
+    This function reads the reach output into a dataframe with the
+    columns RCH, GIS, MON, AREAkm2 and the headers of the observed
+    data. The binary outputb.rch is read when IA_B is 1 in file.cio.
+    When outLetLst and varHdrLst are given, only these outlets and
+    variables are kept.
+    """
+    return getRchOutput(fnRch, iPrintForCio, totalRchNum, outLetLst, varHdrLst)
 
 
 
@@ -1510,7 +1581,7 @@ def determineIprintVal(iPrint):
 
 
 ##########################################################################
-def modFileCio(ctrlSetting, runningDir, rchVarLst):
+def modFileCio(ctrlSetting, runningDir, rchVarLstOut=None):
 
     """
     This function modify the file.cio file based on the user input.
@@ -1519,11 +1590,27 @@ def modFileCio(ctrlSetting, runningDir, rchVarLst):
     2. start and end date
     3. number of skip years.
     4. output variable in the output.rch file to meet the requirement of
-    different variables specified in for calibration.
+    different variables specified in for calibration. By default, they
+    are the variables of outputVarList when iMinSwatOutput is True,
+    otherwise rchVarLst.
+    5. the subbasin output and the outputs not read are reduced when
+    iMinSwatOutput is True.
     """
 
     iPrintForCio = determineIprintVal(ctrlSetting["iPrint"])
 
+    if rchVarLstOut is None:
+        if iMinSwatOutput:
+            rchVarLstOut = getRchVarLstOut(ctrlSetting["outputVarList"])
+        else:
+            rchVarLstOut = rchVarLst
+
+    # Lines 62-63, 74-76 and 80-84 for the print codes of output.pst,
+    # the final soil chemical data, hourly hru output, output.sto,
+    # output.sol, watqual, velocity/depth, snow, output.mgt and
+    # output.wtr, which are not read.
+    cioPrintOffIdx = [61, 62, 73, 74, 75, 79, 80, 81, 82, 83]
+
     # Determin NBYR, IYR, IDFA, and IDAL
     usrStartJD = datetime.date(ctrlSetting["startSimDate"][0], 
                             ctrlSetting["startSimDate"][1], 
@@ -1587,14 +1674,19 @@ def modFileCio(ctrlSetting, runningDir, rchVarLst):
         # Line 65 for parameter out variable in Rch
         if (lidx == 64):
             # Construct out variable lines 4 spacex * 20 var
-            lineForWrite = rchVarLst + [0] * (20 - len(rchVarLst))
+            lineForWrite = rchVarLstOut + [0] * (20 - len(rchVarLstOut))
             lineForWrite = "".join(["{:4d}".format(varRch) for varRch in lineForWrite])
             lif[lidx] = """{}\n""".format(lineForWrite)
  
         # Line 67 for parameter out variable in subbasin
+        # 0 prints all variables, so only the first one is printed
+        # when iMinSwatOutput is True.
         if (lidx == 66):
             # Construct out variable lines 4 spacex * 20 var
-            lif[lidx] = """   0   0   0   0   0   0   0   0   0   0   0   0   0   0   0\n"""
+            if iMinSwatOutput:
+                lif[lidx] = """   1   0   0   0   0   0   0   0   0   0   0   0   0   0   0\n"""
+            else:
+                lif[lidx] = """   0   0   0   0   0   0   0   0   0   0   0   0   0   0   0\n"""
  
         # Line 69 for parameter out variable in HRU
         if (lidx == 68):
@@ -1606,6 +1698,10 @@ def modFileCio(ctrlSetting, runningDir, rchVarLst):
             # Construct out variable lines 4 spacex * 20 var
             lif[lidx] = """   1   0   0   0   0   0   0   0   0   0   0   0   0   0   0   0   0   0   0   0\n"""
  
+        # Print codes of the outputs not read, only the value is changed
+        if iMinSwatOutput and (lidx in cioPrintOffIdx) and ("|" in lif[lidx]):
+            lif[lidx] = """{:16d}{}""".format(0, lif[lidx][16:])
+
         # Line 79 for parameter IA_B
         if (lidx == 78):
             lif[lidx] = """{:16d}    | IA_B : Code for binary output of files (.rch, .sub, .hru files only)\n""".format(
@@ -2242,42 +2338,61 @@ def get_osplatform():
 
 
 ##########################################################################
-def runSWATModel(osplatform, runningDir, fdMain, fdDMPOTpyFiles, fnSwatExe):
+def stageSWATExe(runningDir, fdMain, fdDMPOTpyFiles, fnSwatExe):
     """
-    This function change the directory to the apex run folder,
-    run apex, and change back.
-    TODO: Add the swat2012 linux into the package folder
-    and copy it to the working directory.
+    This function copies the swat exe to the running folder.
+    The copy is only made when the running folder does not have
+    the same exe yet, so that each folder is staged once.
     """
-
-    # Copy the swat exe to the working Dir
-    fnpSWATExe = os.path.join(fdMain, 
-                    fdDMPOTpyFiles, 
+    fnpSWATExe = os.path.join(fdMain,
+                    fdDMPOTpyFiles,
                     fnSwatExe)
-    fnpSWATExeWD = os.path.join(runningDir, 
+    fnpSWATExeWD = os.path.join(runningDir,
                     fnSwatExe)
-    try:
-        shutil.copy(fnpSWATExe, fnpSWATExeWD)
-    except: 
-        print("could not copy SWAT executable to the working directory")
-        return
 
-    os.chdir(runningDir)
+    if os.path.isfile(fnpSWATExeWD):
+        srcStat = os.stat(fnpSWATExe)
+        destStat = os.stat(fnpSWATExeWD)
+        if ((srcStat.st_size == destStat.st_size)
+            and (srcStat.st_mtime <= destStat.st_mtime)):
+            return fnpSWATExeWD
 
-    if osplatform == "linux":
-        procCommand = "./{}".format(fnSwatExe)                                  
-    elif osplatform == "Windows":
-        procCommand = "{}".format(fnSwatExe)
+    # copy2 keeps the modification time, which is used above to
+    # tell whether the exe was already staged.
+    shutil.copy2(fnpSWATExe, fnpSWATExeWD)
+
+    return fnpSWATExeWD
+
+
+##########################################################################
+def runSWATInDir(osplatform, runningDir, fnSwatExe, iQuiet=False):
+    """
+    This function runs the swat exe staged in the running folder.
+    The folder is given to the subprocess as its working directory,
+    so the main program never changes its own directory. This allows
+    several folders to be run at the same time. The run is supervised
+    and its record (exit code, wall time, peak memory and whether it
+    was killed) is returned.
+    """
+
+    return superviseSWATRun(runningDir, fnSwatExe, iQuiet)
 
-    ## call date command ##
-    try: 
-        p = subprocess.run(procCommand, shell=True, stderr=subprocess.PIPE)
-        # # Change back to the fdworking folder
-        os.chdir(fdMain)
 
-        return p.returncode()
+##########################################################################
+def runSWATModel(osplatform, runningDir, fdMain, fdDMPOTpyFiles, fnSwatExe):
+    """
+    This function stages the swat exe in the running folder if
+    needed and run swat in that folder.
+    """
+
+    # Copy the swat exe to the working Dir
+    try:
+        stageSWATExe(runningDir, fdMain, fdDMPOTpyFiles, fnSwatExe)
     except:
-        return "Error"
+        print("could not copy SWAT executable to the working directory")
+        return initRunInfo(runningDir)
+
+    return runSWATInDir(osplatform, runningDir, fnSwatExe)
 
 
 
@@ -0,0 +1,242 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+This class is designed to be a collection of functions dealing with
+the executors running the file rewriting tasks. The same update
+functions in SWATUtil are used by all executors: serial, thread
+pool, process pool and ray. The file names are grouped into chunks
+so that one task updates many small files.
+
+@author: Qingyu.Feng
+"""
+
+##########################################################################
+# Import modules #########################################################
+##########################################################################
+import os
+import math
+import datetime
+import threading
+import multiprocessing
+import concurrent.futures
+
+from .globVars import *
+
+##########################################################################
+# Define functions #######################################################
+##########################################################################
+# The executor is created once when it is first used and kept for the
+# following runs. The process id is kept since a forked worker process
+# can not use the pools of its parent and creates its own executor.
+fileExecutorInUse = None
+fileExecutorPid = None
+
+# Time used for each file type since it was last reported:
+# {flExt: [number of files, time used, number of files skipped]}
+# The record is kept for each thread, so that parameter sets modified
+# at the same time in several threads have their own record.
+fileTypeTimesLocal = threading.local()
+
+# Number of chunks for each thread in the thread mode
+threadChunksPerIO = 4
+
+
+##########################################################################
+def runFileTaskChunk(updateFunc, fnChunk, commonArgs):
+    """
+    This function runs the update function for each file in the
+    chunk. The file name is the first argument of the update function,
+    followed by the common arguments. The number of files written is
+    returned. An update function returns False when the file was not
+    written since its content did not change, or the number of files
+    written when it updates several files.
+    """
+    nWritten = 0
+    for fnSWAT in fnChunk:
+        nFileWritten = updateFunc(fnSWAT, *commonArgs)
+        if nFileWritten is None:
+            nFileWritten = 1
+        nWritten = nWritten + int(nFileWritten)
+
+    return nWritten
+
+
+##########################################################################
+def splitFileChunks(fileNames, chunkSize):
+    """
+    This function splits the file names into chunks with at most
+    chunkSize files.
+    """
+    if chunkSize < 1:
+        chunkSize = 1
+
+    return [fileNames[chkIdx:chkIdx + chunkSize]
+                for chkIdx in range(0, len(fileNames), chunkSize)]
+
+
+##########################################################################
+class SerialFileExecutor:
+    """
+    Run the tasks one by one in this process.
+    """
+    def runFileTasks(self, updateFunc, fileNames, *commonArgs):
+        return runFileTaskChunk(updateFunc, fileNames, commonArgs)
+
+    def shutdown(self):
+        pass
+
+
+##########################################################################
+class ThreadFileExecutor:
+    """
+    Run the chunks in a thread pool. Rewriting the files is mostly
+    waiting for the disk, so threads are enough and no process needs
+    to be started. ioLimit threads read and write files at the same
+    time, and at most two chunks per thread are waiting in the queue.
+    The chunks are sized from the number of files, so that every
+    thread gets several chunks, and are not larger than chunkSize.
+    """
+    def __init__(self, ioLimit, chunkSize):
+        self.ioLimit = ioLimit
+        self.chunkSize = chunkSize
+        self.pool = concurrent.futures.ThreadPoolExecutor(
+            max_workers=ioLimit)
+        self.queueLimit = threading.BoundedSemaphore(2 * ioLimit)
+
+    def runChunk(self, updateFunc, fnChunk, commonArgs):
+        try:
+            return runFileTaskChunk(updateFunc, fnChunk, commonArgs)
+        finally:
+            self.queueLimit.release()
+
+    def runFileTasks(self, updateFunc, fileNames, *commonArgs):
+        taskFutures = []
+        chunkSize = min(self.chunkSize, int(math.ceil(
+            len(fileNames) / float(threadChunksPerIO * self.ioLimit))))
+        for fnChunk in splitFileChunks(fileNames, chunkSize):
+            self.queueLimit.acquire()
+            taskFutures.append(self.pool.submit(self.runChunk,
+                            updateFunc, fnChunk, commonArgs))
+        # result() raises the errors of the tasks here
+        return sum([taskFuture.result() for taskFuture in taskFutures])
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True)
+
+
+##########################################################################
+class PoolFileExecutor:
+    """
+    Run the chunks in a process pool.
+    """
+    def __init__(self, nExecWorkers, chunkSize):
+        self.chunkSize = chunkSize
+        # Forked where possible, so the driver script is not
+        # executed again in the children.
+        if "fork" in multiprocessing.get_all_start_methods():
+            mpContext = multiprocessing.get_context("fork")
+        else:
+            mpContext = None
+        self.pool = concurrent.futures.ProcessPoolExecutor(
+            max_workers=nExecWorkers,
+            mp_context=mpContext)
+
+    def runFileTasks(self, updateFunc, fileNames, *commonArgs):
+        taskFutures = [self.pool.submit(runFileTaskChunk,
+                            updateFunc, fnChunk, commonArgs)
+                        for fnChunk in splitFileChunks(fileNames, self.chunkSize)]
+        # result() raises the errors of the tasks here
+        return sum([taskFuture.result() for taskFuture in taskFutures])
+
+    def shutdown(self):
+        self.pool.shutdown(wait=True)
+
+
+##########################################################################
+def getFileExecutor():
+    """
+    This function returns the executor selected by fileExecType
+    in globVars. useRay = True is kept for old settings and selects
+    the ray executor.
+    """
+    global fileExecutorInUse, fileExecutorPid
+
+    if (fileExecutorInUse is not None) and (fileExecutorPid == os.getpid()):
+        return fileExecutorInUse
+    fileExecutorPid = os.getpid()
+
+    fileExecTypeUsed = fileExecType
+    if useRay:
+        fileExecTypeUsed = "ray"
+
+    if fileExecTypeUsed == "serial":
+        fileExecutorInUse = SerialFileExecutor()
+    elif fileExecTypeUsed == "thread":
+        fileExecutorInUse = ThreadFileExecutor(fileIOLimit, fileChunkSize)
+    elif fileExecTypeUsed == "process":
+        fileExecutorInUse = PoolFileExecutor(fileExecWorkers, fileChunkSize)
+    elif fileExecTypeUsed == "ray":
+        from .RaySWATUtil import RayFileExecutor
+        fileExecutorInUse = RayFileExecutor(fileChunkSize)
+    else:
+        print("fileExecType should be serial, thread, process or ray, not {}".format(
+            fileExecTypeUsed))
+        exit(1)
+
+    return fileExecutorInUse
+
+
+##########################################################################
+def runFileTasks(updateFunc, fileNames, *commonArgs):
+    """
+    This function runs updateFunc(fileName, *commonArgs) for all
+    files with the selected executor.
+    """
+    return getFileExecutor().runFileTasks(updateFunc, fileNames, *commonArgs)
+
+
+##########################################################################
+def recordFileTypeTime(flExt, nFiles, timeUsed, nSkipped=0):
+    """
+    This function adds the time used to rewrite nFiles files of one
+    file type. nSkipped of them were not written since their values
+    did not change.
+    """
+    if not hasattr(fileTypeTimesLocal, "fileTypeTimes"):
+        fileTypeTimesLocal.fileTypeTimes = {}
+    fileTypeTimes = fileTypeTimesLocal.fileTypeTimes
+    if flExt not in fileTypeTimes:
+        fileTypeTimes[flExt] = [0, datetime.timedelta(0), 0]
+    fileTypeTimes[flExt][0] = fileTypeTimes[flExt][0] + nFiles
+    fileTypeTimes[flExt][1] = fileTypeTimes[flExt][1] + timeUsed
+    fileTypeTimes[flExt][2] = fileTypeTimes[flExt][2] + nSkipped
+
+
+##########################################################################
+def popFileTypeTimes():
+    """
+    This function returns the times recorded for each file type
+    in this thread and starts a new record.
+    """
+    fileTypeTimesOut = getattr(fileTypeTimesLocal, "fileTypeTimes", {})
+    fileTypeTimesLocal.fileTypeTimes = {}
+
+    return fileTypeTimesOut
+
+
+##########################################################################
+def formatFileTypeTimes(fileTypeTimesOut):
+    """
+    This function makes one line for printing the times of each
+    file type and the number of files skipped.
+    """
+    nSkippedTotal = sum([fileTypeTimesOut[flExt][2]
+                        for flExt in fileTypeTimesOut.keys()])
+
+    return "; ".join(["{} ({} files, {} skipped): {}".format(flExt,
+                        fileTypeTimesOut[flExt][0],
+                        fileTypeTimesOut[flExt][2],
+                        fileTypeTimesOut[flExt][1])
+                    for flExt in fileTypeTimesOut.keys()]
+                    + ["{} files skipped".format(nSkippedTotal)])
@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+This class is designed to be a collection of functions dealing with
+the original values of the parameters changed by fraction, e.g.,
+SLOPE, CN_F, GW_SPYLD, CH_SII, RES_EVOL and the soil layer values. For each
+file type, the values of all files are read once into numpy arrays
+with one row for each file. A run multiplies the rows of a subarea
+group at once, so the update functions only format the new values
+and do not read the original files.
+The arrays are saved in fdFracBase and memory-mapped by the next
+runs and by the worker processes while the original files do not
+change.
+
+@author: Qingyu.Feng
+"""
+
+##########################################################################
+# Import modules #########################################################
+##########################################################################
+import os
+import json
+import threading
+
+import numpy as np
+
+from .globVars import fdFracBase, iFracBaseMmap
+from .PATCHUtil import swatLinePatches, solLayerPatches
+from .PROJINDEXUtil import getFilesFingerprint
+
+##########################################################################
+# Define functions #######################################################
+##########################################################################
+# The file types with parameters changed by fraction
+fracBaseFlExtLst = [".hru", ".gw", ".mgt", ".sol", ".rte", ".res"]
+
+# Encoding of the original files of each type
+fracBaseEncodings = {".rte": "ISO-8859-1", ".res": "ISO-8859-1"}
+
+# {flExt: store}, the store of one file type is:
+# {"fnIndex": {file name: row},
+#  "lines": {line index: values (nFiles)},
+#  "layers": {line index: layer values (nFiles, max number of layers)},
+#  "layerCounts": {line index: number of layers (nFiles)}}
+# A value not found in the original file is nan, and the line is not
+# changed for this file.
+fracBaseStores = {}
+fracBaseLock = threading.Lock()
+
+
+##########################################################################
+def getFracLineIdx(flExt):
+    """
+    This function returns the index of the lines changed by fraction
+    and of the soil layer lines in one file type.
+    """
+    lineIdxLst = sorted([linePatch[0]
+                    for linePatch in swatLinePatches.get(flExt, {}).values()
+                    if linePatch[2] == "FRAC"])
+    layerIdxLst = []
+    if flExt == ".sol":
+        layerIdxLst = sorted([layerPatch[0]
+                    for layerPatch in solLayerPatches.values()])
+
+    return lineIdxLst, layerIdxLst
+
+
+##########################################################################
+def readFracBases(flExt, fnSwatLst, fdmodelTxtInOut):
+    """
+    This function reads the original values of the lines changed by
+    fraction from all files of one type.
+    """
+    lineIdxLst, layerIdxLst = getFracLineIdx(flExt)
+    nFiles = len(fnSwatLst)
+
+    lineBases = {}
+    for lidx in lineIdxLst:
+        lineBases[lidx] = np.full(nFiles, np.nan)
+    layerValLsts = {}
+    for lidx in layerIdxLst:
+        layerValLsts[lidx] = []
+
+    for fileRow in range(nFiles):
+        fnpOrig = os.path.join(fdmodelTxtInOut,
+            "{}{}".format(fnSwatLst[fileRow], flExt))
+        try:
+            with open(fnpOrig, 'r', encoding=fracBaseEncodings.get(flExt)) as swatFileOrig:
+                lifOrig = swatFileOrig.readlines()
+        except IOError as e:
+            print("File {} does not exist: {}. Please double check your TxtInOut \
+                folder and make sure you have a complete set".format(fnpOrig, e))
+            exit(1)
+
+        for lidx in lineIdxLst:
+            try:
+                lineBases[lidx][fileRow] = float(lifOrig[lidx].split("|")[0])
+            except (IndexError, ValueError):
+                pass
+
+        for lidx in layerIdxLst:
+            try:
+                layerValLsts[lidx].append([float(solVal)
+                    for solVal in lifOrig[lidx].split(":")[1][:-1].split(" ")
+                    if solVal != ""])
+            except (IndexError, ValueError):
+                layerValLsts[lidx].append([])
+
+    layerBases = {}
+    layerCounts = {}
+    for lidx in layerIdxLst:
+        layerCounts[lidx] = np.array([len(layerVals)
+                        for layerVals in layerValLsts[lidx]], dtype=np.int32)
+        layerBases[lidx] = np.full((nFiles, max([1] + layerCounts[lidx].tolist())),
+                        np.nan)
+        for fileRow in range(nFiles):
+            layerBases[lidx][fileRow, :layerCounts[lidx][fileRow]] = layerValLsts[lidx][fileRow]
+
+    baseStore = {
+        "fnIndex": dict([(fnSwatLst[fileRow], fileRow) for fileRow in range(nFiles)]),
+        "lines": lineBases,
+        "layers": layerBases,
+        "layerCounts": layerCounts
+    }
+
+    return baseStore
+
+
+##########################################################################
+def getFracBaseArrayFns(flExt, baseStore):
+    """
+    This function returns the names of the files keeping the arrays
+    of one file type: {array key: file name}
+    """
+    flName = flExt.replace(".", "")
+    arrayFns = {}
+    for lidx in baseStore["lines"].keys():
+        arrayFns["lines|{}".format(lidx)] = "{}_line{}.npy".format(flName, lidx)
+    for lidx in baseStore["layers"].keys():
+        arrayFns["layers|{}".format(lidx)] = "{}_layer{}.npy".format(flName, lidx)
+        arrayFns["layerCounts|{}".format(lidx)] = "{}_layerCount{}.npy".format(flName, lidx)
+
+    return arrayFns
+
+
+##########################################################################
+def saveFracBases(flExt, baseStore, fingerprint):
+    """
+    This function saves the arrays of one file type in fdFracBase.
+    Each file is written with a temporary name and then renamed, and
+    the index is written last, so a store saved by several processes
+    at the same time or not completely saved is not used.
+    """
+    if not os.path.isdir(fdFracBase):
+        os.makedirs(fdFracBase, exist_ok=True)
+
+    arrayFns = getFracBaseArrayFns(flExt, baseStore)
+    for arrayKey, fnArray in arrayFns.items():
+        storeKey, lidx = arrayKey.split("|")
+        fnpArray = os.path.join(fdFracBase, fnArray)
+        fnpTmp = "{}.{}.tmp".format(fnpArray, os.getpid())
+        with open(fnpTmp, 'wb') as arrayFile:
+            np.save(arrayFile, baseStore[storeKey][int(lidx)])
+        os.replace(fnpTmp, fnpArray)
+
+    storeIndex = {
+        "fingerprint": fingerprint,
+        "fnSwatLst": sorted(baseStore["fnIndex"].keys(),
+                        key=lambda fnSwat: baseStore["fnIndex"][fnSwat]),
+        "arrays": arrayFns
+    }
+    fnpIndex = os.path.join(fdFracBase, "{}.json".format(flExt.replace(".", "")))
+    fnpTmp = "{}.{}.tmp".format(fnpIndex, os.getpid())
+    with open(fnpTmp, 'w') as indexFile:
+        json.dump(storeIndex, indexFile)
+    os.replace(fnpTmp, fnpIndex)
+
+
+##########################################################################
+def loadFracBases(flExt, fnSwatLst, fingerprint):
+    """
+    This function loads the arrays of one file type saved before.
+    None is returned when they were saved for other files or the
+    original files changed since then.
+    """
+    fnpIndex = os.path.join(fdFracBase, "{}.json".format(flExt.replace(".", "")))
+    try:
+        with open(fnpIndex, 'r') as indexFile:
+            storeIndex = json.load(indexFile)
+    except (IOError, ValueError):
+        return None
+
+    if ((storeIndex.get("fingerprint") != fingerprint)
+        or (storeIndex.get("fnSwatLst") != list(fnSwatLst))):
+        return None
+
+    if iFracBaseMmap:
+        mmapMode = "r"
+    else:
+        mmapMode = None
+
+    baseStore = {
+        "fnIndex": dict([(fnSwatLst[fileRow], fileRow)
+                        for fileRow in range(len(fnSwatLst))]),
+        "lines": {},
+        "layers": {},
+        "layerCounts": {}
+    }
+    try:
+        for arrayKey, fnArray in storeIndex["arrays"].items():
+            storeKey, lidx = arrayKey.split("|")
+            baseStore[storeKey][int(lidx)] = np.load(
+                os.path.join(fdFracBase, fnArray), mmap_mode=mmapMode)
+    except (IOError, ValueError):
+        return None
+
+    lineIdxLst, layerIdxLst = getFracLineIdx(flExt)
+    if ((sorted(baseStore["lines"].keys()) != lineIdxLst)
+        or (sorted(baseStore["layers"].keys()) != layerIdxLst)):
+        return None
+
+    return baseStore
+
+
+##########################################################################
+def getFracBaseStore(flExt, fnSwatAllLst, fdmodelTxtInOut):
+    """
+    This function returns the store of one file type. It is built
+    once in each process: loaded from fdFracBase when the original
+    files did not change, otherwise read from the original files
+    and saved.
+    """
+    with fracBaseLock:
+        if flExt in fracBaseStores:
+            return fracBaseStores[flExt]
+
+        fnSwatAllLst = list(fnSwatAllLst)
+        fingerprint = getFilesFingerprint([os.path.join(fdmodelTxtInOut,
+                        "{}{}".format(fnSwat, flExt)) for fnSwat in fnSwatAllLst])
+        baseStore = loadFracBases(flExt, fnSwatAllLst, fingerprint)
+        if baseStore is None:
+            print(".....Read the original {} values changed by fraction of {} files.....".format(
+                flExt, len(fnSwatAllLst)))
+            baseStore = readFracBases(flExt, fnSwatAllLst, fdmodelTxtInOut)
+            try:
+                saveFracBases(flExt, baseStore, fingerprint)
+            except OSError as e:
+                print("Unable to save the {} values in {}: {}".format(
+                    flExt, fdFracBase, e))
+        fracBaseStores[flExt] = baseStore
+
+    return baseStore
+
+
+##########################################################################
+def addFracValues(patchPlan, fnSwatLst, fnSwatAllLst, fdmodelTxtInOut):
+    """
+    This function calculates the new values of the lines changed by
+    fraction for the files of one group, with one multiplication for
+    each parameter. They are kept in the plan, so that the update
+    functions get them with resolveFracPatches in PATCHUtil.
+    fnSwatAllLst has the files of all groups, for which the store is
+    built.
+    """
+    baseStore = getFracBaseStore(patchPlan["flExt"], fnSwatAllLst, fdmodelTxtInOut)
+    if any([fnSwat not in baseStore["fnIndex"] for fnSwat in fnSwatLst]):
+        print("Files of the group are not in the {} store, the original files are used".format(
+            patchPlan["flExt"]))
+        return patchPlan
+
+    fileRows = np.array([baseStore["fnIndex"][fnSwat] for fnSwat in fnSwatLst],
+                        dtype=np.int64)
+
+    fracLines = {}
+    for lidx, lineFmt, changeType, parmVal, patchCond in patchPlan["linePatches"]:
+        if changeType == "FRAC":
+            fracLines[lidx] = baseStore["lines"][lidx][fileRows] * parmVal
+
+    fracLayers = {}
+    fracLayerCounts = {}
+    for lidx, layerFmt, mutiPlier in patchPlan["layerPatches"]:
+        fracLayers[lidx] = baseStore["layers"][lidx][fileRows] * mutiPlier
+        fracLayerCounts[lidx] = np.asarray(baseStore["layerCounts"][lidx][fileRows])
+
+    patchPlan = dict(patchPlan)
+    patchPlan["fracRows"] = dict([(fnSwatLst[fileRow], fileRow)
+                            for fileRow in range(len(fnSwatLst))])
+    patchPlan["fracLines"] = fracLines
+    patchPlan["fracLayers"] = fracLayers
+    patchPlan["fracLayerCounts"] = fracLayerCounts
+
+    return patchPlan
@@ -0,0 +1,544 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sat Oct 17 2026
+
+This class is designed to be a collection of functions dealing with
+running SWAT evaluations concurrently in a pool of working directory
+replicas.
+
+@author: Qingyu.Feng
+"""
+
+##########################################################################
+# Import modules #########################################################
+##########################################################################
+import os
+import copy
+import datetime
+import asyncio
+import threading
+import multiprocessing
+import concurrent.futures
+
+from .globVars import *
+from .DMPOTUtil import *
+from .EXECUtil import popFileTypeTimes
+from .SUPERVISORUtil import superviseSWATRunAsync
+
+##########################################################################
+# Define functions #######################################################
+##########################################################################
+# Context shared by all evaluations in a worker process. It is set once
+# by the pool initializer so that only parameter values need to be sent
+# to the worker for each evaluation.
+workerEvalContext = {}
+
+
+##########################################################################
+def initWorkerEvalContext(evalContext):
+    """
+    Initializer of the worker processes. It stores the settings
+    that do not change between evaluations.
+    """
+    global workerEvalContext
+    workerEvalContext = evalContext
+
+
+##########################################################################
+def buildWorkerEvalContext(ctrlSetting,
+                    parmBsnLvlFExtLst,
+                    parmSubLvlFExtLst,
+                    swatSubFnGroups,
+                    swatHruFnGroups,
+                    iPrintForCio,
+                    rcvRchLst,
+                    obsDataLst,
+                    parmObjFnKeys,
+                    nCalVal):
+    """
+    This function collects the information each worker needs to
+    modify the files, run swat and calculate the statistics.
+    """
+    evalContext = {
+        "parmBsnLvlFExtLst": parmBsnLvlFExtLst,
+        "parmSubLvlFExtLst": parmSubLvlFExtLst,
+        "swatSubFnGroups": swatSubFnGroups,
+        "swatHruFnGroups": swatHruFnGroups,
+        "iPrintForCio": iPrintForCio,
+        "rcvRchLst": rcvRchLst,
+        "obsDataLst": obsDataLst,
+        "parmObjFnKeys": parmObjFnKeys,
+        "groupSubareaIdx": ctrlSetting["groupSubareaIdx"],
+        "outLetList": ctrlSetting["outLetList"],
+        "outputVarList": ctrlSetting["outputVarList"],
+        "nCalVal": nCalVal
+    }
+
+    return evalContext
+
+
+##########################################################################
+def initWorkerDirs(timeZone, startTime, nWorkers, srcDr, fdWorkerDirs):
+    """
+    This function creates one replica of the working directory
+    for each worker. The srcDr should already have the modified
+    file.cio. The files not modified are linked to the ones in srcDr.
+    The swat exe is staged once in each replica.
+    """
+    print(".....Prepare {} worker directories.....".format(nWorkers))
+
+    copyWDStartTime = datetime.datetime.now(timeZone)
+
+    if not os.path.isdir(fdWorkerDirs):
+        os.mkdir(fdWorkerDirs)
+
+    workerDirs = []
+    for workerIdx in range(nWorkers):
+        fdWorker = os.path.join(fdWorkerDirs,
+                        "worker{:02d}".format(workerIdx+1))
+        resetSWATDir(srcDr, fdWorker, iLinkReadOnlyFiles)
+
+        try:
+            stageSWATExe(fdWorker, fdMain, fdDMPOTpyFiles, fnSwatExe)
+        except:
+            print("could not copy SWAT executable to {}".format(fdWorker))
+            exit(1)
+
+        workerDirs.append(fdWorker)
+
+    copyWDEndTime = datetime.datetime.now(timeZone)
+    print(".....Time for preparing worker directories: {}; Total Time: {}.....". format(
+        copyWDEndTime - copyWDStartTime,
+        copyWDEndTime - startTime))
+
+    return workerDirs
+
+
+##########################################################################
+def modifyParmSetInDir(runningDir, subParGroups, parmBsnLvl):
+    """
+    This function modifies the parameter values in the files of
+    one working directory. The TestVal of the parameter sets are used.
+    The time used for each file type is returned.
+    """
+    for subGPKey, subGPL in subParGroups.items():
+        if len(subGPL.index) > 0:
+            modifyParInFileSub(subGPL,
+                        workerEvalContext["parmSubLvlFExtLst"],
+                        workerEvalContext["swatSubFnGroups"],
+                        subGPKey,
+                        workerEvalContext["swatHruFnGroups"],
+                        runningDir)
+    if len(parmBsnLvl.index) > 0:
+        modifyParInFileBsn(parmBsnLvl,
+                        workerEvalContext["parmBsnLvlFExtLst"],
+                        runningDir)
+
+    return popFileTypeTimes()
+
+
+##########################################################################
+def calObjFuncInDir(runningDir, swatRunInfo=None, iReturnSeries=False):
+    """
+    This function calculates the statistics from the output of
+    one working directory. A killed or failed run gets the penalty
+    objective function values. When iReturnSeries is True, the
+    simulated series of the outlets and variables with observed data
+    are also returned, from the same read of the output.
+    """
+    if isRunFailed(swatRunInfo):
+        # The output of a killed or failed run is not complete
+        if iReturnSeries:
+            return calPenaltyObjFunc(workerEvalContext["parmObjFnKeys"]) + ({},)
+        return calPenaltyObjFunc(workerEvalContext["parmObjFnKeys"])
+
+    # Each evaluation gets its own dictionary for the test values
+    subObfTestDict = {}
+    for opKeys in workerEvalContext["parmObjFnKeys"]:
+        subObfTestDict[opKeys] = 10e2
+
+    objFuncValues = calObjFuncValues(
+                workerEvalContext["iPrintForCio"],
+                workerEvalContext["rcvRchLst"],
+                workerEvalContext["obsDataLst"],
+                workerEvalContext["parmObjFnKeys"],
+                subObfTestDict,
+                runningDir, False,
+                workerEvalContext["nCalVal"],
+                workerEvalContext["groupSubareaIdx"],
+                iReturnObsSimPair=iReturnSeries)
+    if not iReturnSeries:
+        return objFuncValues
+
+    outletSeries = {}
+    for obsKey, obsSimLst in objFuncValues[3].items():
+        outletSeries[obsKey] = obsSimLst[1]
+
+    return objFuncValues[0], objFuncValues[1], objFuncValues[2], outletSeries
+
+
+##########################################################################
+def buildEvalResult(runningDir, swatRunInfo, evalStartTime, modifyEndTime,
+                    runEndTime, calStatTime, objFuncValues):
+    """
+    This function puts the statistics and times of one evaluation
+    into a dictionary.
+    """
+    runCode = 0
+    if swatRunInfo is not None:
+        runCode = swatRunInfo["runCode"]
+    evalResult = {
+        "runningDir": runningDir,
+        "runCode": runCode,
+        "runInfo": swatRunInfo,
+        "modifyTime": modifyEndTime - evalStartTime,
+        "runTime": runEndTime - modifyEndTime,
+        "statTime": calStatTime - runEndTime,
+        "subObfTestDict": objFuncValues[0],
+        "obfValNonOther": objFuncValues[1],
+        "subAllStats": objFuncValues[2]
+    }
+
+    return evalResult
+
+
+##########################################################################
+def evalParmSetInDir(runningDir, subParGroups, parmBsnLvl, iReturnSeries=False):
+    """
+    This function modifies the parameter values in the files of
+    one working directory, runs swat there and calculates the
+    statistics. The simulated outlet series are added to the result
+    when iReturnSeries is True.
+    """
+    evalStartTime = datetime.datetime.now()
+    fileTypeTimes = modifyParmSetInDir(runningDir, subParGroups, parmBsnLvl)
+    modifyEndTime = datetime.datetime.now()
+
+    swatRunInfo = None
+    if iRunSWAT:
+        swatRunInfo = runSWATInDir(get_osplatform(), runningDir, fnSwatExe)
+    runEndTime = datetime.datetime.now()
+
+    objFuncValues = calObjFuncInDir(runningDir, swatRunInfo, iReturnSeries)
+    calStatTime = datetime.datetime.now()
+
+    evalResult = buildEvalResult(runningDir, swatRunInfo, evalStartTime,
+                    modifyEndTime, runEndTime, calStatTime, objFuncValues)
+    evalResult["fileTypeTimes"] = fileTypeTimes
+    if iReturnSeries:
+        evalResult["outletSeries"] = objFuncValues[3]
+
+    return evalResult
+
+
+##########################################################################
+def startSWATRunInDir(osplatform, runningDir, fnSwatExe):
+    """
+    This function starts swat in the running folder without waiting
+    for it. The run is supervised in a thread, which also records the
+    time when the run is finished, so that the time overlapped with
+    other work can be reported.
+    """
+    swatRun = {
+        "runningDir": runningDir,
+        "startTime": datetime.datetime.now(),
+        "endTime": None,
+        "runInfo": None
+    }
+
+    def superviseSWATProc():
+        swatRun["runInfo"] = runSWATInDir(osplatform, runningDir, fnSwatExe)
+        swatRun["endTime"] = datetime.datetime.now()
+
+    swatRun["waitThread"] = threading.Thread(target=superviseSWATProc)
+    swatRun["waitThread"].start()
+
+    return swatRun
+
+
+##########################################################################
+def waitSWATRunInDir(swatRun):
+    """
+    This function waits until the swat run started by
+    startSWATRunInDir is finished and returns its record.
+    """
+    swatRun["waitThread"].join()
+
+    return swatRun["runInfo"]
+
+
+##########################################################################
+def calOverlapTime(workStartTime, workEndTime, swatRun):
+    """
+    This function calculates how long the work between workStartTime
+    and workEndTime was done while swat was running.
+    """
+    overlapStart = max(workStartTime, swatRun["startTime"])
+    overlapEnd = min(workEndTime, swatRun["endTime"])
+    if overlapEnd > overlapStart:
+        return overlapEnd - overlapStart
+
+    return datetime.timedelta(0)
+
+
+##########################################################################
+def initEvalExecutor(nWorkers, evalContext):
+    """
+    This function creates the executor doing the python part of
+    the evaluations (modifying files and calculating statistics).
+    """
+    # Processes are forked so that the driver scripts are not
+    # executed again in the children. On Windows, where fork is
+    # not available, threads are used. The swat runs still run
+    # concurrently as they are subprocesses.
+    if "fork" in multiprocessing.get_all_start_methods():
+        evalExecutor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=nWorkers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=initWorkerEvalContext,
+            initargs=(evalContext,))
+    else:
+        initWorkerEvalContext(evalContext)
+        evalExecutor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=nWorkers)
+
+    return evalExecutor
+
+
+##########################################################################
+class SWATWorkerPool:
+    """
+    This class holds the worker directories and a process pool.
+    Each evaluation is sent to a free directory, and the directory
+    is released when the evaluation is finished.
+    """
+
+    def __init__(self, workerDirs, evalContext, evalFunc=None):
+        self.freeDirs = list(workerDirs)
+        self.pendingEvals = {}
+        self.executor = initEvalExecutor(len(workerDirs), evalContext)
+        # The function called with (runningDir, subParGroups, parmBsnLvl)
+        # in the workers. By default a calibration run is evaluated.
+        if evalFunc is None:
+            evalFunc = evalParmSetInDir
+        self.evalFunc = evalFunc
+
+    def hasFreeWorker(self):
+        return len(self.freeDirs) > 0
+
+    def hasPendingEval(self):
+        return len(self.pendingEvals) > 0
+
+    def submitEval(self, evalTag, subParGroups, parmBsnLvl):
+        """
+        Send one parameter set to a free worker directory.
+        """
+        if not self.hasFreeWorker():
+            print("No free worker directory for evaluation {}".format(evalTag))
+            exit(1)
+        runningDir = self.freeDirs.pop(0)
+        evalFuture = self.executor.submit(self.evalFunc,
+                            runningDir, subParGroups, parmBsnLvl)
+        self.pendingEvals[evalFuture] = (evalTag, runningDir)
+
+        return runningDir
+
+    def waitAnyEval(self):
+        """
+        Wait until at least one evaluation is finished and return
+        the finished ones as a list of (evalTag, evalResult).
+        """
+        doneEvals = []
+        if len(self.pendingEvals) == 0:
+            return doneEvals
+
+        doneFutures, _ = concurrent.futures.wait(
+                    list(self.pendingEvals.keys()),
+                    return_when=concurrent.futures.FIRST_COMPLETED)
+        for evalFuture in doneFutures:
+            evalTag, runningDir = self.pendingEvals.pop(evalFuture)
+            self.freeDirs.append(runningDir)
+            doneEvals.append((evalTag, evalFuture.result()))
+
+        return doneEvals
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+##########################################################################
+class AsyncSWATWorkerPool:
+    """
+    This class has the same interface as SWATWorkerPool, but the
+    evaluations are run as tasks of an asyncio event loop. Swat is
+    started with an asyncio subprocess in the worker directory and
+    supervised by superviseSWATRunAsync, while modifying files and
+    calculating statistics are done in the executor. As soon as one
+    evaluation is finished, waitAnyEval returns and the directory can
+    get a new candidate.
+    """
+
+    def __init__(self, workerDirs, evalContext):
+        self.freeDirs = list(workerDirs)
+        self.pendingEvals = {}
+        self.executor = initEvalExecutor(len(workerDirs), evalContext)
+        self.eventLoop = asyncio.new_event_loop()
+
+    async def evalInDir(self, runningDir, subParGroups, parmBsnLvl):
+        evalStartTime = datetime.datetime.now()
+        fileTypeTimes = await self.eventLoop.run_in_executor(self.executor,
+                    modifyParmSetInDir, runningDir, subParGroups, parmBsnLvl)
+        modifyEndTime = datetime.datetime.now()
+
+        swatRunInfo = None
+        if iRunSWAT:
+            # The screen output of swat is not shown, since several
+            # runs would print to the screen at the same time.
+            swatRunInfo = await superviseSWATRunAsync(runningDir, fnSwatExe)
+        runEndTime = datetime.datetime.now()
+
+        objFuncValues = await self.eventLoop.run_in_executor(self.executor,
+                    calObjFuncInDir, runningDir, swatRunInfo)
+        calStatTime = datetime.datetime.now()
+
+        evalResult = buildEvalResult(runningDir, swatRunInfo, evalStartTime,
+                    modifyEndTime, runEndTime, calStatTime, objFuncValues)
+        evalResult["fileTypeTimes"] = fileTypeTimes
+
+        return evalResult
+
+    def hasFreeWorker(self):
+        return len(self.freeDirs) > 0
+
+    def hasPendingEval(self):
+        return len(self.pendingEvals) > 0
+
+    def submitEval(self, evalTag, subParGroups, parmBsnLvl):
+        """
+        Send one parameter set to a free worker directory.
+        """
+        if not self.hasFreeWorker():
+            print("No free worker directory for evaluation {}".format(evalTag))
+            exit(1)
+        runningDir = self.freeDirs.pop(0)
+        evalTask = self.eventLoop.create_task(self.evalInDir(
+                            runningDir, subParGroups, parmBsnLvl))
+        self.pendingEvals[evalTask] = (evalTag, runningDir)
+
+        return runningDir
+
+    def waitAnyEval(self):
+        """
+        Run the event loop until at least one evaluation is finished
+        and return the finished ones as a list of (evalTag, evalResult),
+        in the order they were finished.
+        """
+        doneEvals = []
+        if len(self.pendingEvals) == 0:
+            return doneEvals
+
+        doneTasks, _ = self.eventLoop.run_until_complete(asyncio.wait(
+                    list(self.pendingEvals.keys()),
+                    return_when=asyncio.FIRST_COMPLETED))
+        for evalTask in doneTasks:
+            evalTag, runningDir = self.pendingEvals.pop(evalTask)
+            self.freeDirs.append(runningDir)
+            doneEvals.append((evalTag, evalTask.result()))
+
+        return doneEvals
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+        self.eventLoop.close()
+
+
+##########################################################################
+def initWorkerPool(workerDirs, evalContext, ddsParallelMode):
+    """
+    This function creates the worker pool for the parallel mode
+    selected by the user.
+    """
+    if ddsParallelMode == "async":
+        workerPool = AsyncSWATWorkerPool(workerDirs, evalContext)
+    elif ddsParallelMode == "batch":
+        workerPool = SWATWorkerPool(workerDirs, evalContext)
+    else:
+        print("ddsParallelMode should be batch or async, not {}".format(
+            ddsParallelMode))
+        exit(1)
+
+    return workerPool
+
+
+##########################################################################
+def runEvalsInPool(workerPool, evalCandidates):
+    """
+    This function evaluates a list of (evalTag, subParGroups, parmBsnLvl)
+    candidates in the pool. The results are returned in the order
+    of the candidates.
+    """
+    evalResults = {}
+    candIdx = 0
+    while len(evalResults) < len(evalCandidates):
+        while (workerPool.hasFreeWorker()
+                and candIdx < len(evalCandidates)):
+            evalTag, candSubParGroups, candParmBsnLvl = evalCandidates[candIdx]
+            workerPool.submitEval(evalTag, candSubParGroups, candParmBsnLvl)
+            candIdx = candIdx + 1
+        for evalTag, evalResult in workerPool.waitAnyEval():
+            evalResults[evalTag] = evalResult
+
+    return [evalResults[cand[0]] for cand in evalCandidates]
+
+
+##########################################################################
+def setCandidateTestVal(subParGroups, parmBsnLvl,
+                    candSubParGroups, candParmBsnLvl):
+    """
+    This function copies the tested values of a candidate back to
+    the parameter sets used by updateBestParm.
+    """
+    for subGPKey in subParGroups.keys():
+        subParGroups[subGPKey]["TestVal"] = candSubParGroups[subGPKey]["TestVal"]
+        subParGroups[subGPKey]["ModThisRun"] = candSubParGroups[subGPKey]["ModThisRun"]
+
+    parmBsnLvl["TestVal"] = candParmBsnLvl["TestVal"]
+    parmBsnLvl["ModThisRun"] = candParmBsnLvl["ModThisRun"]
+
+    return subParGroups, parmBsnLvl
+
+
+##########################################################################
+def calDDSProbVal(runIdx, totalRuns):
+    """
+    This function calculates the probability of perturbing each
+    parameter for the runIdx-th evaluation in DDS.
+    """
+    return 1.0-(numpy.log(runIdx)/numpy.log(totalRuns))
+
+
+##########################################################################
+def generateDDSCandidates(subParGroups, parmBsnLvl,
+                    batchRunIdxs, totalRuns, perturbFactor):
+    """
+    This function generates one DDS candidate for each run in
+    batchRunIdxs. All candidates are perturbed from the current
+    BestVal, with the probVal of their own run number.
+    """
+    evalCandidates = []
+    for runIdx in batchRunIdxs:
+        probVal = calDDSProbVal(runIdx, totalRuns)
+        candSubParGroups = copy.deepcopy(subParGroups)
+        candParmBsnLvl = parmBsnLvl.copy()
+        for subGPKey, subGPL in candSubParGroups.items():
+            if len(subGPL.index) > 0:
+                candSubParGroups[subGPKey] = generateDDSParVal(subGPL,
+                                            probVal,
+                                            perturbFactor)
+        if len(candParmBsnLvl.index) > 0:
+            candParmBsnLvl = generateDDSParVal(candParmBsnLvl,
+                                            probVal,
+                                            perturbFactor)
+        evalCandidates.append((runIdx, candSubParGroups, candParmBsnLvl))
+
+    return evalCandidates
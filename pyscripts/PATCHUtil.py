@@ -0,0 +1,529 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+This class is designed to be a collection of functions dealing with
+the parameter patch plans. The lines changed for each parameter are
+listed once in swatLinePatches. Before the files of one type are
+updated, the selected parameters are compiled into a plan with the
+values already taken out of the DataFrame, so the update functions
+only write the lines in the plan.
+When the lines in the working file already have the layout of the
+plan, only the value fields are overwritten in place. Otherwise the
+whole file is rewritten.
+The new values of the lines changed by fraction can also be calculated
+for a whole group from the store in FRACBASEUtil, then they are taken
+from the plan with resolveFracPatches.
+
+@author: Qingyu.Feng
+"""
+
+##########################################################################
+# Import modules #########################################################
+##########################################################################
+import os
+import math
+
+from .globVars import iPatchInPlace
+
+##########################################################################
+# Define functions #######################################################
+##########################################################################
+# The lines updated for each parameter:
+# {file type: {Symbol: (line index, line format, change type, condition)}}
+# ABS lines are written with the test value. FRAC lines are written with
+# the value in the original file times (1 + test value). A line with a
+# condition is only written for the hrus meeting the condition.
+swatLinePatches = {
+    ".bsn": {
+        "SFTMP": (3, "{:16.3f}    | SFTMP : Snowfall temperature\n",
+            "ABS", None),
+        "SMTMP": (4, "{:16.3f}    | SMTMP : Snow melt base temperature\n",
+            "ABS", None),
+        "SMFMX": (5, "{:16.3f}    | SMFMX : Melt factor for snow on June 21 [mm H2O/oC-day]\n",
+            "ABS", None),
+        "SMFMN": (6, "{:16.3f}    | SMFMN : Melt factor for snow on December 21 [mm H2O/oC-day]\n",
+            "ABS", None),
+        "TIMP": (7, "{:16.3f}    | TIMP : Snow pack temperature lag factor\n",
+            "ABS", None),
+        "SNOCOVMX": (8, "{:16.3f}    | SNOCOVMX : Minimum snow water content that corresponds to 100% snow cover [mm]\n",
+            "ABS", None),
+        "SNO50COV": (9, "{:16.3f}    | SNO50COV : Fraction of snow volume represented by SNOCOVMX that corresponds to 50% snow cover\n",
+            "ABS", None),
+        "EPCO": (13, "{:16.3f}    | EPCO : plant water uptake compensation factor\n",
+            "ABS", None),
+        "EVLAI": (14, "{:16.3f}    | EVLAI : Leaf area index at which no evaporation occurs from water surface [m2/m2]\n",
+            "ABS", None),
+        "SURLAG": (19, "{:16.3f}    | SURLAG : Surface runoff lag time [days]\n",
+            "ABS", None),
+        "ADJ_PKR": (20, "{:16.3f}    | ADJ_PKR : Peak rate adjustment factor for sediment routing in the subbasin (tributary channels)\n",
+            "ABS", None),
+        "PRF": (21, "{:16.3f}    | PRF_BSN : Peak rate adjustment factor for sediment routing in the main channel\n",
+            "ABS", None),
+        "SPCON": (22, "{:16.3f}    | SPCON : Linear parameter for calculating the maximum amount of sediment that can be reentrained during channel sediment routing\n",
+            "ABS", None),
+        "SPEXP": (23, "{:16.3f}    | SPEXP : Exponent parameter for calculating sediment reentrained in channel sediment routing\n",
+            "ABS", None),
+        "RCN": (25, "{:16.3f}    | RCN : nitrogen in rainfall (ppm)\n",
+            "ABS", None),
+        "CMN": (26, "{:16.3f}    | CMN : Rate factor for humus mineralization of active organic nitrogen\n",
+            "ABS", None),
+        "N_UPDIS": (27, "{:16.3f}    | N_UPDIS : Nitrogen uptake distribution parameter\n",
+            "ABS", None),
+        "NPERCO": (29, "{:16.3f}    | NPERCO : Nitrogen percolation coefficient\n",
+            "ABS", None),
+        "PPERCO": (30, "{:16.3f}    | PPERCO : Phosphorus percolation coefficient\n",
+            "ABS", None),
+        "PHOSKD": (31, "{:16.3f}    | PHOSKD : Phosphorus soil partitioning coefficient\n",
+            "ABS", None),
+        "PSP": (32, "{:16.3f}    | PSP : Phosphorus sorption coefficient\n",
+            "ABS", None),
+        "RSDCO": (33, "{:16.3f}    | RSDCO : Residue decomposition coefficient\n",
+            "ABS", None),
+        "PERCOP": (35, "{:16.3f}    | PERCOP : Pesticide percolation coefficient\n",
+            "ABS", None),
+        "MSK_CO1": (58, "{:16.3f}    | MSK_CO1 : Calibration coefficient used to control impact of the storage time constant (Km) for normal flow \n",
+            "ABS", None),
+        "MSK_CO2": (59, "{:16.3f}    | MSK_CO2 : Calibration coefficient used to control impact of the storage time constant (Km) for low flow \n",
+            "ABS", None),
+        "MSK_X": (60, "{:16.3f}    | MSK_X : Weighting factor controlling relative importance of inflow rate and outflow rate in determining water storage in reach segment\n",
+            "ABS", None),
+        "EVRCH": (65, "{:16.3f}    | EVRCH : Reach evaporation adjustment factor\n",
+            "ABS", None),
+        "ICN": (67, "{:16.3f}    | ICN  : Daily curve number calculation method\n",
+            "ABS", None),
+        "CNCOEF": (68, "{:16.3f}    | CNCOEF : Plant ET curve number coefficient\n",
+            "ABS", None),
+        "CDN": (69, "{:16.3f}    | CDN : Denitrification exponential rate coefficient\n",
+            "ABS", None),
+        "SDNCO": (70, "{:16.3f}    | SDNCO : Denitrification threshold water content\n",
+            "ABS", None),
+        "DEPIMP_BSN": (80, "{:16.3f}    | DEPIMP_BSN : Depth to impervious layer for modeling perched water tables [mm]\n",
+            "ABS", None),
+        "FIXCO": (87, "{:16.3f}    | FIXCO : Nitrogen fixation coefficient\n",
+            "ABS", None),
+        "NFIXMX": (88, "{:16.3f}    | NFIXMX : Maximum daily-n fixation [kg/ha]\n",
+            "ABS", None),
+        "ANION_EXCL_BSN": (89, "{:16.3f}    | ANION_EXCL_BSN : Fraction of porosity from which anions are excluded\n",
+            "ABS", None),
+    },
+    ".wwq": {
+        "AI0": (3, "{:16.3f}    | AI0 : Ratio of chlorophyll-a to algal biomass [chla/mg algae]\n",
+            "ABS", None),
+        "AI1": (4, "{:16.3f}    | AI1 : Fraction of algal biomass that is nitrogen [mg N/mg alg]\n",
+            "ABS", None),
+        "AI2": (5, "{:16.3f}    | AI2 : Fraction of algal biomass that is phosphorus [mg P/mg alg]\n",
+            "ABS", None),
+        "MUMAX": (10, "{:16.3f}    | MUMAX : Maximum specific algal growth rate at 20oC [day-1]\n",
+            "ABS", None),
+        "RHOQ": (11, "{:16.3f}    | RHOQ : Algal respiration rate at 20oC [day-1]\n",
+            "ABS", None),
+        "K_N": (14, "{:16.3f}    | K_N : Michaelis-Menton half-saturation constant for nitrogen [mg N/lL]\n",
+            "ABS", None),
+        "P_N": (19, "{:16.3f}    | P_N : Algal preference factor for ammonia\n",
+            "ABS", None),
+    },
+    ".sub": {
+        "CH_SI": (25, "{:16.3f}    | CH_SI : Average slope of tributary channel [m/m]\n",
+            "ABS", None),
+        "CH_KI": (27, "{:16.3f}    | CH_KI : Effective hydraulic conductivity in tributary channel [mm/hr]\n",
+            "ABS", None),
+        "CH_NI": (28, "{:16.3f}    | CH_NI : Manning\"s \"n\" value for the tributary channels\n",
+            "ABS", None),
+    },
+    ".rte": {
+        "CH_SII": (3, "{:14.3f}    | CH_SII : Main channel slope [m/m]\n",
+            "FRAC", None),
+        "CH_NII": (5, "{:14.3f}    | CH_NII : Manning\"s nvalue for main channel\n",
+            "ABS", None),
+        "CH_KII": (6, "{:14.3f}    | CH_KII : Effective hydraulic conductivity [mm/hr]\n",
+            "ABS", None),
+        "CH_COV1": (7, "{:14.3f}    | CH_COV1 : Channel erodibility factor\n",
+            "ABS", None),
+        "CH_COV2": (8, "{:14.3f}    | CH_COV2 : Channel cover factor\n",
+            "ABS", None),
+    },
+    ".swq": {
+        "RS1": (2, "{:16.3f}    | RS1 : Local algal settling rate in the reach at 20 [m/day]\n",
+            "ABS", None),
+        "RS2": (3, "{:16.3f}    | RS2 : Benthic (sediment) source rate for dissolved phosphorus in the reach at 20 [m/day]\n",
+            "ABS", None),
+        "RS3": (4, "{:16.3f}    | RS3 : Benthic source rate for NH4-N in the reach at 20 [mg NH4-N/[m2ay]]\n",
+            "ABS", None),
+        "RS4": (5, "{:16.3f}    | RS4 : Rate coefficient for organic N settling in the reach at 20 [day-1]\n",
+            "ABS", None),
+        "RS5": (6, "{:16.3f}    | RS5 : Organic phosphorus settling rate in the reach at 20 [day-1]\n",
+            "ABS", None),
+        "BC1": (15, "{:16.3f}    | BC1 : Rate constant for biological oxidation of NH4 to NO2 in the reach at 20C [day-1]\n",
+            "ABS", None),
+        "BC2": (16, "{:16.3f}    | BC2 : Rate constant for biological oxidation of NO2 to NO3 in the reach at 20C [day-1]\n",
+            "ABS", None),
+        "BC3": (17, "{:16.3f}    | BC3 : Rate constant for hydrolysis of organic N to NH4 in the reach at 20C [day-1]\n",
+            "ABS", None),
+        "BC4": (18, "{:16.3f}    | BC4 : Channel cover factor\n",
+            "ABS", None),
+    },
+    ".res": {
+        "RES_ESA": (4, "{:16.3f}    | RES_ESA : Reservoir surface area when the reservoir is filled to the  emergency spillway [ha]\n",
+            "FRAC", None),
+        "RES_EVOL": (5, "{:16.3f}    | RES_EVOL : Volume of water needed to fill the reservoir to the emergency spillway (104 m3)\n",
+            "FRAC", None),
+        "RES_PSA": (6, "{:16.3f}    | RES_PSA : Reservoir surface area when the reservoir is filled to the principal spillway [ha]\n",
+            "FRAC", None),
+        "RES_PVOL": (7, "{:16.3f}    | RES_PVOL : Volume of water needed to fill the reservoir to the principal spillway [104 m3]\n",
+            "FRAC", None),
+        "RES_VOL": (8, "{:16.3f}    | RES_VOL : Initial reservoir volume [104 m3]\n",
+            "FRAC", None),
+        "RES_SED": (9, "{:16.3f}    | RES_SED : Initial sediment concentration in the reservoir [mg/l]\n",
+            "FRAC", None),
+        "RES_NSED": (10, "{:16.3f}    | RES_NSED : Normal sediment concentration in the reservoir [mg/l]\n",
+            "FRAC", None),
+        "RES_RR": (22, "{:16.3f}    | RES_RR : Average daily principal spillway release rate [m3/s]\n",
+            "FRAC", None),
+        "NDTARGR": (26, "{:16.2f}    | NDTARGR : Number of days to reach target storage from current reservoir storage\n",
+            "FRAC", None),
+    },
+    ".hru": {
+        "SLSUBBSN": (2, "{:16.3f}    | SLSUBBSN : Average slope length [m]\n",
+            "ABS", None),
+        "SLOPE": (3, "{:16.3f}    | SLOPE : Main channel slope [m/m]\n",
+            "FRAC", None),
+        "OV_N": (4, "{:16.3f}    | OV_N : Manning\"s \"n\" value for overland flow\n",
+            "ABS", None),
+        "CANMX": (8, "{:16.3f}    | CANMX : Maximum canopy storage [mm]\n",
+            "ABS", None),
+        "ESCO": (9, "{:16.3f}    | ESCO : Soil evaporation compensation factor\n",
+            "ABS", None),
+        "RSDIN": (11, "{:16.3f}    | RSDIN : Initial residue cover [kg/ha]\n",
+            "ABS", None),
+        "DEP_IMP": (23, "{:16.3f}    | DEP_IMP : Depth to impervious layer in soil profile [mm]\n",
+            "ABS", None),
+    },
+    ".gw": {
+        "GW_DELAY": (3, "{:16.3f}    | GW_DELAY : Groundwater delay [days]\n",
+            "ABS", None),
+        "ALPHA_BF": (4, "{:16.3f}    | ALPHA_BF : BAseflow alpha factor [days]\n",
+            "ABS", None),
+        "GWQMN": (5, "{:16.3f}    | GWQMN : Threshold depth of water in the shallow aquifer required for return flow to occur [mm]\n",
+            "ABS", None),
+        "GW_REVAP": (6, "{:16.3f}    | GW_REVAP : Groundwater \"revap\" coefficient\n",
+            "ABS", None),
+        "REVEP_MN": (7, "{:16.3f}    | REVEP_MN : Threshold depth of water in the shallow aquifer for \"revap\" to occur [mm]\n",
+            "ABS", None),
+        "RCHRG_DP": (8, "{:16.3f}    | RCHRG_DP : Deep aquifer percolation fraction\n",
+            "ABS", None),
+        "GWHT": (9, "{:16.3f}    | GWHT : Initial groundwater height [m]\n",
+            "ABS", None),
+        "GW_SPYLD": (10, "{:16.3f}    | GW_SPYLD : Specific yield of the shallow aquifer [m3/m3]\n",
+            "FRAC", None),
+        "SHALLST_N": (11, "{:16.3f}    | SHALLST_N : Initial concentration of nitrate in shallow aquifer [mg N/l]\n",
+            "ABS", None),
+        "HLIFE_NGW": (13, "{:16.3f}    | HLIFE_NGW : Half-life of nitrate in the shallow aquifer [day]\n",
+            "ABS", None),
+    },
+    ".mgt": {
+        "BIOMIX": (9, "{:16.3f}    | BIOMIX: Biological mixing efficiency\n",
+            "ABS", None),
+        "CN_F": (10, "{:16.3f}    | CN2: Initial SCS CN II value\n",
+            "FRAC", None),
+        "USLE_P": (11, "{:16.3f}    | USLE_P: USLE support practice factor\n",
+            "ABS", "isRowCrops"),
+        "BIOMIN": (12, "{:16.3f}    | BIOMIN: Minimum biomass for grazing (kg/ha)\n",
+            "ABS", None),
+        "FILTERW": (13, "{:16.3f}    | FILTERW: width of edge of field filter strip (m)\n",
+            "ABS", None),
+        "DDRAIN": (24, "{:16.3f}    | DDRAIN: depth to subsurface tile drain (mm)\n",
+            "ABS", "isSoilHSGBCD"),
+        "TDRAIN": (25, "{:16.3f}    | TDRAIN: time to drain soil to field capacity (hr)\n",
+            "ABS", "isSoilHSGBCD"),
+        "GDRAIN": (26, "{:16.3f}    | GDRAIN: drain tile lag time (hr)\n",
+            "ABS", "isSoilHSGBCD"),
+    },
+}
+
+# {file path: ((inode, size), byte offsets of the lines)}
+lineOffsetCache = {}
+
+# The soil layer lines in the sol file, all changed by fraction:
+# {Symbol: (line index, format of each layer)}
+solLayerPatches = {
+    "SOL_Z": (7, "{:12.3f}"),
+    "SOL_AWC": (9, "{:12.1f}"),
+    "SOL_K": (10, "{:12.1f}"),
+    "SOL_ALB": (16, "{:12.3f}"),
+    "USLE_K": (17, "{:12.3f}"),
+}
+
+
+##########################################################################
+def getParmValues(selParInFile):
+    """
+    This function takes the test values of the selected parameters
+    out of the DataFrame: {Symbol: TestVal}
+    """
+    parmValues = {}
+    for parSymbol, selectFlag, testVal in zip(selParInFile["Symbol"],
+                                            selParInFile["selectFlag"],
+                                            selParInFile["TestVal"]):
+        if int(selectFlag) == 1:
+            parmValues[parSymbol] = float(testVal)
+
+    return parmValues
+
+
+##########################################################################
+def getSMFMXValue(selParInFile):
+    """
+    This function returns the value of SMFMX in the DataFrame, its
+    TestVal, or InitVal when there is no TestVal. None is returned
+    when SMFMX is not in the DataFrame.
+    """
+    smfMxRows = selParInFile.loc[selParInFile["Symbol"] == "SMFMX"]
+    if len(smfMxRows.index) == 0:
+        return None
+
+    smfMxVal = float(smfMxRows["TestVal"].iloc[0])
+    if math.isnan(smfMxVal) and ("InitVal" in smfMxRows.columns):
+        smfMxVal = float(smfMxRows["InitVal"].iloc[0])
+
+    return smfMxVal
+
+
+##########################################################################
+def compilePatchPlan(selParInFile, flExt):
+    """
+    This function compiles the parameters selected for one file type
+    into the plan used by the update functions in SWATUtil. The plan
+    only has numbers and strings, so it is cheap to send to the workers.
+    """
+    parmValues = getParmValues(selParInFile)
+
+    # The melt factor in December can not be larger than the one in June.
+    # As in updateParInBsn before, the value of SMFMX in the DataFrame
+    # is used even when SMFMX is not selected.
+    if (flExt == ".bsn") and ("SMFMN" in parmValues):
+        smfMxVal = getSMFMXValue(selParInFile)
+        if (smfMxVal is not None) and (parmValues["SMFMN"] > smfMxVal):
+            parmValues["SMFMN"] = smfMxVal
+
+    linePatches = []
+    filePatches = swatLinePatches.get(flExt, {})
+    for parSymbol in parmValues.keys():
+        if parSymbol not in filePatches:
+            continue
+        lidx, lineFmt, changeType, patchCond = filePatches[parSymbol]
+        if changeType == "FRAC":
+            parmVal = 1 + parmValues[parSymbol]
+        else:
+            parmVal = parmValues[parSymbol]
+        linePatches.append((lidx, lineFmt, changeType, parmVal, patchCond))
+    linePatches.sort(key=lambda linePatch: linePatch[0])
+
+    layerPatches = []
+    if flExt == ".sol":
+        for parSymbol in parmValues.keys():
+            if parSymbol not in solLayerPatches:
+                continue
+            lidx, layerFmt = solLayerPatches[parSymbol]
+            layerPatches.append((lidx, layerFmt, 1 + parmValues[parSymbol]))
+        layerPatches.sort(key=lambda layerPatch: layerPatch[0])
+
+    patchPlan = {
+        "flExt": flExt,
+        "values": parmValues,
+        "linePatches": linePatches,
+        "layerPatches": layerPatches,
+        # The original file is only read when needed
+        "hasFrac": (len(layerPatches) > 0) or any(
+            [linePatch[2] == "FRAC" for linePatch in linePatches]),
+        "conditions": set([linePatch[4] for linePatch in linePatches
+                            if linePatch[4] is not None])
+    }
+
+    return patchPlan
+
+
+##########################################################################
+def applyLinePatches(lif, lifOrig, linePatches, patchConds=None):
+    """
+    This function writes the lines in the plan into lif. lifOrig
+    is the original file, which is only used by the FRAC lines.
+    patchConds tells which conditions are met by this file.
+    """
+    for lidx, lineFmt, changeType, parmVal, patchCond in linePatches:
+        if lidx >= len(lif):
+            continue
+        if (patchCond is not None) and (not patchConds[patchCond]):
+            continue
+        lif[lidx] = formatPatchLine(lifOrig, lidx, lineFmt, changeType, parmVal)
+
+    return lif
+
+
+##########################################################################
+def formatPatchLine(lifOrig, lidx, lineFmt, changeType, parmVal):
+    """
+    This function makes the new line of one entry in the plan.
+    """
+    if changeType == "FRAC":
+        origVal = float(lifOrig[lidx].split("|")[0])
+        return lineFmt.format(origVal * parmVal)
+
+    return lineFmt.format(parmVal)
+
+
+##########################################################################
+def getLineOffsets(fnp, nLines):
+    """
+    This function returns the byte offset of the start of each line
+    in the first nLines lines of the file, and the end of the last one.
+    The offsets are kept for the next runs, since the field patching
+    does not change the length of any line. The file is read again
+    when its inode or size changed.
+    """
+    fileStat = os.stat(fnp)
+    fileKey = (fileStat.st_ino, fileStat.st_size)
+    if fnp in lineOffsetCache:
+        cacheKey, lineOffsets = lineOffsetCache[fnp]
+        if (cacheKey == fileKey) and (len(lineOffsets) > nLines):
+            return lineOffsets
+
+    lineOffsets = [0]
+    with open(fnp, 'rb') as swatFile:
+        for lineBytes in swatFile:
+            lineOffsets.append(lineOffsets[-1] + len(lineBytes))
+            if len(lineOffsets) > nLines:
+                break
+    lineOffsetCache[fnp] = (fileKey, lineOffsets)
+
+    return lineOffsets
+
+
+##########################################################################
+def dropLineOffsets(fnp):
+    """
+    This function forgets the line offsets of a file which was
+    rewritten.
+    """
+    lineOffsetCache.pop(fnp, None)
+
+
+##########################################################################
+def patchLinesInPlace(fnp, lifOrig, linePatches, patchConds=None, encoding=None):
+    """
+    This function overwrites the value fields of the lines in the plan
+    without reading or writing the rest of the file. Each line must
+    already have the same length and the same text after the value
+    as the new line, e.g., "    | SLOPE : ...", which is true after the
+    file was written once by DMPOT.
+    Output:
+    True when fields were written, False when nothing changed, None when
+    the layout does not allow it and the file needs to be rewritten.
+    Nothing is written when None is returned.
+    """
+    if (not iPatchInPlace) or (not hasattr(os, "pwrite")):
+        return None
+    if encoding is None:
+        encoding = "utf-8"
+
+    try:
+        lineOffsets = getLineOffsets(fnp, linePatches[-1][0] + 1)
+    except (OSError, IndexError):
+        return None
+
+    fieldWrites = []
+    with open(fnp, 'r+b') as swatFile:
+        swatFd = swatFile.fileno()
+        for lidx, lineFmt, changeType, parmVal, patchCond in linePatches:
+            # The file does not have this line
+            if lidx + 1 >= len(lineOffsets):
+                continue
+            if (patchCond is not None) and (not patchConds[patchCond]):
+                continue
+
+            newBytes = formatPatchLine(lifOrig, lidx, lineFmt,
+                                changeType, parmVal).encode(encoding)
+            suffixBytes = lineFmt[lineFmt.index("}") + 1:].encode(encoding)
+            lineLen = lineOffsets[lidx + 1] - lineOffsets[lidx]
+            if lineLen != len(newBytes):
+                return None
+            oldBytes = os.pread(swatFd, lineLen, lineOffsets[lidx])
+            if not oldBytes.endswith(suffixBytes):
+                return None
+
+            fieldLen = lineLen - len(suffixBytes)
+            if oldBytes[:fieldLen] != newBytes[:fieldLen]:
+                fieldWrites.append((lineOffsets[lidx], newBytes[:fieldLen]))
+
+        for fieldOffset, fieldBytes in fieldWrites:
+            os.pwrite(swatFd, fieldBytes, fieldOffset)
+
+    return len(fieldWrites) > 0
+
+
+##########################################################################
+def calLayerValues(lifOrig, layerPatches):
+    """
+    This function multiplies each layer value of the original file
+    for the soil layer lines in the plan:
+    [(line index, format of each layer, new layer values)]
+    """
+    layerValues = []
+    for lidx, layerFmt, mutiPlier in layerPatches:
+        if lidx >= len(lifOrig):
+            continue
+        solValues = [solVal for solVal in lifOrig[lidx].split(":")[1][:-1].split(" ")
+                        if solVal != ""]
+        layerValues.append((lidx, layerFmt,
+                    [float(origV) * mutiPlier for origV in solValues]))
+
+    return layerValues
+
+
+##########################################################################
+def applyLayerValues(lif, layerValues):
+    """
+    This function writes the new layer values into the soil layer
+    lines of lif. The text before ":" is kept.
+    """
+    for lidx, layerFmt, newValues in layerValues:
+        if lidx >= len(lif):
+            continue
+        preText = lif[lidx].split(":")[0]
+        newValLst = "".join([layerFmt.format(newV) for newV in newValues])
+        lif[lidx] = "{}:{}\n".format(preText, newValLst)
+
+    return lif
+
+
+##########################################################################
+def resolveFracPatches(patchPlan, fnSwat):
+    """
+    This function returns the line patches and layer values of one
+    file when the new values of the lines changed by fraction were
+    calculated for the group by addFracValues. These lines become ABS
+    lines with the new value, so the original file is not needed.
+    A line whose original value was not found is not changed.
+    Output:
+    linePatches, layerValues (as calLayerValues)
+    """
+    fileRow = patchPlan["fracRows"][fnSwat]
+
+    linePatches = []
+    for lidx, lineFmt, changeType, parmVal, patchCond in patchPlan["linePatches"]:
+        if changeType == "FRAC":
+            parmVal = float(patchPlan["fracLines"][lidx][fileRow])
+            if math.isnan(parmVal):
+                continue
+            changeType = "ABS"
+        linePatches.append((lidx, lineFmt, changeType, parmVal, patchCond))
+
+    layerValues = []
+    for lidx, layerFmt, mutiPlier in patchPlan["layerPatches"]:
+        nLayers = int(patchPlan["fracLayerCounts"][lidx][fileRow])
+        if nLayers < 1:
+            continue
+        layerValues.append((lidx, layerFmt,
+                    patchPlan["fracLayers"][lidx][fileRow, :nLayers].tolist()))
+
+    return linePatches, layerValues
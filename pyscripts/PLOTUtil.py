@@ -10,12 +10,14 @@ This module contain functions to generate figures
 ##########################################################################
 # Import modules #########################################################
 ##########################################################################
-import pandas, numpy
+import numpy
 import os
 
 import matplotlib.pyplot as plt
 from matplotlib.backends.backend_pdf import PdfPages
 
+from .RCHUtil import getRchOutput
+
 ##########################################################################
 # Define classes #########################################################
 ##########################################################################
@@ -144,50 +146,11 @@ def genFigSingleOlt(fnpPlotPng, subGPKey, obsSimPair,nCalVal, groupSubareaIdx):
     
 ##########################################################################
 def getRch2DFPlot(fnRch, iPrintForCio, totalRchNum):
-    # Read output.rch into pandas dataframe
-    # Original header
-    # hedr = ["RCH","GIS", "MON","AREAkm2",
-    #         "FLOW_OUTcms", " SED_OUTtons", "ORGN_OUTkg",
-    #         "ORGP_OUTkg", "NO3_OUTkg", "NH4_OUTkg",
-    #         "NO2_OUTkg", "MINP_OUTkg", "SOLPST_OUTmg",
-    #         "SORPST_OUTmg"]
-
-    # Corresponding heads used in the observed data
-    # facilitating the extraction of output variables.
-    hedr = ["RCH","GIS", "MON","AREAkm2",
-            "sf(m3/s)", " sed(t/ha)", "orgn(kg/ha)",
-            "orgp(kg/ha)", "no3n(kg/ha)", "nh4n(kg/ha)",
-            "no2n(kg/ha)", "minp(kg/ha)", "solpst(mg/ha)",
-            "sorpst(mg/ha)"]
-
-    # ffRchDataLnRdr = ff.FortranRecordReader('(A5,1X,I5,1X,I8,1X,I3,I3,I5,3X,11E12.4)')
-    # fidRch = open(fnRch, "r")
-    # lifRch = fidRch.readlines()
-    # fidRch.close()
-    # del(lifRch[:9])
-
-    # Version 1: normal serial for loop
-    # for idx in range(len(lifRch)):
-    #     # print(lifRch[idx])
-    #     lifRch[idx] = ffRchDataLnRdr.read(lifRch[idx])[1:]
-
-    # Version 2: use pandas read_fwf
-    # rchDF = pandas.read_fwf(fnRch, colspecs='infer', skiprows=8)
-    
-
-    # Based on the value of iPrintForCio, the format are different
-    # When iPrintForCio == 0, for month and iPrintForCio == 2 for annual,
-    # The output.rch will include lines for annual sum and year average for
-    # each rch.
-    # When iPrintForCio == 1 for daily, these does not exist
-    colWidth = [5, 6, 9, 6] + [12] * 11
-    if (iPrintForCio == 0) or (iPrintForCio == 2):
-        rchDF = pandas.read_fwf(fnRch, widths=colWidth, skiprows=9, names=hedr, skipfooter=totalRchNum)
-        rchDF = rchDF.loc[rchDF["MON"] < 13]
-    else:
-        rchDF = pandas.read_fwf(fnRch, widths=colWidth, skiprows=9, names=hedr)
-   
-    return rchDF
+    """
+    This function reads the reach output of all outlets and variables
+    into a dataframe, from outputb.rch when IA_B is 1 in file.cio.
+    """
+    return getRchOutput(fnRch, iPrintForCio, totalRchNum)
 
 
 
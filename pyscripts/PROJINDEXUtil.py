@@ -0,0 +1,339 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+This class is designed to be a collection of functions dealing with
+the index of the project: the hru files of each subbasin, and the land
+use, hydrologic soil group and number of soil layers of each hru.
+The reservoirs are taken from the routres commands in fig.fig, with
+the subbasin they belong to and the values in their .res file used
+for the target storage (IRESCO, flood season and STARG).
+The index is built from the TxtInOut folder once and saved in
+fnProjIndex. It is used again while the files it was built from do
+not change, so the calibration, sensitivity analysis and applying the
+best parameter set do not read the .sub, .hru and .sol files for it.
+
+@author: Qingyu.Feng
+"""
+
+##########################################################################
+# Import modules #########################################################
+##########################################################################
+import os
+import json
+import hashlib
+import datetime
+import threading
+
+from .globVars import fnProjIndex
+
+##########################################################################
+# Define functions #######################################################
+##########################################################################
+# The index is built from the files with these endings and fig.fig
+projIndexFlExtLst = (".sub", ".hru", ".sol", ".res")
+fnSwatFig = "fig.fig"
+# Change it when the content of the index changes, so that an index
+# saved by an older version is built again.
+projIndexVersion = 2
+
+# {TxtInOut folder: index} loaded in this process
+projIndexLoaded = {}
+projIndexLock = threading.Lock()
+
+
+##########################################################################
+def getFilesFingerprint(fnpLst):
+    """
+    This function makes a hash from the name, size and modification
+    time of the files. It changes when any of the files is changed.
+    """
+    fileHash = hashlib.sha1()
+    for fnp in fnpLst:
+        fileStat = os.stat(fnp)
+        fileHash.update("{}|{}|{}\n".format(os.path.basename(fnp),
+                    fileStat.st_size, fileStat.st_mtime_ns).encode("utf-8"))
+
+    return fileHash.hexdigest()
+
+
+##########################################################################
+def getIndexSourceFiles(fdTxtInOut):
+    """
+    This function lists the files in the TxtInOut folder which the
+    index is built from. The output files of swat, e.g., output.sub,
+    are not included.
+    """
+    fnpSourceLst = []
+    for fnSWAT in sorted(os.listdir(fdTxtInOut)):
+        if ((fnSWAT.endswith(projIndexFlExtLst) and fnSWAT[:-4].isdigit())
+            or (fnSWAT == fnSwatFig)):
+            fnpSourceLst.append(os.path.join(fdTxtInOut, fnSWAT))
+
+    return fnpSourceLst
+
+
+##########################################################################
+def readHeadLines(fnp, nLines, encoding=None):
+    """
+    This function reads the first nLines lines of a file.
+    """
+    lifHead = []
+    with open(fnp, 'r', encoding=encoding) as swatFile:
+        for swatLine in swatFile:
+            lifHead.append(swatLine)
+            if len(lifHead) >= nLines:
+                break
+
+    return lifHead
+
+
+##########################################################################
+def getHruLanduse(hruLine):
+    """
+    This function gets the land use from the first line of the hru
+    file, e.g., "... HRU:1 Luse:CORN Soil: ...". An empty string is
+    returned when it is not found.
+    """
+    if "Luse:" not in hruLine:
+        return ""
+
+    return hruLine.split("Luse:")[1].split(" ")[0].strip()
+
+
+##########################################################################
+def getSoilHSG(solLine):
+    """
+    This function gets the hydrologic soil group from the third line
+    of the sol file, e.g., " Soil Hydrologic Group: B".
+    """
+    if ":" not in solLine:
+        return ""
+
+    return solLine.split(":")[1].strip()
+
+
+##########################################################################
+def readFigReservoirs(fdTxtInOut):
+    """
+    This function reads the reservoirs routed in fig.fig. Each routres
+    command is followed by a line with the .res and .lwq file names:
+    routres        3    12     1    11
+              000010000.res000010000.lwq
+    Output:
+    {res file name: reservoir number}, None when there is no fig.fig
+    """
+    fnpFig = os.path.join(fdTxtInOut, fnSwatFig)
+    if not os.path.isfile(fnpFig):
+        return None
+
+    with open(fnpFig, 'r', encoding="ISO-8859-1") as figFile:
+        lifFig = figFile.readlines()
+
+    figReservoirs = {}
+    for lidx in range(len(lifFig) - 1):
+        figCmd = lifFig[lidx].split()
+        if (len(figCmd) < 4) or (figCmd[0] != "routres"):
+            continue
+        fnFigLine = lifFig[lidx + 1].strip()
+        if ".res" not in fnFigLine:
+            continue
+        figReservoirs[fnFigLine.split(".res")[0]] = int(figCmd[3])
+
+    return figReservoirs
+
+
+##########################################################################
+def getResAttrs(lifRes):
+    """
+    This function gets the values of a .res file used to change the
+    target storage: IRESCO (line 14), the beginning and ending month
+    of the flood season (lines 25 and 26) and the monthly target
+    storage STARG (lines 29 and 31).
+    """
+    resAttrs = {"iresco": 0, "fldSeasonBegin": 0, "fldSeasonEnd": 0,
+                "starg": []}
+    try:
+        resAttrs["iresco"] = int(lifRes[13].split("|")[0])
+        resAttrs["fldSeasonBegin"] = int(lifRes[24].split("|")[0])
+        resAttrs["fldSeasonEnd"] = int(lifRes[25].split("|")[0])
+        resAttrs["starg"] = list(map(float, lifRes[28].split() + lifRes[30].split()))
+    except (IndexError, ValueError):
+        pass
+
+    return resAttrs
+
+
+##########################################################################
+def buildProjIndex(fdTxtInOut, fingerprint):
+    """
+    This function reads the index from the files in fdTxtInOut.
+    The hru files of a subbasin are named after line 53 of the .sub
+    file, which is the number of hrus.
+    """
+    projIndex = {
+        "version": projIndexVersion,
+        "fingerprint": fingerprint,
+        "subs": {},
+        "hrus": {},
+        "reservoirs": {}
+    }
+
+    for fnpSwatSub in getIndexSourceFiles(fdTxtInOut):
+        if not fnpSwatSub.endswith(".sub"):
+            continue
+        fnSwatSub = os.path.basename(fnpSwatSub)[:-4]
+        lifSub = readHeadLines(fnpSwatSub, 53, encoding="ISO-8859-1")
+        try:
+            totalHruNo = int(lifSub[52].split("|")[0])
+        except (IndexError, ValueError):
+            # Not a subbasin file written by ArcSWAT
+            continue
+
+        fnSWATHruLst = ["{}{:04d}".format(fnSwatSub[:5], hruIdx)
+                            for hruIdx in range(1, totalHruNo+1)]
+        projIndex["subs"][fnSwatSub] = {
+            "hrus": fnSWATHruLst,
+            "resFiles": []
+        }
+
+        for fnSWATHru in fnSWATHruLst:
+            hruAttrs = {"landUse": "", "hsg": "", "nLayers": 0}
+            try:
+                lifHru = readHeadLines(os.path.join(fdTxtInOut,
+                            "{}.hru".format(fnSWATHru)), 1)
+                hruAttrs["landUse"] = getHruLanduse(lifHru[0])
+                lifSol = readHeadLines(os.path.join(fdTxtInOut,
+                            "{}.sol".format(fnSWATHru)), 8)
+                hruAttrs["hsg"] = getSoilHSG(lifSol[2])
+                hruAttrs["nLayers"] = len([solVal
+                    for solVal in lifSol[7].split(":")[1].split(" ")
+                    if solVal.strip() != ""])
+            except (IOError, IndexError):
+                pass
+            projIndex["hrus"][fnSWATHru] = hruAttrs
+
+    # The .res files are named after the subbasin of the reservoir.
+    # Without fig.fig, the .res files of the subbasins are used.
+    figReservoirs = readFigReservoirs(fdTxtInOut)
+    if figReservoirs is None:
+        figReservoirs = dict([(fnSwatSub, resNo + 1)
+            for resNo, fnSwatSub in enumerate(sorted(projIndex["subs"].keys()))
+            if os.path.isfile(os.path.join(fdTxtInOut, "{}.res".format(fnSwatSub)))])
+
+    for fnSwatRes in sorted(figReservoirs.keys()):
+        fnpSwatRes = os.path.join(fdTxtInOut, "{}.res".format(fnSwatRes))
+        try:
+            resAttrs = getResAttrs(readHeadLines(fnpSwatRes, 31,
+                            encoding="ISO-8859-1"))
+        except IOError as e:
+            print("File {} in {} does not exist: {}".format(fnpSwatRes,
+                    fnSwatFig, e))
+            continue
+        fnSwatSub = "{}0000".format(fnSwatRes[:5])
+        resAttrs["resNo"] = figReservoirs[fnSwatRes]
+        resAttrs["sub"] = fnSwatSub
+        projIndex["reservoirs"][fnSwatRes] = resAttrs
+        if fnSwatSub in projIndex["subs"]:
+            projIndex["subs"][fnSwatSub]["resFiles"].append(fnSwatRes)
+
+    return projIndex
+
+
+##########################################################################
+def loadProjIndex(fingerprint):
+    """
+    This function loads the index saved in fnProjIndex. None is
+    returned when it was built from other files.
+    """
+    try:
+        with open(fnProjIndex, 'r') as indexFile:
+            projIndex = json.load(indexFile)
+    except (IOError, ValueError):
+        return None
+
+    if ((projIndex.get("version") != projIndexVersion)
+        or (projIndex.get("fingerprint") != fingerprint)):
+        return None
+
+    return projIndex
+
+
+##########################################################################
+def saveProjIndex(projIndex):
+    """
+    This function saves the index in fnProjIndex. It is written with
+    a temporary name first, so a process reading it at the same time
+    does not get a part of it.
+    """
+    fnpTmp = "{}.{}.tmp".format(fnProjIndex, os.getpid())
+    try:
+        with open(fnpTmp, 'w') as indexFile:
+            json.dump(projIndex, indexFile)
+        os.replace(fnpTmp, fnProjIndex)
+    except OSError as e:
+        print("Unable to save the project index {}: {}".format(fnProjIndex, e))
+
+
+##########################################################################
+def getProjIndex(fdTxtInOut):
+    """
+    This function returns the index of the files in fdTxtInOut. It is
+    loaded once in each process, and only built again when the files
+    changed. None is returned when the folder does not exist.
+    """
+    with projIndexLock:
+        if fdTxtInOut in projIndexLoaded:
+            return projIndexLoaded[fdTxtInOut]
+
+        if not os.path.isdir(fdTxtInOut):
+            return None
+
+        indexStartTime = datetime.datetime.now()
+        fingerprint = getFilesFingerprint(getIndexSourceFiles(fdTxtInOut))
+        projIndex = loadProjIndex(fingerprint)
+        if projIndex is None:
+            projIndex = buildProjIndex(fdTxtInOut, fingerprint)
+            saveProjIndex(projIndex)
+            print(".....Built the project index of {} subbasins, {} hrus and {} reservoirs; Time: {}.....".format(
+                len(projIndex["subs"]), len(projIndex["hrus"]),
+                len(projIndex["reservoirs"]),
+                datetime.datetime.now() - indexStartTime))
+        projIndexLoaded[fdTxtInOut] = projIndex
+
+    return projIndex
+
+
+##########################################################################
+def getHruConditions(projIndex, fnSwatHruLst, rowCropLst):
+    """
+    This function tells for each hru whether it is a row crop and
+    whether its hydrologic soil group is B, C or D, which decide
+    whether USLE_P and the drain parameters are changed in the mgt
+    file. None is returned when an hru is not in the index.
+    """
+    hruConds = {}
+    for fnSwatHru in fnSwatHruLst:
+        if fnSwatHru not in projIndex["hrus"]:
+            return None
+        hruAttrs = projIndex["hrus"][fnSwatHru]
+        hruConds[fnSwatHru] = {
+            "isRowCrops": hruAttrs["landUse"] in rowCropLst,
+            "isSoilHSGBCD": hruAttrs["hsg"] in ["B", "C", "D"]
+        }
+
+    return hruConds
+
+
+##########################################################################
+def getResFnGroups(projIndex, swatSubFnGroups):
+    """
+    This function returns the .res files of the subbasins in each
+    group: {group: [res file names]}
+    """
+    swatResFnGroups = {}
+    for subGPKey, fnSwatSubLst in swatSubFnGroups.items():
+        swatResFnGroups[subGPKey] = [fnSwatRes for fnSwatSub in fnSwatSubLst
+                    for fnSwatRes in projIndex["subs"].get(fnSwatSub, {}).get("resFiles", [])]
+
+    return swatResFnGroups
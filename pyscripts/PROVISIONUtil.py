@@ -0,0 +1,446 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+This class is designed to be a collection of functions dealing with
+preparing working directories from the TxtInOut folder. The input
+files only read by swat, e.g., weather files and databases, are
+hardlinked or reflinked, which takes almost no time and no disk space.
+The other files, e.g., the files whose parameters can be modified,
+are copied.
+Each prepared directory has a manifest of the files put into it, with
+the size, modification time and hash of the source files. A directory
+is reset by restoring only the files which diverged from the source.
+
+@author: Qingyu.Feng
+"""
+
+##########################################################################
+# Import modules #########################################################
+##########################################################################
+import os
+import glob
+import json
+import hashlib
+import datetime
+from shutil import copyfile
+
+from .globVars import *
+from .EXECUtil import runFileTasks
+
+##########################################################################
+# Define functions #######################################################
+##########################################################################
+# Files written by swat. They are not provisioned, since swat creates
+# them in each directory. A linked output file would be overwritten
+# through all links. The files of the save commands in fig.fig are
+# also written by swat.
+swatOutFnLst = ["input.std", "fin.fin", "hyd.out", "watout.dat",
+                "chan.deg"]
+
+# Endings of the input files which swat only reads, e.g., weather
+# files, the databases and fig.fig. Only these files are linked, all
+# other files get their own copy (or reflink) in each directory, so
+# that a file written by swat never writes into the TxtInOut folder
+# or into the other directories.
+swatReadOnlyExts = [".pcp", ".tmp", ".slr", ".hmd", ".wnd", ".wgn",
+                    ".pnd", ".wus", ".sep", ".ops", ".lwq", ".atm",
+                    ".dat", ".fig"]
+
+# fig.fig commands writing the hydrograph of a reach into the file
+# named in the next line
+figSaveCmds = ["save", "saveconc"]
+
+# Change it when the content of the manifest changes
+dirManifestVersion = 2
+
+# ioctl request to clone a file on file systems supporting reflinks
+# (btrfs, xfs). It is the FICLONE in linux/fs.h.
+FICLONE = 0x40049409
+
+
+##########################################################################
+def getModifiableNames():
+    """
+    This function returns the endings of the file names which
+    can be modified by DMPOT. These files are always copied.
+    """
+    modifiableNames = bsnLvlFlExt + subLvlFlExtLst + hruLvlFlExtLst
+    # The crop database can also be named plant.dat, and file.cio
+    # is modified for the outputs.
+    modifiableNames = modifiableNames + ["plant.dat", "file.cio"]
+
+    return modifiableNames
+
+
+##########################################################################
+def readFigSaveFiles(srcDr):
+    """
+    This function reads the names of the files written by the save
+    commands in fig.fig. The name is in the line after the command.
+    """
+    figSaveFns = set()
+    try:
+        with open(os.path.join(srcDr, "fig.fig"), 'r') as figFile:
+            lifFig = figFile.readlines()
+    except IOError:
+        return figSaveFns
+
+    for lidx in range(len(lifFig) - 1):
+        figVals = lifFig[lidx].split()
+        if (len(figVals) > 0) and (figVals[0].lower() in figSaveCmds):
+            figFnVals = lifFig[lidx + 1].split()
+            if len(figFnVals) > 0:
+                figSaveFns.add(figFnVals[0].lower())
+
+    return figSaveFns
+
+
+##########################################################################
+def isSWATOutputFile(fnSWAT, figSaveFns=()):
+    """
+    This function tells whether a file is written by swat.
+    figSaveFns are the files of the save commands in fig.fig.
+    """
+    fnSWAT = os.path.basename(fnSWAT)
+    if fnSWAT.startswith("output"):
+        return True
+    if fnSWAT in swatOutFnLst:
+        return True
+    if fnSWAT.endswith(".out"):
+        return True
+    if fnSWAT.lower() in figSaveFns:
+        return True
+
+    return False
+
+
+##########################################################################
+def isReadOnlyInput(fnSWAT):
+    """
+    This function tells whether a file is an input file only read by
+    swat, which can be linked.
+    """
+    return os.path.splitext(fnSWAT)[1].lower() in swatReadOnlyExts
+
+
+##########################################################################
+def reflinkFile(fnSrc, fnDest):
+    """
+    This function clones fnSrc as fnDest. The two files share the
+    data on the disk until one of them is written. False is returned
+    when the system does not support it.
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return False
+
+    try:
+        with open(fnSrc, 'rb') as srcFile:
+            with open(fnDest, 'wb') as destFile:
+                fcntl.ioctl(destFile.fileno(), FICLONE, srcFile.fileno())
+    except OSError:
+        if os.path.isfile(fnDest):
+            os.remove(fnDest)
+        return False
+
+    return True
+
+
+##########################################################################
+def copyModifiableFile(fnSrc, destDir):
+    """
+    This function makes a separate copy of a file which will be
+    modified. A reflink is also a separate copy.
+    """
+    fnDest = os.path.join(destDir, os.path.basename(fnSrc))
+    try:
+        # A link left from before would write into the source
+        # file, so the old file is always removed.
+        if os.path.lexists(fnDest):
+            os.remove(fnDest)
+        if not reflinkFile(fnSrc, fnDest):
+            copyfile(fnSrc, fnDest)
+    except IOError as e:
+        print("Unable to copy file. {} due to: {}".format(fnSrc, e))
+        exit(1)
+
+
+##########################################################################
+def linkReadOnlyFile(fnSrc, destDir):
+    """
+    This function puts a file that is only read into destDir.
+    A hardlink is tried first, then a reflink and then a copy.
+    The method used is returned.
+    """
+    fnDest = os.path.join(destDir, os.path.basename(fnSrc))
+    try:
+        if os.path.lexists(fnDest):
+            # Already linked to the same file
+            if os.path.samefile(fnSrc, fnDest):
+                return "hardlink"
+            os.remove(fnDest)
+        try:
+            os.link(fnSrc, fnDest)
+            return "hardlink"
+        except OSError:
+            pass
+        if reflinkFile(fnSrc, fnDest):
+            return "reflink"
+        copyfile(fnSrc, fnDest)
+    except IOError as e:
+        print("Unable to copy file. {} due to: {}".format(fnSrc, e))
+        exit(1)
+
+    return "copy"
+
+
+##########################################################################
+def listProvisionFiles(srcDr, iLinkFiles):
+    """
+    This function lists the files in srcDr to be put into a working
+    directory: the files to be copied and the files to be linked.
+    Only the input files only read by swat are linked. The output
+    files of swat, the swat exe and the records of DMPOT are skipped.
+    """
+    modifiableNames = tuple(getModifiableNames())
+    figSaveFns = readFigSaveFiles(srcDr)
+    fnCopyLst = []
+    fnLinkLst = []
+    for fnSWAT in glob.glob("{}/*".format(srcDr)):
+        if not os.path.isfile(fnSWAT):
+            continue
+        if isSWATOutputFile(fnSWAT, figSaveFns) or (os.path.basename(fnSWAT) in [
+                fnSwatExe, fnAppliedParm, fnDirManifest]):
+            continue
+        if ((not iLinkFiles) or fnSWAT.endswith(modifiableNames)
+            or (not isReadOnlyInput(fnSWAT))):
+            fnCopyLst.append(fnSWAT)
+        else:
+            fnLinkLst.append(fnSWAT)
+
+    return fnCopyLst, fnLinkLst
+
+
+##########################################################################
+def getFileState(fnp):
+    """
+    This function returns the size and modification time of a file.
+    """
+    fileStat = os.stat(fnp)
+
+    return [fileStat.st_size, fileStat.st_mtime_ns]
+
+
+##########################################################################
+def hashFile(fnp):
+    """
+    This function returns the sha1 hash of the content of a file.
+    """
+    fileHash = hashlib.sha1()
+    with open(fnp, 'rb') as swatFile:
+        for fileBlock in iter(lambda: swatFile.read(1048576), b""):
+            fileHash.update(fileBlock)
+
+    return fileHash.hexdigest()
+
+
+##########################################################################
+def recordManifestEntry(fnSrc, destDr, provMethod):
+    """
+    This function makes the manifest entry of one file just put into
+    destDr. The hash is only kept for the files which can be modified,
+    the other files are restored when their size or time changed.
+    """
+    fnDest = os.path.join(destDr, os.path.basename(fnSrc))
+    manifestEntry = {
+        "method": provMethod,
+        "src": getFileState(fnSrc),
+        "dest": getFileState(fnDest),
+        "hash": None
+    }
+    if provMethod == "modifiable":
+        manifestEntry["hash"] = hashFile(fnSrc)
+
+    return manifestEntry
+
+
+##########################################################################
+def readDirManifest(destDr):
+    """
+    This function reads the manifest of a working directory. None is
+    returned when there is none.
+    """
+    try:
+        with open(os.path.join(destDr, fnDirManifest), 'r') as manifestFile:
+            dirManifest = json.load(manifestFile)
+    except (IOError, ValueError):
+        return None
+
+    if dirManifest.get("version") != dirManifestVersion:
+        return None
+
+    return dirManifest
+
+
+##########################################################################
+def writeDirManifest(destDr, dirManifest):
+    """
+    This function writes the manifest of a working directory.
+    """
+    fnpManifest = os.path.join(destDr, fnDirManifest)
+    with open(fnpManifest + ".tmp", 'w') as manifestFile:
+        json.dump(dirManifest, manifestFile)
+    os.replace(fnpManifest + ".tmp", fnpManifest)
+
+
+##########################################################################
+def isFileDiverged(fnSrc, destDr, manifestEntry):
+    """
+    This function tells whether a file in destDr is not the same as
+    when it was put there from fnSrc, or fnSrc changed since then.
+    A modifiable file whose time changed but which has the content of
+    the source again is not diverged, and its entry is updated.
+    """
+    fnDest = os.path.join(destDr, os.path.basename(fnSrc))
+    if manifestEntry is None:
+        return True
+    try:
+        srcState = getFileState(fnSrc)
+        destState = getFileState(fnDest)
+    except OSError:
+        return True
+
+    if srcState != manifestEntry["src"]:
+        return True
+    if manifestEntry["method"] == "hardlink":
+        return not os.path.samefile(fnSrc, fnDest)
+    if destState == manifestEntry["dest"]:
+        return False
+    if (manifestEntry["hash"] is None) or (destState[0] != srcState[0]):
+        return True
+    if hashFile(fnDest) != manifestEntry["hash"]:
+        return True
+
+    manifestEntry["dest"] = destState
+    return False
+
+
+##########################################################################
+def resetSWATDir(srcDr, destDr, iLinkFiles):
+    """
+    This function brings destDr back to the files in srcDr. Only the
+    files diverged from the manifest are copied or linked again, e.g.,
+    the files modified by DMPOT. Without a manifest for srcDr, the
+    whole directory is prepared by provisionSWATDir.
+    """
+    dirManifest = readDirManifest(destDr)
+    if ((dirManifest is None)
+        or (dirManifest["srcDr"] != os.path.abspath(srcDr))
+        or (dirManifest["iLinkFiles"] != iLinkFiles)):
+        provisionSWATDir(srcDr, destDr, iLinkFiles)
+        return
+
+    resetStartTime = datetime.datetime.now()
+
+    # The files get the original values again, so the record of the
+    # values written before is not valid any more.
+    fnpApplied = os.path.join(destDr, fnAppliedParm)
+    if os.path.isfile(fnpApplied):
+        os.remove(fnpApplied)
+
+    fnCopyLst, fnLinkLst = listProvisionFiles(srcDr, iLinkFiles)
+    manifestFiles = dirManifest["files"]
+    fnRestoreCopyLst = [fnSWAT for fnSWAT in fnCopyLst
+        if isFileDiverged(fnSWAT, destDr, manifestFiles.get(os.path.basename(fnSWAT)))]
+    fnRestoreLinkLst = [fnSWAT for fnSWAT in fnLinkLst
+        if isFileDiverged(fnSWAT, destDr, manifestFiles.get(os.path.basename(fnSWAT)))]
+
+    runFileTasks(copyModifiableFile, fnRestoreCopyLst, destDr)
+    for fnSWAT in fnRestoreCopyLst:
+        manifestFiles[os.path.basename(fnSWAT)] = recordManifestEntry(
+                fnSWAT, destDr, "modifiable")
+    for fnSWAT in fnRestoreLinkLst:
+        provMethod = linkReadOnlyFile(fnSWAT, destDr)
+        manifestFiles[os.path.basename(fnSWAT)] = recordManifestEntry(
+                fnSWAT, destDr, provMethod)
+
+    # Files no longer in the source are removed
+    fnSrcNames = set([os.path.basename(fnSWAT) for fnSWAT in fnCopyLst + fnLinkLst])
+    for fnSWAT in list(manifestFiles.keys()):
+        if fnSWAT not in fnSrcNames:
+            if os.path.lexists(os.path.join(destDr, fnSWAT)):
+                os.remove(os.path.join(destDr, fnSWAT))
+            del manifestFiles[fnSWAT]
+
+    writeDirManifest(destDr, dirManifest)
+
+    resetEndTime = datetime.datetime.now()
+    print(".....Reset {}: {} of {} files restored ({:.1f} MB); Time: {}.....".format(
+        destDr,
+        len(fnRestoreCopyLst) + len(fnRestoreLinkLst),
+        len(fnCopyLst) + len(fnLinkLst),
+        sum([os.path.getsize(fnSWAT)
+            for fnSWAT in fnRestoreCopyLst + fnRestoreLinkLst]) / 1048576.0,
+        resetEndTime - resetStartTime))
+
+
+##########################################################################
+def provisionSWATDir(srcDr, destDr, iLinkFiles):
+    """
+    This function prepares destDr from the files in srcDr. The input
+    files only read by swat are linked when iLinkFiles is True, the
+    other files are copied. The output files of swat and the
+    swat exe are skipped. The files put into destDr are recorded in
+    its manifest for resetSWATDir.
+    """
+    provStartTime = datetime.datetime.now()
+
+    if not os.path.isdir(destDr):
+        os.makedirs(destDr)
+
+    # The files get the original values again, so the record of the
+    # values written before is not valid any more.
+    fnpApplied = os.path.join(destDr, fnAppliedParm)
+    if os.path.isfile(fnpApplied):
+        os.remove(fnpApplied)
+
+    fnCopyLst, fnLinkLst = listProvisionFiles(srcDr, iLinkFiles)
+
+    runFileTasks(copyModifiableFile, fnCopyLst, destDr)
+    manifestFiles = {}
+    for fnSWAT in fnCopyLst:
+        manifestFiles[os.path.basename(fnSWAT)] = recordManifestEntry(
+                fnSWAT, destDr, "modifiable")
+
+    provMethods = {"copy": [len(fnCopyLst), 0],
+                   "hardlink": [0, 0],
+                   "reflink": [0, 0]}
+    provMethods["copy"][1] = sum([os.path.getsize(fnSWAT) for fnSWAT in fnCopyLst])
+    for fnSWAT in fnLinkLst:
+        provMethod = linkReadOnlyFile(fnSWAT, destDr)
+        manifestFiles[os.path.basename(fnSWAT)] = recordManifestEntry(
+                fnSWAT, destDr, provMethod)
+        provMethods[provMethod][0] = provMethods[provMethod][0] + 1
+        provMethods[provMethod][1] = provMethods[provMethod][1] + os.path.getsize(fnSWAT)
+
+    writeDirManifest(destDr, {
+        "version": dirManifestVersion,
+        "srcDr": os.path.abspath(srcDr),
+        "iLinkFiles": iLinkFiles,
+        "files": manifestFiles
+    })
+
+    provEndTime = datetime.datetime.now()
+    bytesSaved = provMethods["hardlink"][1] + provMethods["reflink"][1]
+    print(".....Prepared {}: {} files copied ({:.1f} MB), {} hardlinked, {} reflinked, {:.1f} MB saved; Time: {}.....".format(
+        destDr,
+        provMethods["copy"][0],
+        provMethods["copy"][1] / 1048576.0,
+        provMethods["hardlink"][0],
+        provMethods["reflink"][0],
+        bytesSaved / 1048576.0,
+        provEndTime - provStartTime))
+
+    return provMethods
@@ -0,0 +1,702 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+This class is designed to be a collection of functions dealing with
+the reach output of swat. When IA_B in file.cio is 1, swat also writes
+the reach output into the binary file outputb.rch, which is read with
+numpy much faster than the text output.rch. The text file is read by
+the position of the columns in the bytes of each line. Both files are
+memory-mapped, and the rows of the outlets are calculated from the
+layout of the output, so the time used depends on the number of
+outlets and not on the number of reaches. The reader used is selected
+from file.cio, and only the outlets and the variables with observed
+data are converted, into arrays for each outlet. The columns of the
+reach variables follow line 65 of file.cio, which only has the
+variables of the control file when iMinSwatOutput is True.
+
+@author: Qingyu.Feng
+"""
+
+##########################################################################
+# Import modules #########################################################
+##########################################################################
+import os
+import re
+import threading
+
+import numpy as np
+import pandas
+
+from .globVars import fnRchBinary, rchVarLst, varIDObsHdrPair, rchReadBudgetMB
+
+##########################################################################
+# Define functions #######################################################
+##########################################################################
+# Number of the reach output variables in swat (line 65 of file.cio)
+# and the headers used for them in the observed data.
+rchVarHdrPair = {
+    2: "sf(m3/s)",
+    6: "sed(t/ha)",
+    9: "orgn(kg/ha)",
+    11: "orgp(kg/ha)",
+    13: "no3n(kg/ha)",
+    15: "nh4n(kg/ha)",
+    17: "no2n(kg/ha)",
+    19: "minp(kg/ha)",
+    27: "solpst(mg/ha)",
+    29: "sorpst(mg/ha)"
+}
+
+# Columns before the variables in each row
+rchIdHdrs = ["RCH", "GIS", "MON", "AREAkm2"]
+
+# (start, width) of the columns in a line of the text output.rch,
+# which starts with the word REACH. Each variable has 12 characters.
+rchTextCols = {
+    "RCH": (5, 6),
+    "GIS": (11, 9),
+    "MON": (20, 6),
+    "AREAkm2": (26, 12)
+}
+rchTextVarStart = 38
+rchTextVarWidth = 12
+
+# Bytes used for each row of a chunk besides the row itself, by the
+# columns converted to find the rows of the outlets.
+rchChunkRowOverhead = 48
+
+# How the reach output was read in this process, and the most memory
+# used by the arrays of a reader.
+rchReadStats = {"indexed": 0, "streamed": 0, "read_fwf": 0, "peakMB": 0.0}
+rchReadLock = threading.Lock()
+
+
+##########################################################################
+def getRchVarHdrs(rchVarLstOut):
+    """
+    This function returns the headers of the variables written to
+    the reach output, in the order of line 65 in file.cio.
+    """
+    return [rchVarHdrPair.get(rchVar, "VAR{}".format(rchVar))
+                for rchVar in rchVarLstOut]
+
+
+##########################################################################
+def getObsOutletVars(obsDataLst):
+    """
+    This function returns the outlets and the headers of the variables
+    with observed data. The keys of obsDataLst start with the outlet
+    number, IPRINT and the variable id in the control file.
+    """
+    outLetLst = []
+    varHdrLst = []
+    for obsKey in obsDataLst.keys():
+        obsKeySP = obsKey.split("_")
+        if int(obsKeySP[0]) not in outLetLst:
+            outLetLst.append(int(obsKeySP[0]))
+        if varIDObsHdrPair[int(obsKeySP[2])] not in varHdrLst:
+            varHdrLst.append(varIDObsHdrPair[int(obsKeySP[2])])
+
+    return outLetLst, varHdrLst
+
+
+##########################################################################
+def readCioIAB(fdRunning):
+    """
+    This function reads IA_B in line 79 of file.cio. 0 is returned
+    when it can not be read.
+    """
+    try:
+        with open(os.path.join(fdRunning, "file.cio"), 'r') as cioFile:
+            lifCio = cioFile.readlines()
+        return int(lifCio[78].split("|")[0])
+    except (IOError, IndexError, ValueError):
+        return 0
+
+
+##########################################################################
+def readCioRchVars(fdRunning):
+    """
+    This function reads the reach variables printed by swat in line
+    65 of file.cio. None is returned when it can not be read or all
+    variables are printed, in which case rchVarLst is used.
+    """
+    try:
+        with open(os.path.join(fdRunning, "file.cio"), 'r') as cioFile:
+            lifCio = cioFile.readlines()
+        rchVarLstCio = [int(rchVar) for rchVar in lifCio[64].split()
+                        if int(rchVar) != 0]
+    except (IOError, IndexError, ValueError):
+        return None
+
+    if (len(rchVarLstCio) == 0) or any([rchVar not in rchVarHdrPair
+                                for rchVar in rchVarLstCio]):
+        return None
+
+    return rchVarLstCio
+
+
+##########################################################################
+def getRchVarLstOut(outputVarList):
+    """
+    This function returns the reach variables to be printed by swat
+    for the variables in outputVarList of the control file. The flow
+    is always printed. rchVarLst is returned when a variable is not a
+    column of the reach output, e.g., tp(kg/ha).
+    """
+    rchHdrVarPair = dict([(rchHdr, rchVar)
+                    for rchVar, rchHdr in rchVarHdrPair.items()])
+
+    rchVarLstOut = [2]
+    for outletVarID in outputVarList:
+        varHdr = varIDObsHdrPair.get(outletVarID)
+        if varHdr not in rchHdrVarPair:
+            print("Variable {} is not a column of the reach output, {} are printed".format(
+                outletVarID, rchVarLst))
+            return list(rchVarLst)
+        if rchHdrVarPair[varHdr] not in rchVarLstOut:
+            rchVarLstOut.append(rchHdrVarPair[varHdr])
+
+    return sorted(rchVarLstOut)
+
+
+##########################################################################
+def getRchBinaryDtype(fnRchBin, nRchVars):
+    """
+    This function makes the record type of outputb.rch. Each record is
+    written by fortran with its length before and after it:
+    length, RCH, GIS, MON, AREAkm2, nRchVars values, length
+    The integers have 4 bytes. The reals have 4 or 8 bytes, depending
+    on how swat was compiled, which is found from the record length.
+    None is returned when the file does not have this layout.
+    """
+    recLen = np.fromfile(fnRchBin, dtype="<i4", count=1)
+    if len(recLen) < 1:
+        return None
+    realBytes = (int(recLen[0]) - 12) / float(nRchVars + 1)
+    if realBytes not in [4, 8]:
+        return None
+
+    realType = "<f{}".format(int(realBytes))
+    rchRecDtype = np.dtype([
+        ("recHead", "<i4"),
+        ("RCH", "<i4"),
+        ("GIS", "<i4"),
+        ("MON", "<i4"),
+        ("AREAkm2", realType),
+        ("rchVars", realType, (nRchVars,)),
+        ("recTail", "<i4")])
+
+    if os.path.getsize(fnRchBin) % rchRecDtype.itemsize != 0:
+        return None
+
+    return rchRecDtype
+
+
+##########################################################################
+def selectRchTimeRows(rchMon, iPrintForCio, totalRchNum, rowStart=0, nRows=None):
+    """
+    This function selects the rows of each time step. When
+    iPrintForCio is 0 for month or 2 for annual, the output includes
+    rows for the annual sum and the average of the years for each rch,
+    which are removed. The average is in the last totalRchNum rows.
+    When the rows are a chunk of the output, rowStart is the index of
+    its first row and nRows the number of rows in the output.
+    """
+    if nRows is None:
+        nRows = rowStart + len(rchMon)
+    rowSel = np.ones(len(rchMon), dtype=bool)
+    if (iPrintForCio == 0) or (iPrintForCio == 2):
+        rowSel[max(0, nRows - totalRchNum - rowStart):] = False
+        rowSel = rowSel & (rchMon < 13)
+
+    return rowSel
+
+
+##########################################################################
+def getRchChunkRows(rowBytes, nRows):
+    """
+    This function returns the number of rows read at once, so that a
+    chunk and the arrays made from it use about rchReadBudgetMB.
+    All rows are read at once when rchReadBudgetMB is 0.
+    """
+    if (rchReadBudgetMB is None) or (rchReadBudgetMB <= 0):
+        return max(1, nRows)
+
+    return max(1, min(nRows, int(rchReadBudgetMB * 1048576
+                            // (rowBytes + rchChunkRowOverhead))))
+
+
+##########################################################################
+def iterRchChunks(fnp, bodyStart, rowBytes, nRows, chunkRows):
+    """
+    This function reads the rows of the reach output in chunks of
+    chunkRows rows into the same buffer. It yields the index of the
+    first row and the rows of the chunk as an array of bytes, which is
+    overwritten by the next chunk.
+    """
+    chunkBuf = np.empty((min(chunkRows, max(1, nRows)), rowBytes), dtype=np.uint8)
+    with open(fnp, 'rb') as rchFile:
+        rchFile.seek(bodyStart)
+        rowStart = 0
+        while rowStart < nRows:
+            nChunkRows = min(chunkRows, nRows - rowStart)
+            chunkView = chunkBuf[:nChunkRows]
+            nBytesRead = rchFile.readinto(chunkView)
+            if nBytesRead < chunkView.nbytes:
+                raise IOError("{} ended at row {}".format(fnp,
+                        rowStart + nBytesRead // rowBytes))
+            yield rowStart, chunkView
+            rowStart = rowStart + nChunkRows
+
+
+##########################################################################
+def recordRchRead(readMode, peakBytes):
+    """
+    This function records the reading of one reach output: how it was
+    read and the most memory used by the arrays of the reader.
+    """
+    with rchReadLock:
+        rchReadStats[readMode] = rchReadStats[readMode] + 1
+        rchReadStats["peakMB"] = max(rchReadStats["peakMB"], peakBytes / 1048576.0)
+
+
+##########################################################################
+def formatRchReadStats():
+    """
+    This function makes one line for printing how the reach output
+    was read in this process and the peak memory of the reader.
+    """
+    return "{} by outlet rows, {} streamed in chunks, {} by read_fwf; peak memory of the reader {:.1f} MB (budget {} MB)".format(
+        rchReadStats["indexed"],
+        rchReadStats["streamed"],
+        rchReadStats["read_fwf"],
+        rchReadStats["peakMB"],
+        rchReadBudgetMB)
+
+
+##########################################################################
+def getRchOutletRows(blockMon, iPrintForCio, totalRchNum, outLetLst):
+    """
+    This function calculates the rows of the outlets from the layout
+    of the reach output. Each time step has a block with one row for
+    each reach, in the order of the reach number, so the row of an
+    outlet is:
+    block index * totalRchNum + outlet number - 1
+    blockMon is MON in the first row of each block. The blocks of the
+    annual sum and of the average of the years are removed as in
+    selectRchTimeRows.
+    Output:
+    row indexes, the reach number expected in each row
+    """
+    outLetArr = np.unique(np.asarray(outLetLst, dtype=np.int64))
+    blockIdx = np.flatnonzero(selectRchTimeRows(blockMon, iPrintForCio, 1))
+    rowIdx = (blockIdx[np.newaxis, :] * totalRchNum
+                + (outLetArr[:, np.newaxis] - 1)).ravel()
+
+    return rowIdx, np.repeat(outLetArr, len(blockIdx))
+
+
+##########################################################################
+def isRchLayoutIndexed(nRows, totalRchNum, outLetLst):
+    """
+    This function tells whether the rows of the outlets can be
+    calculated: each block has totalRchNum rows and the outlets are
+    reach numbers.
+    """
+    if (outLetLst is None) or (len(outLetLst) == 0) or (totalRchNum < 1):
+        return False
+
+    return ((nRows % totalRchNum == 0)
+            and (min(outLetLst) >= 1) and (max(outLetLst) <= totalRchNum))
+
+
+##########################################################################
+def groupRchOutlets(rchNoSel, rchCols):
+    """
+    This function splits the columns of the selected rows by outlet.
+    The rows of each outlet keep their order in the output.
+    Output:
+    {outlet number: {header: values}}, each array is contiguous.
+    """
+    rowOrder = np.argsort(rchNoSel, kind="stable")
+    rchNoSorted = rchNoSel[rowOrder]
+    rchColsSorted = {}
+    for rchHdr, rchVals in rchCols.items():
+        rchColsSorted[rchHdr] = rchVals[rowOrder]
+
+    rchOutlets = {}
+    outLetNos, outLetStarts = np.unique(rchNoSorted, return_index=True)
+    outLetEnds = list(outLetStarts[1:]) + [len(rchNoSorted)]
+    for oltIdx in range(len(outLetNos)):
+        rchOutlets[int(outLetNos[oltIdx])] = dict([(rchHdr,
+                rchVals[outLetStarts[oltIdx]:outLetEnds[oltIdx]])
+                for rchHdr, rchVals in rchColsSorted.items()])
+
+    return rchOutlets
+
+
+##########################################################################
+def rchOutletsToDF(rchOutlets):
+    """
+    This function puts the arrays of the outlets into one dataframe
+    with the column RCH.
+    """
+    rchDFLst = []
+    for outLetNo, rchCols in rchOutlets.items():
+        rchDFCols = {"RCH": np.full(len(rchCols["MON"]), outLetNo, dtype=np.int64)}
+        rchDFCols.update(rchCols)
+        rchDFLst.append(pandas.DataFrame(rchDFCols))
+    if len(rchDFLst) == 0:
+        return pandas.DataFrame({"RCH": np.array([], dtype=np.int64),
+                                "MON": np.array([], dtype=np.int64)})
+
+    return pandas.concat(rchDFLst, ignore_index=True)
+
+
+##########################################################################
+def convertRchRecs(rchRecs, rchVarHdrs, varHdrLst):
+    """
+    This function converts the records of outputb.rch into columns.
+    Only the variables in varHdrLst are converted.
+    """
+    rchCols = {"MON": rchRecs["MON"].astype(np.int64)}
+    if varHdrLst is None:
+        rchCols["GIS"] = rchRecs["GIS"].astype(np.int64)
+        rchCols["AREAkm2"] = rchRecs["AREAkm2"].astype(np.float64)
+    for varIdx in range(len(rchVarHdrs)):
+        if (varHdrLst is None) or (rchVarHdrs[varIdx] in varHdrLst):
+            rchCols[rchVarHdrs[varIdx]] = rchRecs["rchVars"][:, varIdx].astype(np.float64)
+
+    return rchCols
+
+
+##########################################################################
+def readRchBinary(fnRchBin, iPrintForCio, totalRchNum, rchVarLstOut,
+                    outLetLst=None, varHdrLst=None):
+    """
+    This function reads outputb.rch into arrays for each outlet:
+    {outlet number: {header: values}}
+    When outLetLst is given, only the records of the outlets are read
+    from the memory-mapped file, which are found by getRchOutletRows.
+    Otherwise or when the records do not follow that layout, the file
+    is read in chunks and only the records of the outlets are kept.
+    Only the variables in varHdrLst are converted. None is returned
+    when the file does not match the variables written.
+    """
+    rchRecDtype = getRchBinaryDtype(fnRchBin, len(rchVarLstOut))
+    if rchRecDtype is None:
+        return None
+    nRecs = os.path.getsize(fnRchBin) // rchRecDtype.itemsize
+
+    rchRecs = None
+    if isRchLayoutIndexed(nRecs, totalRchNum, outLetLst):
+        rchRecsAll = np.memmap(fnRchBin, dtype=rchRecDtype, mode="r")
+        rowIdx, rchNoExp = getRchOutletRows(rchRecsAll["MON"][::totalRchNum],
+                                iPrintForCio, totalRchNum, outLetLst)
+        rchRecs = np.array(rchRecsAll[rowIdx])
+        # The map is closed, so swat can write the file in the next run
+        del rchRecsAll
+        if np.any(rchRecs["RCH"] != rchNoExp):
+            rchRecs = None
+        readMode = "indexed"
+        peakBytes = rchRecs.nbytes if rchRecs is not None else 0
+
+    if rchRecs is None:
+        chunkRows = getRchChunkRows(rchRecDtype.itemsize, nRecs)
+        rchRecsKept = []
+        keptBytes = 0
+        peakBytes = 0
+        for rowStart, chunkView in iterRchChunks(fnRchBin, 0, rchRecDtype.itemsize,
+                                        nRecs, chunkRows):
+            chunkRecs = chunkView.view(rchRecDtype).reshape(-1)
+            rowSel = selectRchTimeRows(chunkRecs["MON"], iPrintForCio,
+                                totalRchNum, rowStart, nRecs)
+            if outLetLst is not None:
+                rowSel = rowSel & np.isin(chunkRecs["RCH"], outLetLst)
+            rchRecsKept.append(chunkRecs[rowSel].copy())
+            keptBytes = keptBytes + rchRecsKept[-1].nbytes
+            peakBytes = max(peakBytes, keptBytes + chunkView.nbytes
+                                + len(chunkRecs) * rchChunkRowOverhead)
+        if len(rchRecsKept) == 0:
+            rchRecsKept.append(np.zeros(0, dtype=rchRecDtype))
+        rchRecs = np.concatenate(rchRecsKept)
+        del rchRecsKept
+        readMode = "streamed"
+
+    if (np.any(rchRecs["recHead"] != rchRecDtype.itemsize - 8)
+        or np.any(rchRecs["recTail"] != rchRecDtype.itemsize - 8)):
+        return None
+
+    rchCols = convertRchRecs(rchRecs, getRchVarHdrs(rchVarLstOut), varHdrLst)
+    recordRchRead(readMode, max(peakBytes, 2 * rchRecs.nbytes)
+                    + sum([rchVals.nbytes for rchVals in rchCols.values()]))
+
+    return groupRchOutlets(rchRecs["RCH"].astype(np.int64), rchCols)
+
+
+##########################################################################
+def getRchTextLayout(fnRch):
+    """
+    This function finds the lines of output.rch after the 9 header
+    lines. None is returned when the lines do not have the same
+    length, and the columns can not be found by their position.
+    Output:
+    position of the first line, length of a line, number of lines
+    """
+    with open(fnRch, 'rb') as rchFile:
+        lifHead = [rchFile.readline() for _ in range(10)]
+    if (len(lifHead[9]) == 0) or (not lifHead[9].endswith(b"\n")):
+        return None
+
+    bodyStart = sum([len(headLine) for headLine in lifHead[:9]])
+    lineLen = len(lifHead[9])
+    if (os.path.getsize(fnRch) - bodyStart) % lineLen != 0:
+        return None
+
+    return bodyStart, lineLen, (os.path.getsize(fnRch) - bodyStart) // lineLen
+
+
+##########################################################################
+def getRchTextField(rchRows, colStart, colWidth):
+    """
+    This function returns the text of one column in all rows.
+    """
+    return np.ascontiguousarray(rchRows[:, colStart:colStart + colWidth]).view(
+                "S{}".format(colWidth)).ravel()
+
+
+##########################################################################
+def convertRchReals(rchField):
+    """
+    This function converts the text of a column into numbers. Fortran
+    writes an exponent with 3 digits without the E, e.g., 0.1234-100,
+    and stars when the value is too large, which are converted one by
+    one.
+    """
+    try:
+        return rchField.astype(np.float64)
+    except ValueError:
+        pass
+
+    rchVals = np.empty(len(rchField))
+    for valIdx in range(len(rchField)):
+        rchText = rchField[valIdx].decode("ascii", "replace").strip()
+        try:
+            rchVals[valIdx] = float(rchText)
+        except ValueError:
+            try:
+                rchVals[valIdx] = float(re.sub(r"(\d)([+-]\d{3})$", r"\1E\2", rchText))
+            except ValueError:
+                rchVals[valIdx] = np.nan
+
+    return rchVals
+
+
+##########################################################################
+def convertRchTextRows(rchRowsSel, rchVarHdrs, varHdrLst):
+    """
+    This function converts the lines of output.rch into columns.
+    Only the variables in varHdrLst are converted.
+    """
+    rchCols = {"MON": convertRchReals(getRchTextField(rchRowsSel,
+                                *rchTextCols["MON"])).astype(np.int64)}
+    if varHdrLst is None:
+        rchCols["GIS"] = getRchTextField(rchRowsSel, *rchTextCols["GIS"]).astype(np.int64)
+        rchCols["AREAkm2"] = convertRchReals(getRchTextField(rchRowsSel,
+                                *rchTextCols["AREAkm2"]))
+    for varIdx in range(len(rchVarHdrs)):
+        if (varHdrLst is None) or (rchVarHdrs[varIdx] in varHdrLst):
+            rchCols[rchVarHdrs[varIdx]] = convertRchReals(getRchTextField(rchRowsSel,
+                    rchTextVarStart + rchTextVarWidth * varIdx, rchTextVarWidth))
+
+    return rchCols
+
+
+##########################################################################
+def readRchTextFast(fnRch, iPrintForCio, totalRchNum, rchVarLstOut,
+                    outLetLst=None, varHdrLst=None):
+    """
+    This function reads output.rch into arrays for each outlet:
+    {outlet number: {header: values}}
+    The columns are taken from the bytes of each line by position.
+    When outLetLst is given, only the lines of the outlets are read
+    from the memory-mapped file, which are found by getRchOutletRows.
+    Otherwise or when the lines do not follow that layout, the file is
+    read in chunks and only the lines of the outlets are kept. The
+    variables in varHdrLst are only converted for these lines. None is
+    returned when the lines do not have the same length.
+    """
+    rchTextLayout = getRchTextLayout(fnRch)
+    if rchTextLayout is None:
+        return None
+    bodyStart, lineLen, nRows = rchTextLayout
+
+    rchVarHdrs = getRchVarHdrs(rchVarLstOut)
+    if lineLen < rchTextVarStart + rchTextVarWidth * len(rchVarHdrs):
+        return None
+
+    rchRowsSel = None
+    if isRchLayoutIndexed(nRows, totalRchNum, outLetLst):
+        rchRows = np.memmap(fnRch, dtype=np.uint8, mode="r", offset=bodyStart,
+                    shape=(nRows, lineLen))
+        blockMon = convertRchReals(getRchTextField(rchRows[::totalRchNum],
+                                *rchTextCols["MON"]))
+        rowIdx, rchNoSel = getRchOutletRows(blockMon, iPrintForCio,
+                                totalRchNum, outLetLst)
+        rchRowsSel = np.array(rchRows[rowIdx])
+        # The map is closed, so swat can write the file in the next run
+        del rchRows
+        if np.any(getRchTextField(rchRowsSel, *rchTextCols["RCH"]).astype(np.int64)
+                    != rchNoSel):
+            rchRowsSel = None
+        readMode = "indexed"
+        peakBytes = rchRowsSel.nbytes if rchRowsSel is not None else 0
+
+    if rchRowsSel is None:
+        chunkRows = getRchChunkRows(lineLen, nRows)
+        rchRowsKept = []
+        rchNoKept = []
+        keptBytes = 0
+        peakBytes = 0
+        for rowStart, chunkView in iterRchChunks(fnRch, bodyStart, lineLen,
+                                        nRows, chunkRows):
+            rchNo = getRchTextField(chunkView, *rchTextCols["RCH"]).astype(np.int64)
+            rchMon = convertRchReals(getRchTextField(chunkView, *rchTextCols["MON"]))
+            rowSel = selectRchTimeRows(rchMon, iPrintForCio, totalRchNum,
+                                rowStart, nRows)
+            if outLetLst is not None:
+                rowSel = rowSel & np.isin(rchNo, outLetLst)
+            rchRowsKept.append(chunkView[rowSel])
+            rchNoKept.append(rchNo[rowSel])
+            keptBytes = keptBytes + rchRowsKept[-1].nbytes + rchNoKept[-1].nbytes
+            peakBytes = max(peakBytes, keptBytes + chunkView.nbytes
+                                + len(chunkView) * rchChunkRowOverhead)
+        if len(rchRowsKept) == 0:
+            rchRowsKept.append(np.zeros((0, lineLen), dtype=np.uint8))
+            rchNoKept.append(np.zeros(0, dtype=np.int64))
+        rchRowsSel = np.concatenate(rchRowsKept)
+        rchNoSel = np.concatenate(rchNoKept)
+        del rchRowsKept
+        readMode = "streamed"
+
+    if np.any(rchRowsSel[:, -1] != ord("\n")):
+        return None
+
+    rchCols = convertRchTextRows(rchRowsSel, rchVarHdrs, varHdrLst)
+    recordRchRead(readMode, max(peakBytes, 2 * rchRowsSel.nbytes)
+                    + sum([rchVals.nbytes for rchVals in rchCols.values()]))
+
+    return groupRchOutlets(rchNoSel, rchCols)
+
+
+##########################################################################
+def readRchText(fnRch, iPrintForCio, totalRchNum, rchVarLstOut,
+                    outLetLst=None, varHdrLst=None):
+    """
+    This function reads the text output.rch into a dataframe with
+    read_fwf, in chunks of the size given by rchReadBudgetMB. Only the
+    rows of outLetLst are kept from each chunk. The first column is
+    the word REACH, which is not kept.
+    """
+    rchVarHdrs = getRchVarHdrs(rchVarLstOut)
+    hedr = ["REACH"] + rchIdHdrs + rchVarHdrs
+    colWidth = [5, 6, 9, 6] + [12] * (len(rchVarHdrs) + 1)
+    keptHdrs = hedr[1:]
+    if varHdrLst is not None:
+        keptHdrs = ["RCH", "MON"] + [rchHdr for rchHdr in rchVarHdrs
+                                        if rchHdr in varHdrLst]
+
+    # The number of lines is not known here, so the chunk size is
+    # estimated from the length of a line.
+    if (rchReadBudgetMB is None) or (rchReadBudgetMB <= 0):
+        rchDFChunks = [pandas.read_fwf(fnRch, widths=colWidth, skiprows=9,
+                            names=hedr, usecols=hedr[1:])]
+    else:
+        rchDFChunks = pandas.read_fwf(fnRch, widths=colWidth, skiprows=9,
+                            names=hedr, usecols=hedr[1:],
+                            chunksize=getRchChunkRows(sum(colWidth) + 1, 2**31))
+    rchDFKept = []
+    nRows = 0
+    keptBytes = 0
+    peakBytes = 0
+    for rchDFChunk in rchDFChunks:
+        # The index of the rows continues from the last chunk
+        nRows = nRows + len(rchDFChunk)
+        chunkBytes = int(rchDFChunk.memory_usage().sum())
+        if outLetLst is not None:
+            rchDFChunk = rchDFChunk.loc[rchDFChunk["RCH"].isin(outLetLst)]
+        rchDFKept.append(rchDFChunk[keptHdrs])
+        keptBytes = keptBytes + int(rchDFKept[-1].memory_usage().sum())
+        peakBytes = max(peakBytes, keptBytes + chunkBytes)
+
+    if len(rchDFKept) == 0:
+        return pandas.DataFrame(columns=keptHdrs)
+    rchDF = pandas.concat(rchDFKept)
+
+    # Columns with an exponent of 3 digits are read as text
+    for rchHdr in keptHdrs:
+        if (rchHdr in rchVarHdrs) and (
+                not pandas.api.types.is_numeric_dtype(rchDF[rchHdr])):
+            rchDF[rchHdr] = convertRchReals(rchDF[rchHdr].to_numpy().astype("S"))
+
+    if (iPrintForCio == 0) or (iPrintForCio == 2):
+        rchDF = rchDF.loc[rchDF.index < nRows - totalRchNum]
+        rchDF = rchDF.loc[pandas.to_numeric(rchDF["MON"], errors="coerce") < 13]
+    recordRchRead("read_fwf", peakBytes)
+
+    return rchDF
+
+
+##########################################################################
+def getRchOutlets(fnRch, iPrintForCio, totalRchNum,
+                    outLetLst=None, varHdrLst=None, rchVarLstOut=None):
+    """
+    This function reads the reach output of a run in the folder of
+    fnRch into arrays for each outlet:
+    {outlet number: {header: values}}
+    outputb.rch is read when IA_B is 1 in file.cio, otherwise or when
+    the binary file does not match, the text output.rch. The text is
+    read with read_fwf when its lines do not have the same length.
+    rchVarLstOut is the list of variables in line 65 of file.cio,
+    which is read from file.cio by default. IOError is raised when
+    there is no output.
+    """
+    fdRunning = os.path.dirname(fnRch)
+    if rchVarLstOut is None:
+        rchVarLstOut = readCioRchVars(fdRunning)
+    if rchVarLstOut is None:
+        rchVarLstOut = rchVarLst
+
+    fnRchBin = os.path.join(fdRunning, fnRchBinary)
+    if (readCioIAB(fdRunning) == 1) and os.path.isfile(fnRchBin):
+        rchOutlets = readRchBinary(fnRchBin, iPrintForCio, totalRchNum,
+                    rchVarLstOut, outLetLst, varHdrLst)
+        if rchOutlets is not None:
+            return rchOutlets
+        print("File {} does not match the reach variables, {} is read".format(
+            fnRchBin, fnRch))
+
+    rchOutlets = readRchTextFast(fnRch, iPrintForCio, totalRchNum,
+                    rchVarLstOut, outLetLst, varHdrLst)
+    if rchOutlets is not None:
+        return rchOutlets
+
+    rchDF = readRchText(fnRch, iPrintForCio, totalRchNum,
+                    rchVarLstOut, outLetLst, varHdrLst)
+
+    return groupRchOutlets(rchDF["RCH"].to_numpy(dtype=np.int64),
+                dict([(rchHdr, rchDF[rchHdr].to_numpy())
+                    for rchHdr in rchDF.columns if rchHdr != "RCH"]))
+
+
+##########################################################################
+def getRchOutput(fnRch, iPrintForCio, totalRchNum,
+                    outLetLst=None, varHdrLst=None, rchVarLstOut=None):
+    """
+    This function reads the reach output of a run as getRchOutlets,
+    into one dataframe.
+    """
+    return rchOutletsToDF(getRchOutlets(fnRch, iPrintForCio, totalRchNum,
+                    outLetLst, varHdrLst, rchVarLstOut))
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+This class is designed to be a collection of functions dealing with
+running SWAT evaluations in ray actors. Each actor owns a working
+directory on its own node, which is prepared from the local
+TxtInOut folder. Only parameter values are sent to the actors and
+only statistics and outlet series are sent back.
+
+@author: Qingyu.Feng
+"""
+
+##########################################################################
+# Import modules #########################################################
+##########################################################################
+import os
+import socket
+
+import ray
+
+from .globVars import *
+from .RaySWATUtil import initRay
+from . import PARALLELUtil
+from .PARALLELUtil import *
+
+##########################################################################
+# Define functions #######################################################
+##########################################################################
+@ray.remote
+class SWATActor:
+    """
+    A ray actor holding one working directory. The directory is
+    created from the TxtInOut folder of the project on the node of
+    the actor, so the project folder needs to be available at the
+    same path on each node.
+    """
+
+    def __init__(self, projDir, actorIdx, ctrlSetting, evalContext,
+                    parmSubLvl, parmBsnLvl):
+        # Each actor is its own process, the relative folder names
+        # in globVars are used from the project folder.
+        os.chdir(projDir)
+        PARALLELUtil.initWorkerEvalContext(evalContext)
+
+        if not os.path.isdir(fdWorkerDirs):
+            os.makedirs(fdWorkerDirs, exist_ok=True)
+        self.runningDir = os.path.join(fdWorkerDirs,
+                        "ray_{}_{:02d}".format(socket.gethostname(), actorIdx))
+        resetSWATDir(fdmodelTxtInOut, self.runningDir, iLinkReadOnlyFiles)
+        modFileCio(ctrlSetting, self.runningDir)
+        stageSWATExe(self.runningDir, projDir, fdDMPOTpyFiles, fnSwatExe)
+
+        # Parameter tables used to receive the values of each run
+        self.subParGroups = {}
+        for subGPKey in evalContext["swatSubFnGroups"].keys():
+            self.subParGroups[subGPKey] = parmSubLvl.copy()
+        self.parmBsnLvl = parmBsnLvl.copy()
+
+    def getRunningDir(self):
+        return "{}:{}".format(socket.gethostname(), self.runningDir)
+
+    def evalParmVector(self, subTestVals, bsnTestVals):
+        """
+        Set the TestVal of the parameter tables, evaluate them in the
+        working directory of the actor and return the statistics and
+        the simulated outlet series.
+        """
+        for subGPKey, subGPL in self.subParGroups.items():
+            subGPL["TestVal"] = subTestVals[subGPKey]
+        self.parmBsnLvl["TestVal"] = bsnTestVals
+
+        # The outlet series come from the same read of output.rch as
+        # the statistics.
+        return evalParmSetInDir(self.runningDir, self.subParGroups,
+                        self.parmBsnLvl, iReturnSeries=True)
+
+
+##########################################################################
+class RaySWATWorkerPool:
+    """
+    This class has the same interface as SWATWorkerPool, but each
+    worker is a SWATActor.
+    """
+
+    def __init__(self, nWorkers, ctrlSetting, evalContext,
+                    parmSubLvl, parmBsnLvl):
+        initRay(rayAddress, rayNumCpus)
+
+        self.freeActors = [SWATActor.remote(fdMain, actorIdx + 1,
+                            ctrlSetting, evalContext,
+                            parmSubLvl, parmBsnLvl)
+                            for actorIdx in range(nWorkers)]
+        self.pendingEvals = {}
+
+        # Wait until all actors have their working directory
+        actorDirs = ray.get([swatActor.getRunningDir.remote()
+                            for swatActor in self.freeActors])
+        for actorDir in actorDirs:
+            print(".....Ray actor working directory: {}.....".format(actorDir))
+
+    def hasFreeWorker(self):
+        return len(self.freeActors) > 0
+
+    def hasPendingEval(self):
+        return len(self.pendingEvals) > 0
+
+    def submitEval(self, evalTag, subParGroups, parmBsnLvl):
+        """
+        Send the TestVal of one parameter set to a free actor.
+        """
+        if not self.hasFreeWorker():
+            print("No free ray actor for evaluation {}".format(evalTag))
+            exit(1)
+        swatActor = self.freeActors.pop(0)
+        subTestVals = {}
+        for subGPKey, subGPL in subParGroups.items():
+            subTestVals[subGPKey] = list(subGPL["TestVal"])
+        bsnTestVals = list(parmBsnLvl["TestVal"])
+
+        evalRef = swatActor.evalParmVector.remote(subTestVals, bsnTestVals)
+        self.pendingEvals[evalRef] = (evalTag, swatActor)
+
+        return swatActor
+
+    def waitAnyEval(self):
+        """
+        Wait until at least one evaluation is finished and return
+        the finished ones as a list of (evalTag, evalResult).
+        """
+        doneEvals = []
+        if len(self.pendingEvals) == 0:
+            return doneEvals
+
+        doneRefs, _ = ray.wait(list(self.pendingEvals.keys()),
+                            num_returns=1)
+        for evalRef in doneRefs:
+            evalTag, swatActor = self.pendingEvals.pop(evalRef)
+            self.freeActors.append(swatActor)
+            doneEvals.append((evalTag, ray.get(evalRef)))
+
+        return doneEvals
+
+    def shutdown(self):
+        # The actors still running an evaluation are killed as well
+        for swatActor in self.freeActors + [pendingEval[1]
+                            for pendingEval in self.pendingEvals.values()]:
+            ray.kill(swatActor)
+        self.freeActors = []
+        self.pendingEvals = {}
@@ -15,13 +15,15 @@ from SALib.test_functions import Ishigami
 import numpy as np
 import math
 
-from .globVars import useRay
-from .DMPOTUtil import getRch2DF
+import os
+import json
+import datetime
 
-if useRay: 
-    from .RaySWATUtil import *
-else:
-    from .SWATUtil import *
+from .globVars import iModParm, iRunSWAT, fnSwatExe, varIDObsHdrPair
+from .DMPOTUtil import getRch2DF, runSWATInDir, get_osplatform
+from .SUPERVISORUtil import isRunFailed
+from . import PARALLELUtil
+from .SWATUtil import *
 
 
 ##########################################################################
@@ -112,7 +114,9 @@ def extractAvgAnnEachGroup(runningDir,
     """
     fnRch = os.path.join(runningDir, "output.rch")
     try:
-        rchDFWhole = getRch2DF(fnRch, iPrintForCio, len(rcvRchLst))
+        rchDFWhole = getRch2DF(fnRch, iPrintForCio, len(rcvRchLst),
+                    outLetList, [varIDObsHdrPair[outletVarID]
+                                    for outletVarID in outputVarList])
     except IOError as e:
         print("File {} does not exist: {}. Please double check your TxtInOut \
             folder and make sure you have a complete set".format(fnRch, e))
@@ -133,7 +137,7 @@ def extractAvgAnnEachGroup(runningDir,
         # For daily, no aggregation is needed.
         # Frist, extract the corresponding outlet and variable
         # Then, aggregate as needed.
-        simOutVarHeader = ["RCH","GIS", "MON", "AREAkm2"] + [outVarHdrNm]
+        simOutVarHeader = ["RCH", "MON"] + [outVarHdrNm]
         simOutVarDF = rchDFWhole.loc[rchDFWhole["RCH"] == outLetNo][simOutVarHeader]
         outLetAvgAnnList[outLetNo][saRunIdx] = simOutVarDF[outVarHdrNm].mean()
 
@@ -141,5 +145,148 @@ def extractAvgAnnEachGroup(runningDir,
     
 
 
+def loadOrSaveSASamples(fnpParmSamplesNpy, parmSamples, parmForSA,
+                    sampleMethod, sampleArg):
 
+    """
+    This function keeps the samples of a sensitivity analysis in
+    full precision, so that a restarted job evaluates the same samples.
+    The parameter names and bounds, the method and its argument (N) are
+    saved with the samples in a json file. The saved samples are only
+    used when they were generated with the same settings. Otherwise,
+    the new samples are saved and the job starts again.
+    Output:
+    parmSamples, iResume (True when the saved samples are used)
+    """
+    fnpSampleSet = os.path.splitext(fnpParmSamplesNpy)[0] + ".json"
+    sampleSet = {
+        "names": list(parmForSA["names"]),
+        "bounds": [list(map(float, parmBounds)) for parmBounds in parmForSA["bounds"]],
+        "method": sampleMethod,
+        "N": sampleArg,
+        "shape": list(parmSamples.shape)
+    }
+
+    if os.path.isfile(fnpParmSamplesNpy):
+        try:
+            with open(fnpSampleSet, 'r') as sampleSetFile:
+                savedSampleSet = json.load(sampleSetFile)
+        except (IOError, ValueError):
+            savedSampleSet = None
+        if savedSampleSet == sampleSet:
+            savedSamples = np.load(fnpParmSamplesNpy)
+            if list(savedSamples.shape) == sampleSet["shape"]:
+                print(".....Using saved samples in {}.....".format(fnpParmSamplesNpy))
+                return savedSamples, True
+        print(".....Saved samples in {} do not match the parameters, bounds, method or N, starting again.....".format(
+            fnpParmSamplesNpy))
+
+    np.save(fnpParmSamplesNpy, parmSamples)
+    with open(fnpSampleSet, 'w') as sampleSetFile:
+        json.dump(sampleSet, sampleSetFile, indent=1)
+
+    return parmSamples, False
+
+
+def initSARunOutput(fnSARunOutput, outLetList, totalSamples, iResume):
+
+    """
+    This function prepares the file recording the outlet values of
+    each finished sample. When resuming, the values of finished
+    samples are read back from this file.
+    Output:
+    outLetAvgAnnList, saDoneRuns (set of finished sample index)
+    """
+    outLetAvgAnnList = {}
+    for outLetNo in outLetList:
+        outLetAvgAnnList[outLetNo] = np.zeros(totalSamples)
+    saDoneRuns = set()
+
+    if iResume and os.path.isfile(fnSARunOutput):
+        with open(fnSARunOutput, 'r') as saOutFile:
+            lifSAOut = saOutFile.readlines()
+        # The first line is the header. A line not completely
+        # written when the job stopped is ignored and removed from
+        # the file, so that new lines are appended properly.
+        lifSAOutKept = lifSAOut[:1]
+        for saOutLine in lifSAOut[1:]:
+            saOutVals = saOutLine.strip().split(",")
+            if ((not saOutLine.endswith("\n"))
+                or (len(saOutVals) != len(outLetList) + 1)):
+                continue
+            # A sample of a failed run recorded with nan values is
+            # run again.
+            if any([math.isnan(float(saOutVal)) for saOutVal in saOutVals[1:]]):
+                continue
+            lifSAOutKept.append(saOutLine)
+            saRunIdx = int(saOutVals[0])
+            for oltNoIdx in range(len(outLetList)):
+                outLetAvgAnnList[outLetList[oltNoIdx]][saRunIdx] = float(
+                    saOutVals[oltNoIdx + 1])
+            saDoneRuns.add(saRunIdx)
+        with open(fnSARunOutput, 'w') as saOutFile:
+            saOutFile.writelines(lifSAOutKept)
+        print(".....{} of {} samples were finished before.....".format(
+            len(saDoneRuns), totalSamples))
+    else:
+        with open(fnSARunOutput, 'w') as saOutFile:
+            saOutFile.writelines("RunNo," + ",".join(
+                ["Olt_{}".format(outLetNo) for outLetNo in outLetList]) + "\n")
+
+    return outLetAvgAnnList, saDoneRuns
+
+
+def appendSARunOutput(fnSARunOutput, saRunIdx, outLetList, outLetAvgAnnList):
+
+    """
+    This function appends the outlet values of one finished sample
+    to the record file.
+    """
+    lfwSAOut = "{},".format(saRunIdx) + ",".join(
+        ["{}".format(outLetAvgAnnList[outLetNo][saRunIdx])
+            for outLetNo in outLetList]) + "\n"
+    with open(fnSARunOutput, 'a') as saOutFile:
+        saOutFile.writelines(lfwSAOut)
+
+
+def evalSASampleInDir(runningDir, subParGroups, parmBsnLvl):
+
+    """
+    This function runs one sample in a worker directory and extracts
+    the average values of each outlet. It is used by the worker pool.
+    """
+    evalContext = PARALLELUtil.workerEvalContext
+    evalStartTime = datetime.datetime.now()
+    if iModParm:
+        PARALLELUtil.modifyParmSetInDir(runningDir, subParGroups, parmBsnLvl)
+    modifyEndTime = datetime.datetime.now()
+
+    swatRunInfo = None
+    if iRunSWAT:
+        swatRunInfo = runSWATInDir(get_osplatform(), runningDir, fnSwatExe)
+    runEndTime = datetime.datetime.now()
+
+    # One value for each outlet. A killed or failed run gets nan.
+    oltAvgAnnVal = {}
+    for outLetNo in evalContext["outLetList"]:
+        oltAvgAnnVal[outLetNo] = np.full(1, np.nan)
+    if not isRunFailed(swatRunInfo):
+        oltAvgAnnVal = extractAvgAnnEachGroup(runningDir,
+            evalContext["iPrintForCio"],
+            evalContext["outLetList"],
+            evalContext["outputVarList"],
+            oltAvgAnnVal,
+            evalContext["rcvRchLst"],
+            varIDObsHdrPair,
+            0)
+
+    evalResult = {
+        "runningDir": runningDir,
+        "runInfo": swatRunInfo,
+        "modifyTime": modifyEndTime - evalStartTime,
+        "runTime": runEndTime - modifyEndTime,
+        "oltAvgAnnVal": dict([(outLetNo, oltVal[0])
+                            for outLetNo, oltVal in oltAvgAnnVal.items()])
+    }
 
+    return evalResult
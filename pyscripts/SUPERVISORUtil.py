@@ -0,0 +1,324 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+This class is designed to be a collection of functions dealing with
+supervising the swat runs. Each run gets a time limit derived from
+the median time of the recent runs, and runs exceeding it are killed.
+The exit code, wall time and peak memory of each run are returned,
+so that they can be logged and failed runs get a penalty objective
+function value.
+
+@author: Qingyu.Feng
+"""
+
+##########################################################################
+# Import modules #########################################################
+##########################################################################
+import os
+import sys
+import signal
+import asyncio
+import datetime
+import statistics
+import threading
+import subprocess
+import collections
+
+from .globVars import *
+
+##########################################################################
+# Define functions #######################################################
+##########################################################################
+# Wall time (seconds) of the recent successful runs of this process.
+# Each worker process keeps its own record, which is enough since all
+# runs are done with the same model.
+swatRunTimes = collections.deque(maxlen=runTimeoutWindow)
+
+# Interval (seconds) of reading the peak memory of the swat runs
+# started with an asyncio subprocess.
+procRssSampleSec = 1.0
+
+
+##########################################################################
+def getRunTimeout():
+    """
+    This function returns the time limit (seconds) of the next run,
+    or None when there is no limit.
+    """
+    if runTimeoutFactor is None:
+        return None
+    if len(swatRunTimes) < runTimeoutMinRuns:
+        return runTimeoutInit
+
+    return max(runTimeoutMin, runTimeoutFactor * statistics.median(swatRunTimes))
+
+
+##########################################################################
+def initRunInfo(runningDir):
+    """
+    This function initializes the record of one swat run.
+    """
+    swatRunInfo = {
+        "runningDir": runningDir,
+        "runCode": "Error",
+        "wallTime": 0.0,
+        "peakRssMB": None,
+        "timeout": None,
+        "timedOut": False
+    }
+
+    return swatRunInfo
+
+
+##########################################################################
+def waitSWATProc(swatProc, runTimeout):
+    """
+    This function waits for the swat process and kills it when it
+    runs longer than runTimeout. The exit code, whether it was killed
+    and the peak memory (MB) are returned.
+    """
+    if not hasattr(os, "wait4"):
+        # Windows: the peak memory is not available
+        try:
+            swatProc.wait(timeout=runTimeout)
+            return swatProc.returncode, False, None
+        except subprocess.TimeoutExpired:
+            swatProc.kill()
+            swatProc.wait()
+            return swatProc.returncode, True, None
+
+    runState = {"done": False, "timedOut": False}
+    runLock = threading.Lock()
+
+    def killSWATProc():
+        with runLock:
+            if not runState["done"]:
+                runState["timedOut"] = True
+                os.kill(swatProc.pid, signal.SIGKILL)
+
+    killTimer = None
+    if runTimeout is not None:
+        killTimer = threading.Timer(runTimeout, killSWATProc)
+        killTimer.daemon = True
+        killTimer.start()
+
+    # The process is waited without being reaped first, so that the
+    # timer can not kill another process getting the same pid.
+    os.waitid(os.P_PID, swatProc.pid, os.WEXITED | os.WNOWAIT)
+    with runLock:
+        runState["done"] = True
+    if killTimer is not None:
+        killTimer.cancel()
+
+    _, waitStatus, runUsage = os.wait4(swatProc.pid, 0)
+    swatProc.returncode = os.waitstatus_to_exitcode(waitStatus)
+
+    # ru_maxrss is in bytes on mac and in KB on linux
+    if sys.platform == "darwin":
+        peakRssMB = runUsage.ru_maxrss / 1048576.0
+    else:
+        peakRssMB = runUsage.ru_maxrss / 1024.0
+
+    return swatProc.returncode, runState["timedOut"], peakRssMB
+
+
+##########################################################################
+def superviseSWATRun(runningDir, fnSwatExe, iQuiet=False):
+    """
+    This function runs the swat exe staged in the running folder with
+    the time limit from getRunTimeout. The screen output of swat is not
+    shown when iQuiet is True, e.g., when several runs are done at the
+    same time.
+    """
+    swatRunInfo = initRunInfo(runningDir)
+    swatRunInfo["timeout"] = getRunTimeout()
+
+    if iQuiet:
+        procOutput = subprocess.DEVNULL
+    else:
+        procOutput = None
+
+    fnpSWATExeWD = os.path.abspath(os.path.join(runningDir, fnSwatExe))
+    runStartTime = datetime.datetime.now()
+    try:
+        swatProc = subprocess.Popen([fnpSWATExeWD], cwd=runningDir,
+                        stdout=procOutput, stderr=procOutput)
+    except OSError as e:
+        print("Unable to start swat in {}: {}".format(runningDir, e))
+        return swatRunInfo
+
+    runCode, timedOut, peakRssMB = waitSWATProc(swatProc, swatRunInfo["timeout"])
+
+    return finishRunInfo(swatRunInfo, runStartTime, runCode, timedOut, peakRssMB)
+
+
+##########################################################################
+def finishRunInfo(swatRunInfo, runStartTime, runCode, timedOut, peakRssMB):
+    """
+    This function completes the record of a finished swat run. Only
+    normal runs are used for the time limit.
+    """
+    swatRunInfo["wallTime"] = (datetime.datetime.now() - runStartTime).total_seconds()
+    swatRunInfo["runCode"] = runCode
+    swatRunInfo["timedOut"] = timedOut
+    swatRunInfo["peakRssMB"] = peakRssMB
+
+    if not isRunFailed(swatRunInfo):
+        swatRunTimes.append(swatRunInfo["wallTime"])
+
+    return swatRunInfo
+
+
+##########################################################################
+def readProcPeakRss(procPid):
+    """
+    This function reads the peak memory (MB) of a running process,
+    VmHWM in /proc/pid/status. None is returned when it is not
+    available, e.g., not on linux or the process has exited.
+    """
+    try:
+        with open("/proc/{}/status".format(procPid), 'r') as statusFile:
+            for statusLine in statusFile:
+                if statusLine.startswith("VmHWM:"):
+                    return int(statusLine.split()[1]) / 1024.0
+    except (IOError, ValueError, IndexError):
+        pass
+
+    return None
+
+
+##########################################################################
+async def sampleProcPeakRss(procPid, runState):
+    """
+    This function keeps the largest peak memory read from a running
+    process in runState["peakRssMB"], until it is cancelled.
+    """
+    while True:
+        peakRssMB = readProcPeakRss(procPid)
+        if peakRssMB is not None:
+            runState["peakRssMB"] = max(runState["peakRssMB"] or 0.0, peakRssMB)
+        await asyncio.sleep(procRssSampleSec)
+
+
+##########################################################################
+async def superviseSWATRunAsync(runningDir, fnSwatExe):
+    """
+    This function is the asyncio version of superviseSWATRun. Swat is
+    started with an asyncio subprocess, so no thread waits for it, and
+    is killed when it runs longer than the time limit. The screen output
+    of swat is not shown.
+    The process is reaped by the event loop, so its resource usage
+    from os.wait4 is not available. The peak memory is read from the
+    process while it runs, every procRssSampleSec seconds (linux only).
+    """
+    swatRunInfo = initRunInfo(runningDir)
+    swatRunInfo["timeout"] = getRunTimeout()
+
+    fnpSWATExeWD = os.path.abspath(os.path.join(runningDir, fnSwatExe))
+    runStartTime = datetime.datetime.now()
+    try:
+        swatProc = await asyncio.create_subprocess_exec(fnpSWATExeWD,
+                        cwd=runningDir,
+                        stdout=asyncio.subprocess.DEVNULL,
+                        stderr=asyncio.subprocess.DEVNULL)
+    except OSError as e:
+        print("Unable to start swat in {}: {}".format(runningDir, e))
+        return swatRunInfo
+
+    runState = {"peakRssMB": None}
+    rssTask = asyncio.ensure_future(sampleProcPeakRss(swatProc.pid, runState))
+    timedOut = False
+    try:
+        runCode = await asyncio.wait_for(swatProc.wait(), swatRunInfo["timeout"])
+    except asyncio.TimeoutError:
+        timedOut = True
+        swatProc.kill()
+        runCode = await swatProc.wait()
+    rssTask.cancel()
+
+    return finishRunInfo(swatRunInfo, runStartTime, runCode, timedOut,
+                    runState["peakRssMB"])
+
+
+##########################################################################
+def isRunFailed(swatRunInfo):
+    """
+    This function tells whether a swat run was killed or failed.
+    None means swat was not run (iRunSWAT = 0).
+    """
+    if swatRunInfo is None:
+        return False
+
+    return swatRunInfo["timedOut"] or (swatRunInfo["runCode"] != 0)
+
+
+##########################################################################
+def calPenaltyObjFunc(parmObjFnKeys):
+    """
+    This function gives the objective function values of a failed run.
+    The output of the run is not complete, so no statistics are
+    calculated and each group gets failedRunObjVal.
+    """
+    subObfTestDict = {}
+    subAllStats = {}
+    obfValNonOther = []
+    for subGPKey in parmObjFnKeys:
+        subObfTestDict[subGPKey] = failedRunObjVal
+        if not subGPKey == "Other":
+            subAllStats[subGPKey] = {}
+            obfValNonOther.append(failedRunObjVal)
+
+    return subObfTestDict, obfValNonOther, subAllStats
+
+
+##########################################################################
+def initRunLog(fnpRunLog, iResume=False):
+    """
+    This function creates the file recording each swat run. When
+    resuming, the lines of the runs before are kept.
+    """
+    if iResume and os.path.isfile(fnpRunLog):
+        return
+
+    with open(fnpRunLog, 'w') as runLogFile:
+        runLogFile.writelines(
+            "RunNo,RunningDir,ExitCode,WallTime_s,PeakRSS_MB,Timeout_s,Status\n")
+
+
+##########################################################################
+def appendRunLog(fnpRunLog, runIdx, swatRunInfo):
+    """
+    This function appends the record of one swat run to the run log.
+    """
+    if swatRunInfo is None:
+        return
+
+    if swatRunInfo["timedOut"]:
+        runStatus = "Killed"
+        print(".....SWAT run {} in {} was killed after {:.1f} s (limit {:.1f} s).....".format(
+            runIdx, swatRunInfo["runningDir"],
+            swatRunInfo["wallTime"], swatRunInfo["timeout"]))
+    elif swatRunInfo["runCode"] != 0:
+        runStatus = "Failed"
+        print(".....SWAT run {} in {} failed with exit code {}.....".format(
+            runIdx, swatRunInfo["runningDir"], swatRunInfo["runCode"]))
+    else:
+        runStatus = "OK"
+
+    peakRssMB = ""
+    if swatRunInfo["peakRssMB"] is not None:
+        peakRssMB = "{:.1f}".format(swatRunInfo["peakRssMB"])
+    runTimeout = ""
+    if swatRunInfo["timeout"] is not None:
+        runTimeout = "{:.1f}".format(swatRunInfo["timeout"])
+
+    lfwRunLog = "{},{},{},{:.2f},{},{},{}\n".format(runIdx,
+        swatRunInfo["runningDir"],
+        swatRunInfo["runCode"],
+        swatRunInfo["wallTime"],
+        peakRssMB,
+        runTimeout,
+        runStatus)
+    with open(fnpRunLog, 'a') as runLogFile:
+        runLogFile.writelines(lfwRunLog)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+"""
+Created on Sun Oct 18 2026
+
+This class is designed to be a collection of functions dealing with
+the original files in the TxtInOut folder. The parameter values are
+always calculated from the original files, which do not change during
+a run. They are read once and kept in memory. The files used least
+recently are removed when the cache is larger than templateCacheMB.
+
+@author: Qingyu.Feng
+"""
+
+##########################################################################
+# Import modules #########################################################
+##########################################################################
+import sys
+import threading
+import collections
+
+from .globVars import templateCacheMB
+
+##########################################################################
+# Define functions #######################################################
+##########################################################################
+# {fnpOrig: (lines of the file, size in bytes)}, the file used last
+# is at the end.
+templateCache = collections.OrderedDict()
+templateCacheSize = 0
+templateCacheStats = {"hits": 0, "misses": 0, "evictions": 0}
+# The file functions can run in threads
+templateCacheLock = threading.Lock()
+
+
+##########################################################################
+def readTemplateLines(fnpOrig, encoding=None):
+    """
+    This function returns the lines of an original file as a new
+    list, so the caller can change it. The file is only read when it
+    is not in the cache. IOError is raised as by open.
+    """
+    global templateCacheSize
+
+    with templateCacheLock:
+        if fnpOrig in templateCache:
+            templateCache.move_to_end(fnpOrig)
+            templateCacheStats["hits"] = templateCacheStats["hits"] + 1
+            return list(templateCache[fnpOrig][0])
+
+    with open(fnpOrig, 'r', encoding=encoding) as swatFileOrig:
+        lifOrig = tuple(swatFileOrig.readlines())
+
+    if templateCacheMB is None or templateCacheMB <= 0:
+        return list(lifOrig)
+
+    lifOrigSize = sys.getsizeof(lifOrig) + sum([sys.getsizeof(lifLine)
+                                        for lifLine in lifOrig])
+    cacheLimit = templateCacheMB * 1048576
+
+    with templateCacheLock:
+        templateCacheStats["misses"] = templateCacheStats["misses"] + 1
+        if (lifOrigSize <= cacheLimit) and (fnpOrig not in templateCache):
+            templateCache[fnpOrig] = (lifOrig, lifOrigSize)
+            templateCacheSize = templateCacheSize + lifOrigSize
+            while templateCacheSize > cacheLimit:
+                _, (_, evictSize) = templateCache.popitem(last=False)
+                templateCacheSize = templateCacheSize - evictSize
+                templateCacheStats["evictions"] = templateCacheStats["evictions"] + 1
+
+    return list(lifOrig)
+
+
+##########################################################################
+def formatTemplateCacheStats():
+    """
+    This function makes one line for printing the use of the cache.
+    """
+    return "{} files ({:.1f} MB), {} hits, {} misses, {} evictions".format(
+        len(templateCache),
+        templateCacheSize / 1048576.0,
+        templateCacheStats["hits"],
+        templateCacheStats["misses"],
+        templateCacheStats["evictions"])
@@ -16,11 +16,90 @@ import os, sys
 # Define classes #########################################################
 ##########################################################################
 
+# Kept for old settings, True is the same as fileExecType = "ray"
 useRay = False
 iFlagCopy = False
 iRunSWAT = True
 # Only used in applyBestParmSet and sa to facilitate testing
 iModParm = True
+# Number of working directory replicas running SWAT at the same time.
+# 1 keeps the original serial run in fdWorkingDir.
+nWorkers = 1
+# Number of DDS candidates evaluated together in each iteration
+# when nWorkers > 1.
+ddsBatchSize = nWorkers
+# How DDS uses the workers when nWorkers > 1:
+# "batch": ddsBatchSize candidates are evaluated together.
+# "async": a new candidate is sent to a worker as soon as it is free.
+# "pipeline": two working directories are used alternately, the next
+# candidate is written while swat runs the current one.
+ddsParallelMode = "batch"
+# Where the workers run:
+# "local": worker processes on this computer.
+# "ray": ray actors, each with its own working directory on its node.
+workerBackend = "local"
+# Address of the ray cluster, e.g., "auto" after `ray start --head`.
+# None starts a local ray with rayNumCpus cpus (None for all cpus).
+rayAddress = None
+rayNumCpus = None
+# How the subarea and hru files are rewritten in each run:
+# "serial", "thread", "process" or "ray".
+# fileIOLimit is the number of threads, i.e., the number of files read
+# and written at the same time in the thread mode.
+# fileExecWorkers is the number of processes (None for the number of
+# cpus), fileChunkSize is the number of files in one task. In the
+# thread mode, the tasks are smaller when there are not enough files
+# to keep all threads busy.
+fileExecType = "serial"
+fileIOLimit = 16
+fileExecWorkers = None
+fileChunkSize = 200
+# Working directories hardlink (or reflink) the input files only read
+# by swat, e.g., weather files and databases, to the TxtInOut folder.
+# The other files are copied. Set to False to copy all files.
+iLinkReadOnlyFiles = True
+# Time limit of each swat run. A run is killed when it takes more than
+# runTimeoutFactor times the median time of the last runTimeoutWindow
+# normal runs, but not before runTimeoutMin seconds. Until
+# runTimeoutMinRuns runs are finished, runTimeoutInit seconds are used
+# (None for no limit). Set runTimeoutFactor = None to switch it off.
+# Killed or failed runs get failedRunObjVal as objective function value.
+runTimeoutFactor = 5.0
+runTimeoutWindow = 20
+runTimeoutMinRuns = 3
+runTimeoutMin = 60
+runTimeoutInit = None
+failedRunObjVal = 10e2
+# Memory (MB) used to keep the original TxtInOut files, from which
+# the parameter values are calculated. The files used least recently
+# are removed when it is full. 0 reads the files in each run.
+templateCacheMB = 512
+# Each working directory records the parameter values written in its
+# files in fnAppliedParm. The file types and groups whose values did not
+# change since the last run are not rewritten, and the files whose new
+# content is the same are not written. Set to False to rewrite all files.
+iSkipUnchangedFiles = True
+fnAppliedParm = "DMPOTAppliedParm.json"
+# Each prepared directory records the files put into it from TxtInOut
+# in fnDirManifest. When it is prepared again (iFlagCopy), only the
+# files diverged from TxtInOut are copied.
+fnDirManifest = "DMPOTManifest.json"
+# The .gw, .hru, .sol, .mgt and .chm files of each hru are updated
+# together, so each file is read and written once in a run. Set to
+# False to update them file type by file type.
+iHruBundle = True
+# Lines with the "{:16.3f}    | NAME : ..." layout written by DMPOT
+# before only get their value field overwritten. Other files are
+# rewritten completely.
+iPatchInPlace = True
+# The original values of the parameters changed by fraction (SLOPE,
+# CN_F, GW_SPYLD, CH_SII and the soil layers) are kept in numpy arrays
+# for all files, so a run multiplies the values of a group at once
+# instead of reading each original file. The arrays are saved in
+# fdFracBase and memory-mapped by the next runs when iFracBaseMmap is
+# True. Set iFracBaseStore to False to use the original files.
+iFracBaseStore = True
+iFracBaseMmap = True
 
 # Folder structure
 fdProjSetup = "01projSetupContPara"
@@ -32,6 +111,10 @@ fdWorkingDir = "05workingDir"
 fdOutputs = "06outputFiles"
 fdCalibrated = "07calibratedTIO"
 fdSA = "08sensitivityAnalysis"
+fdWorkerDirs = "05workingDirWorkers"
+
+# Saved arrays of the original values changed by fraction
+fdFracBase = os.path.join(fdOutputs, "fracBaseStore")
 
 if not os.path.isdir(fdWorkingDir):
     os.mkdir(fdWorkingDir)
@@ -67,6 +150,13 @@ fnCtrlJsonUsr = os.path.join(fdOutputs, "usrControl.json")
 fnParmSetComb = os.path.join(fdProjSetup, "dmpot_Para_Combined.set")
 fnParmUsed = os.path.join(fdOutputs, "usrParmInCal.csv")
 
+# Exit code, wall time and peak memory of each swat run
+fnRunLog = os.path.join(fdOutputs, "DMPOTRunLog.csv")
+
+# Index of the hru files and hru attributes built from the TxtInOut
+# folder. It is built again when the files in TxtInOut change.
+fnProjIndex = os.path.join(fdOutputs, "DMPOTProjIndex.json")
+
 # Reach shapefile path-name
 fnReachShp = os.path.join(fdgisLayers, "reach.shp")
 
@@ -78,6 +168,13 @@ pastHayLst = ["PAST", "HAY", "ALFA"]
 forestLst = ["FRST", "FRSD", "FRSE"]
 urbanLst = ["URHD", "URMD", "URML", "URLD", "UCOM", "UIDU", "UTRN", "UINS"]
 
+# Land use categories of the crops in plant.dat (crop.dat). A crop
+# parameter, e.g., USLE_C, changes the crops of the categories in
+# cropCategoriesDefault. A Symbol ending with a category, e.g.,
+# BIO_E_FRST, changes only the crops of that category.
+cropCategories = {"ROWCROP": rowCropLst, "PAST": pastHayLst, "FRST": forestLst}
+cropCategoriesDefault = ["ROWCROP", "PAST"]
+
 # OutVariable header and numbers in the observed files
 # In the Control File:
 # Output Variables (0-15): '0- Baseflow', '1-Stream Flow',
@@ -115,6 +212,23 @@ varIDObsHdrPair = {
 # rchVarSelLst = [0, 1, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 0, 0]
 rchVarLst = [2, 6, 9, 11, 13, 15, 17, 19, 27, 29]
 
+# Binary reach output written by swat when IA_B in file.cio is 1
+fnRchBinary = "outputb.rch"
+
+# file.cio only prints the reach variables of outputVarList in the
+# control file and the flow, which is used for the flow duration curve.
+# The subbasin output is reduced to one variable, and the print codes
+# of the outputs not read by DMPOT, e.g., output.pst, output.sol and
+# output.mgt, are set to 0. Set to False to print rchVarLst and the
+# other outputs as in the TxtInOut folder.
+iMinSwatOutput = True
+
+# Memory (MB) used to read the reach output when the rows of the
+# outlets can not be found from the layout of the file. The file is
+# then read in chunks of this size and only the rows of the outlets
+# are kept. 0 reads the whole file at once.
+rchReadBudgetMB = 64
+
 # if calibration of sediements,nutrient, or pesticides is based on
 # concentrations, out_id will be 1 since SF will be needed to compute conc.
 # set all to zero to get the loads: Sediment (ton), P & N (kg), Pesticide (mg) 